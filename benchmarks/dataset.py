@@ -0,0 +1,186 @@
+"""Seeded synthetic dataset of users, teams and story points for benchmarks.
+
+Usage::
+
+    python -m benchmarks.dataset --users 500 --teams 20 --story-points 200000
+    DATABASE_URL=postgresql://... python -m benchmarks.dataset --seed 7
+
+The benchmarks share this module's target database: ``DATABASE_URL`` when it
+is set, otherwise a throwaway SQLite file (see ``bench_engine()``). Its schema
+is dropped and recreated on every run, so never point ``DATABASE_URL`` at
+real data.
+
+The same arguments always produce the same rows. Dates are laid out relative
+to today's midnight (UTC), so "last 30 days" queries see the same data shape
+on every run. The shape is meant to resemble a real workspace:
+
+* activity per user is log-normal, so a few users log most of the points;
+* team sizes are uneven and about one user in ten belongs to two teams;
+* nearly all tasks close on weekdays, during working hours, and activity
+  grows slowly towards the present;
+* points follow the Fibonacci scale, with small estimates most common.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from core.models import Base, StoryPoint, Team, TeamMember, User
+from core.rollup import rebuild_daily_rollup
+
+POINT_SCALE = (1, 2, 3, 5, 8, 13)
+POINT_WEIGHTS = (15, 25, 25, 20, 10, 5)
+
+# Share of tasks closed on a Saturday or Sunday
+WEEKEND_SHARE = 0.05
+
+# Share of users who are also in a second team
+SECOND_TEAM_SHARE = 0.1
+
+INSERT_BATCH = 10_000
+
+# Chance of keeping a sampled weekend day so that WEEKEND_SHARE of tasks land
+# on weekends: 2p / (5 + 2p) == WEEKEND_SHARE
+_WEEKEND_ACCEPT = 5 * WEEKEND_SHARE / (2 * (1 - WEEKEND_SHARE))
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    users: int = 500
+    teams: int = 20
+    story_points: int = 100_000
+    days: int = 180
+    seed: int = 42
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _anchor() -> datetime:
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _completion_time(rng: random.Random, days: int, anchor: datetime) -> datetime:
+    while True:
+        # Triangular towards 0 days ago: recent weeks are busier
+        day = anchor - timedelta(days=int(rng.triangular(0, days, 0)) + 1)
+        if day.weekday() < 5 or rng.random() < _WEEKEND_ACCEPT:
+            break
+    hour = min(max(rng.gauss(14, 2.5), 8), 21)
+    return day + timedelta(seconds=int(hour * 3600))
+
+
+def _users(spec: DatasetSpec, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "telegram_id": str(100000 + i),
+            "username": f"user{i}" if rng.random() < 0.8 else None,
+            "first_name": f"User{i}",
+            "last_name": f"Bench{i % 97}" if rng.random() < 0.6 else None,
+        }
+        for i in range(spec.users)
+    ]
+
+
+def _memberships(spec: DatasetSpec, rng: random.Random) -> List[Dict[str, int]]:
+    team_weights = [rng.paretovariate(1.5) for _ in range(spec.teams)]
+    team_ids = list(range(1, spec.teams + 1))
+    rows = []
+    for user_id in range(1, spec.users + 1):
+        teams = {rng.choices(team_ids, team_weights)[0]}
+        if spec.teams > 1 and rng.random() < SECOND_TEAM_SHARE:
+            teams.add(rng.choice([team for team in team_ids if team not in teams]))
+        rows.extend({"team_id": team_id, "user_id": user_id} for team_id in sorted(teams))
+    return rows
+
+
+def _story_points(
+    spec: DatasetSpec, rng: random.Random, anchor: datetime
+) -> Iterator[Dict[str, Any]]:
+    user_ids = list(range(1, spec.users + 1))
+    activity = list(accumulate(rng.lognormvariate(0, 1) for _ in user_ids))
+    point_weights = list(accumulate(POINT_WEIGHTS))
+    for _ in range(spec.story_points):
+        user_id = rng.choices(user_ids, cum_weights=activity)[0]
+        yield {
+            "user_id": user_id,
+            "points": float(rng.choices(POINT_SCALE, cum_weights=point_weights)[0]),
+            "description": f"PRJ{user_id % 7}-{rng.randint(1, 9999)}",
+            "date_completed": _completion_time(rng, spec.days, anchor),
+        }
+
+
+def bench_database_url() -> str:
+    """``DATABASE_URL``, or a new throwaway SQLite file when it is unset."""
+    return os.getenv("DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+
+def reset_schema(engine: Engine) -> None:
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+
+def bench_engine() -> Engine:
+    """Engine on ``bench_database_url()`` with an empty schema."""
+    engine = create_engine(bench_database_url())
+    reset_schema(engine)
+    return engine
+
+
+def generate(engine: Engine, spec: DatasetSpec) -> None:
+    """Drop and recreate the schema on ``engine``, then load ``spec``'s dataset."""
+    rng = random.Random(spec.seed)
+    anchor = _anchor()
+
+    reset_schema(engine)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), _users(spec, rng))
+        conn.execute(
+            insert(Team),
+            [{"name": f"Team {team_id}"} for team_id in range(1, spec.teams + 1)],
+        )
+        conn.execute(insert(TeamMember), _memberships(spec, rng))
+
+        batch = []
+        for row in _story_points(spec, rng, anchor):
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                conn.execute(insert(StoryPoint), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(StoryPoint), batch)
+
+    with Session(engine) as session:
+        rebuild_daily_rollup(session)
+        session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=DatasetSpec.users)
+    parser.add_argument("--teams", type=int, default=DatasetSpec.teams)
+    parser.add_argument("--story-points", type=int, default=DatasetSpec.story_points)
+    parser.add_argument("--days", type=int, default=DatasetSpec.days)
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(args.users, args.teams, args.story_points, args.days, args.seed)
+    engine = create_engine(bench_database_url())
+
+    started = time.perf_counter()
+    generate(engine, spec)
+    print(f"Seeded {spec} into {engine.url} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
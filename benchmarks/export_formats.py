@@ -0,0 +1,172 @@
+"""Size, export time and load time of the team CSV export against Parquet.
+
+Usage::
+
+    python -m benchmarks.export_formats --members 200 --points 500000
+    DATABASE_URL=postgresql://... python -m benchmarks.export_formats
+
+The database comes from ``benchmarks.dataset.bench_engine()``. Loading is
+timed the way the nightly analytics job does it: into a pandas DataFrame.
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pyarrow.parquet as pq
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import db.database
+from benchmarks.dataset import bench_engine
+from core.export import ExportService
+from core.models import StoryPoint, Team, TeamMember, User
+
+
+def seed(engine, members: int, points: int, days: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {"telegram_id": str(100000 + i), "first_name": f"User{i}"}
+                for i in range(members)
+            ],
+        )
+        conn.execute(insert(Team), [{"name": "Bench Team"}])
+        conn.execute(
+            insert(TeamMember),
+            [{"team_id": 1, "user_id": i + 1} for i in range(members)],
+        )
+
+    batch = []
+    with engine.begin() as conn:
+        for _ in range(points):
+            batch.append(
+                {
+                    "user_id": rng.randint(1, members),
+                    "points": float(rng.choice((1, 2, 3, 5, 8, 13))),
+                    "description": f"TASK-{rng.randint(1, 99999)}",
+                    "date_completed": now
+                    - timedelta(seconds=rng.randint(0, days * 86400)),
+                }
+            )
+            if len(batch) >= 10000:
+                conn.execute(insert(StoryPoint), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(StoryPoint), batch)
+
+
+def use_database(database_url: str) -> None:
+    """Point the global DatabaseManager's async engine at ``database_url``."""
+    async_url = database_url.replace("postgresql://", "postgresql+asyncpg://").replace(
+        "sqlite://", "sqlite+aiosqlite://"
+    )
+    manager = db.database.db_manager
+    manager.async_engine = create_async_engine(async_url)
+    manager.AsyncSessionLocal = async_sessionmaker(
+        manager.async_engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+
+async def export_both(workdir: str, days: int) -> dict:
+    service = ExportService()
+    results = {}
+
+    started = time.perf_counter()
+    spooled = await service.spool(service.stream_team_data_csv(1, days=days))
+    csv_path = os.path.join(workdir, "team.csv")
+    with spooled, open(csv_path, "wb") as output:
+        shutil.copyfileobj(spooled, output)
+    results["csv"] = {"path": csv_path, "export_s": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    parquet_path = await service.export_team_data_parquet(
+        1, days=days, destination=os.path.join(workdir, "team.parquet")
+    )
+    results["parquet"] = {
+        "path": parquet_path,
+        "export_s": time.perf_counter() - started,
+    }
+
+    started = time.perf_counter()
+    partitioned_path = await service.export_team_data_parquet(
+        1,
+        days=days,
+        destination=os.path.join(workdir, "team_by_month"),
+        partition_by_month=True,
+    )
+    results["parquet/month"] = {
+        "path": partitioned_path,
+        "export_s": time.perf_counter() - started,
+    }
+
+    await db.database.db_manager.async_engine.dispose()
+    return results
+
+
+def disk_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def load(name: str, path: str, repeat: int) -> tuple:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        if name == "csv":
+            frame = pd.read_csv(path, parse_dates=["Дата"])
+        else:
+            frame = pq.read_table(path).to_pandas()
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(frame)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--points", type=int, default=300000)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    engine = bench_engine()
+    database_url = engine.url.render_as_string(hide_password=False)
+
+    print(f"Seeding {args.members} members / {args.points} story points into {engine.url}")
+    seed(engine, args.members, args.points, args.history_days, args.seed)
+    engine.dispose()
+
+    use_database(database_url)
+    results = asyncio.run(export_both(workdir, args.history_days))
+
+    csv_size = disk_size(results["csv"]["path"])
+    print("\nformat          rows   size_mb  vs_csv  export_s  load_s")
+    for name, result in results.items():
+        size = disk_size(result["path"])
+        load_s, rows = load(name, result["path"], args.repeat)
+        print(
+            f"{name:<13}{rows:>7}{size / 2**20:>10.2f}{size / csv_size:>8.2f}"
+            f"{result['export_s']:>10.2f}{load_s:>8.3f}"
+        )
+
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Cold-start import cost of the bot's modules, measured with ``-X importtime``.
+
+Usage::
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time bot.main core.export --repeat 10 --top 15
+
+Each module is imported ``--repeat`` times in a fresh interpreter. The report
+gives the median cumulative import time, the packages that took longest to
+import (summed self time) in the median run, and which of the optional heavy
+dependencies (pandas, NumPy, openpyxl, pyarrow, aiohttp) were loaded.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow", "aiohttp")
+
+
+def import_once(module: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """Import ``module`` in a fresh interpreter.
+
+    Returns its cumulative import time (ms), the self time per top-level
+    package (ms) and the heavy modules that ended up loaded.
+    """
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages: Dict[str, float] = {}
+    total = 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == module:
+            total = int(cumulative) / 1000
+        # Self times add up without double counting nested imports
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(own) / 1000
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total, packages, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=["bot.main", "core.services", "core.export"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        runs = sorted((import_once(module) for _ in range(args.repeat)), key=lambda run: run[0])
+        total, packages, loaded = runs[len(runs) // 2]
+        print(
+            f"{module}: median {statistics.median(run[0] for run in runs):.1f} ms "
+            f"over {args.repeat} runs; heavy modules loaded: {', '.join(loaded) or 'none'}"
+        )
+        heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        for package, cost in heaviest[: args.top]:
+            print(f"    {package:<24}{cost:>9.1f} ms")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Concurrent writers and readers on SQLite: default settings against the bot's profile.
+
+Usage::
+
+    python -m benchmarks.sqlite_writers --writers 16 --readers 4
+    python -m benchmarks.sqlite_writers --writes-per-writer 500 --read-pause-ms 0
+
+Each writer is an asyncio task committing single story points through its own
+``AsyncSession`` on the aiosqlite engine, like concurrent ``/add`` handlers.
+Readers repeatedly run the leaderboard query meanwhile. The "default" run
+uses a plain engine (rollback journal, ``synchronous=FULL``); "profile" adds
+the pragmas ``DatabaseManager`` sets for SQLite files (WAL,
+``synchronous=NORMAL``, cache, mmap, busy timeout). Each run gets a fresh
+throwaway database file.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from core.config import Settings
+from core.export import _leaderboard_query
+from core.models import Base, StoryPoint, User
+from db.database import sqlite_pragmas
+from db.dialects import set_sqlite_pragmas
+
+PROFILES = ("default", "profile")
+
+
+def prepare(path: str, users: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [{"telegram_id": str(100000 + i), "first_name": f"User{i}"} for i in range(users)],
+        )
+    engine.dispose()
+
+
+async def run_once(profile: str, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    prepare(path, args.writers)
+
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", pool_size=args.writers + args.readers
+    )
+    if profile == "profile":
+        set_sqlite_pragmas(engine.sync_engine, sqlite_pragmas(Settings()))
+    sessions = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    latencies = []
+    errors = {"locked": 0}
+    reads = {"count": 0}
+    writing = {"active": args.writers}
+
+    async def writer(user_id: int) -> None:
+        try:
+            for seq in range(args.writes_per_writer):
+                started = time.perf_counter()
+                try:
+                    async with sessions() as session:
+                        session.add(
+                            StoryPoint(
+                                user_id=user_id,
+                                points=3.0,
+                                description=f"task {seq}",
+                                date_completed=datetime.utcnow(),
+                            )
+                        )
+                        await session.commit()
+                except OperationalError:
+                    # "database is locked" once the busy timeout runs out
+                    errors["locked"] += 1
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            writing["active"] -= 1
+
+    async def reader() -> None:
+        query = _leaderboard_query(datetime.utcnow() - timedelta(days=30), 10)
+        while writing["active"]:
+            try:
+                async with sessions() as session:
+                    (await session.execute(query)).all()
+                reads["count"] += 1
+            except OperationalError:
+                errors["locked"] += 1
+            await asyncio.sleep(args.read_pause_ms / 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(writer(user_id) for user_id in range(1, args.writers + 1)),
+        *(reader() for _ in range(args.readers)),
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    return {
+        "commits": len(latencies),
+        "seconds": elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p95_ms": statistics.quantiles(latencies, n=20)[-1] if len(latencies) > 1 else 0.0,
+        "reads": reads["count"],
+        "locked": errors["locked"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writes-per-writer", type=int, default=200)
+    parser.add_argument("--read-pause-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    print(
+        f"{args.writers} writers x {args.writes_per_writer} commits, "
+        f"{args.readers} leaderboard readers\n"
+    )
+    print("profile   commits  seconds  commits/s  p50_ms  p95_ms   reads  locked")
+    for profile in PROFILES:
+        result = asyncio.run(run_once(profile, args))
+        print(
+            f"{profile:<8}{result['commits']:>9}{result['seconds']:>9.2f}"
+            f"{result['commits'] / result['seconds']:>11.1f}{result['p50_ms']:>8.2f}"
+            f"{result['p95_ms']:>8.2f}{result['reads']:>8}{result['locked']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Query plans and latencies of the time-windowed story_points queries,
+before and after the ``StoryPoint`` indexes are created.
+
+Usage::
+
+    python -m benchmarks.story_point_indexes --users 2000 --points 1000000
+    DATABASE_URL=postgresql://... python -m benchmarks.story_point_indexes
+
+The database comes from ``benchmarks.dataset.bench_engine()``.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, func, insert, select, text
+
+from benchmarks.dataset import bench_engine
+from core.models import StoryPoint, User
+
+
+def seed(engine, users: int, points: int, days: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {"telegram_id": str(100000 + i), "first_name": f"User{i}"}
+                for i in range(users)
+            ],
+        )
+
+    batch = []
+    with engine.begin() as conn:
+        for _ in range(points):
+            batch.append(
+                {
+                    "user_id": rng.randint(1, users),
+                    "points": float(rng.choice((1, 2, 3, 5, 8, 13))),
+                    "date_completed": now
+                    - timedelta(seconds=rng.randint(0, days * 86400)),
+                }
+            )
+            if len(batch) >= 10000:
+                conn.execute(insert(StoryPoint), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(StoryPoint), batch)
+
+
+def queries(user_id: int, window_days: int):
+    start_date = datetime.utcnow() - timedelta(days=window_days)
+    return {
+        "user_stats": select(
+            func.sum(StoryPoint.points),
+            func.count(StoryPoint.id),
+            func.avg(StoryPoint.points),
+        ).where(
+            StoryPoint.user_id == user_id,
+            StoryPoint.date_completed >= start_date,
+        ),
+        "user_daily": select(
+            func.date(StoryPoint.date_completed).label("date"),
+            func.sum(StoryPoint.points),
+            func.count(StoryPoint.id),
+        )
+        .where(
+            StoryPoint.user_id == user_id,
+            StoryPoint.date_completed >= start_date,
+        )
+        .group_by(func.date(StoryPoint.date_completed))
+        .order_by("date"),
+        "leaderboard": select(
+            User.id,
+            User.first_name,
+            func.sum(StoryPoint.points).label("total_points"),
+        )
+        .join(StoryPoint, User.id == StoryPoint.user_id)
+        .where(StoryPoint.date_completed >= start_date)
+        .group_by(User.id, User.first_name)
+        .order_by(desc("total_points"))
+        .limit(10),
+    }
+
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(conn, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN" if conn.dialect.name == "sqlite" else "EXPLAIN ANALYZE"
+    rows = conn.execute(text(f"{prefix} {compiled}")).fetchall()
+    # SQLite returns (id, parent, notused, detail); PostgreSQL a single column
+    return "\n".join(str(row[-1]) for row in rows)
+
+
+def measure(engine, user_ids, window_days: int, repeat: int) -> dict:
+    results = {}
+    with engine.connect() as conn:
+        for name, stmt in queries(user_ids[0], window_days).items():
+            plan = explain(conn, stmt)
+            timings = []
+            for i in range(repeat):
+                stmt = queries(user_ids[i % len(user_ids)], window_days)[name]
+                started = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = {"plan": plan, "median_ms": statistics.median(timings)}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--points", type=int, default=300000)
+    parser.add_argument("--history-days", type=int, default=365)
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = bench_engine()
+    indexes = list(StoryPoint.__table__.indexes)
+    for index in indexes:
+        index.drop(engine)
+
+    print(f"Seeding {args.users} users / {args.points} story points into {engine.url}")
+    seed(engine, args.users, args.points, args.history_days, args.seed)
+
+    rng = random.Random(args.seed)
+    user_ids = [rng.randint(1, args.users) for _ in range(args.repeat)]
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    before = measure(engine, user_ids, args.window_days, args.repeat)
+
+    for index in indexes:
+        index.create(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    after = measure(engine, user_ids, args.window_days, args.repeat)
+
+    for name in before:
+        print(f"\n=== {name} ===")
+        print(f"-- before ({before[name]['median_ms']:.2f} ms median)")
+        print(before[name]["plan"])
+        print(f"-- after ({after[name]['median_ms']:.2f} ms median)")
+        print(after[name]["plan"])
+
+    print("\nquery          before_ms   after_ms   speedup")
+    for name in before:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<14}{b:>10.2f}{a:>11.2f}{b / a:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Service and export timings on a seeded dataset, written as JSON for comparison.
+
+Usage::
+
+    python -m benchmarks.suite --output results/sqlite.json
+    DATABASE_URL=postgresql://localhost/storybot_bench python -m benchmarks.suite --output results/postgres.json
+    python -m benchmarks.suite --output results/after.json --compare results/before.json
+
+The database is seeded with ``benchmarks.dataset``; see there for how it is
+chosen. Every case runs once to warm up and then ``--repeat`` times through the
+async services the bot uses; caches are cleared before each run, so the
+numbers are database round trips rather than cache hits (the ``/cached``
+cases time the cache hit on purpose).
+
+The JSON file holds the dataset spec, the backend and the git commit next to
+the min/median/p95 of each case. With ``--compare``, medians are checked
+against an earlier file, and cases slower by more than ``--threshold`` are
+flagged.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import sqlalchemy
+from sqlalchemy import desc, func, select
+
+import db.database
+from benchmarks.dataset import DatasetSpec, bench_database_url, generate
+from core.export import ExportService
+from core.models import StoryPoint, TeamMember, User
+from core.services import (
+    AsyncStoryPointService,
+    AsyncTeamService,
+    AsyncUserService,
+    UserService,
+    leaderboard_cache,
+)
+from db.database import DatabaseManager
+
+Case = Callable[[], Awaitable[Any]]
+
+
+def pick_targets(manager: DatabaseManager, window_days: int) -> Tuple[Dict[str, Any], int]:
+    """The profile of the most active user in the window, and the largest team."""
+    start_date = datetime.utcnow() - timedelta(days=window_days)
+    with manager.get_session() as session:
+        user = session.execute(
+            select(User.telegram_id, User.username, User.first_name, User.last_name)
+            .join(StoryPoint, StoryPoint.user_id == User.id)
+            .where(StoryPoint.date_completed >= start_date)
+            .group_by(User.telegram_id, User.username, User.first_name, User.last_name)
+            .order_by(desc(func.count()))
+            .limit(1)
+        ).one()
+        team_id = session.scalar(
+            select(TeamMember.team_id)
+            .group_by(TeamMember.team_id)
+            .order_by(desc(func.count()), TeamMember.team_id)
+            .limit(1)
+        )
+    return dict(user._mapping), team_id
+
+
+async def _drain(stream) -> None:
+    async for _ in stream:
+        pass
+
+
+async def _close(result: Awaitable[Any]) -> None:
+    (await result).close()
+
+
+def build_cases(
+    user: Dict[str, Any], team_id: int, team_ids: List[int], days: int
+) -> Dict[str, Case]:
+    telegram_id = user["telegram_id"]
+    users = AsyncUserService()
+    story_points = AsyncStoryPointService()
+    teams = AsyncTeamService()
+    export = ExportService()
+
+    return {
+        # The seeded profile, so the upsert takes its unchanged-profile path
+        # and leaves the dataset as generated
+        "users.get_or_create_user": lambda: users.get_or_create_user(**user),
+        "story_points.get_user_stats": lambda: story_points.get_user_stats(telegram_id, days),
+        "story_points.get_leaderboard": lambda: story_points.get_leaderboard(days),
+        "teams.get_team_stats": lambda: teams.get_team_stats(team_id, days),
+        "export.export_user_data_csv": lambda: export.export_user_data_csv(telegram_id, days),
+        "export.export_team_data_csv": lambda: export.export_team_data_csv(team_id, days),
+        "export.export_leaderboard_csv": lambda: export.export_leaderboard_csv(days),
+        "export.stream_user_data_csv": lambda: _drain(
+            export.stream_user_data_csv(telegram_id, days)
+        ),
+        "export.stream_team_data_csv": lambda: _drain(export.stream_team_data_csv(team_id, days)),
+        "export.spool": lambda: _close(export.spool(export.stream_team_data_csv(team_id, days))),
+        "export.export_user_data_excel": lambda: _close(
+            export.export_user_data_excel(telegram_id, days)
+        ),
+        "export.export_team_data_excel": lambda: _close(
+            export.export_team_data_excel(team_id, days)
+        ),
+        "export.export_leaderboard_excel": lambda: _close(export.export_leaderboard_excel(days)),
+        "export.export_user_data_parquet": lambda: _close(
+            export.export_user_data_parquet(telegram_id, days)
+        ),
+        "export.export_team_data_parquet": lambda: _close(
+            export.export_team_data_parquet(team_id, days)
+        ),
+        "export.get_velocity_report/user": lambda: export.get_velocity_report(
+            telegram_id=telegram_id, days=days
+        ),
+        "export.get_velocity_report/team": lambda: export.get_velocity_report(
+            team_id=team_id, days=days
+        ),
+        "export.get_velocity_reports/all_teams": lambda: export.get_velocity_reports(
+            team_ids=team_ids, days=days
+        ),
+    }
+
+
+# Cases that time a warm cache; every other case starts from empty caches
+CACHED_CASES = {
+    "users.get_or_create_user/cached": "users.get_or_create_user",
+    "story_points.get_leaderboard/cached": "story_points.get_leaderboard",
+}
+
+
+def clear_caches() -> None:
+    leaderboard_cache.invalidate()
+    UserService.identity_cache.clear()
+
+
+async def time_case(case: Case, repeat: int, cached: bool) -> Dict[str, float]:
+    timings = []
+    await case()
+    for _ in range(repeat):
+        if not cached:
+            clear_caches()
+        started = time.perf_counter()
+        await case()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "runs": repeat,
+        "min_ms": min(timings),
+        "median_ms": statistics.median(timings),
+        "p95_ms": statistics.quantiles(timings, n=20)[-1] if repeat > 1 else timings[0],
+        "mean_ms": statistics.fmean(timings),
+    }
+
+
+async def run_cases(cases: Dict[str, Case], repeat: int, only: List[str]) -> Dict[str, Dict]:
+    selected = {**cases, **{name: cases[base] for name, base in CACHED_CASES.items()}}
+    results = {}
+    for name in sorted(selected):
+        if only and not any(pattern in name for pattern in only):
+            continue
+        clear_caches()
+        results[name] = await time_case(selected[name], repeat, name in CACHED_CASES)
+        print(f"{name:<42}{results[name]['median_ms']:>10.2f} ms")
+    await db.database.db_manager.dispose()
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(
+    current: Dict[str, Any], baseline: Dict[str, Any], threshold: float, min_delta_ms: float
+) -> int:
+    """Print median ratios against ``baseline``; returns the number of regressions.
+
+    A case regresses when its median grows by more than ``threshold`` times
+    and by at least ``min_delta_ms``, so sub-millisecond noise is not flagged.
+    """
+    for key in ("dataset", "backend"):
+        if current[key] != baseline[key]:
+            print(f"warning: {key} differs from the baseline: {baseline[key]} -> {current[key]}")
+
+    regressions = 0
+    print(f"\n{'case':<42}{'baseline':>10}{'current':>10}{'ratio':>8}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<42}{'-':>10}{result['median_ms']:>10.2f}")
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        slower = result["median_ms"] - before["median_ms"] >= min_delta_ms
+        flag = "  REGRESSION" if ratio > threshold and slower else ""
+        regressions += bool(flag)
+        print(
+            f"{name:<42}{before['median_ms']:>10.2f}{result['median_ms']:>10.2f}"
+            f"{ratio:>7.2f}x{flag}"
+        )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=DatasetSpec.users)
+    parser.add_argument("--teams", type=int, default=DatasetSpec.teams)
+    parser.add_argument("--story-points", type=int, default=DatasetSpec.story_points)
+    parser.add_argument("--days", type=int, default=DatasetSpec.days)
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", default=[], help="run cases containing any of these")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    spec = DatasetSpec(args.users, args.teams, args.story_points, args.days, args.seed)
+    manager = db.database.db_manager = DatabaseManager(database_url=bench_database_url())
+
+    print(f"Seeding {spec} into {manager.engine.url}")
+    started = time.perf_counter()
+    generate(manager.engine, spec)
+    print(f"Seeded in {time.perf_counter() - started:.1f}s\n")
+
+    user, team_id = pick_targets(manager, args.window_days)
+    cases = build_cases(user, team_id, list(range(1, spec.teams + 1)), args.window_days)
+    results = asyncio.run(run_cases(cases, args.repeat, args.only))
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "backend": manager.engine.dialect.name,
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+        "dataset": spec.as_dict(),
+        "window_days": args.window_days,
+        "targets": {"telegram_id": user["telegram_id"], "team_id": team_id},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as output:
+        json.dump(report, output, indent=2, sort_keys=True)
+    print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(
+                report, json.load(baseline), args.threshold, args.min_delta_ms
+            )
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
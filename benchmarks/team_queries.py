@@ -0,0 +1,174 @@
+"""Team stats and team export queries: two-step ``IN (user_ids)`` against joins.
+
+Usage::
+
+    python -m benchmarks.team_queries --sizes 10 1000 50000
+    DATABASE_URL=postgresql://... python -m benchmarks.team_queries
+
+The database comes from ``benchmarks.dataset.bench_engine()``.
+
+The "in_list" variants reproduce the previous implementation: load every
+``TeamMember`` ORM object, then send the collected ids back in an ``IN``
+clause. The "join" variants are the statements the services use now.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, func, insert, select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from core.export import _team_story_points_query
+from benchmarks.dataset import bench_engine
+from core.models import StoryPoint, Team, TeamMember, User
+from core.rollup import daily_points_window, rebuild_daily_rollup
+from core.services import _team_stats_query
+
+
+def seed(engine, sizes, points_per_member: int, days: int, seed_value: int) -> None:
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    total_users = sum(sizes)
+
+    with engine.begin() as conn:
+        conn.execute(
+            insert(User),
+            [
+                {"telegram_id": str(100000 + i), "first_name": f"User{i}"}
+                for i in range(total_users)
+            ],
+        )
+        conn.execute(insert(Team), [{"name": f"Team {size}"} for size in sizes])
+
+        user_id = 1
+        for team_id, size in enumerate(sizes, 1):
+            conn.execute(
+                insert(TeamMember),
+                [{"team_id": team_id, "user_id": user_id + i} for i in range(size)],
+            )
+            user_id += size
+
+        batch = []
+        for member in range(1, total_users + 1):
+            for _ in range(points_per_member):
+                batch.append(
+                    {
+                        "user_id": member,
+                        "points": float(rng.choice((1, 2, 3, 5, 8, 13))),
+                        "date_completed": now
+                        - timedelta(seconds=rng.randint(0, days * 86400)),
+                    }
+                )
+            if len(batch) >= 10000:
+                conn.execute(insert(StoryPoint), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(StoryPoint), batch)
+
+    with Session(engine) as session:
+        rebuild_daily_rollup(session)
+        session.commit()
+
+
+def stats_in_list(session: Session, team_id: int, start_date: datetime) -> None:
+    members = session.scalars(
+        select(TeamMember).where(TeamMember.team_id == team_id)
+    ).all()
+    window = daily_points_window(
+        start_date, user_ids=[member.user_id for member in members]
+    )
+    session.execute(
+        select(func.sum(window.c.points), func.sum(window.c.tasks))
+    ).one()
+
+
+def stats_join(session: Session, team_id: int, start_date: datetime) -> None:
+    session.execute(_team_stats_query(team_id, start_date)).one()
+
+
+def export_in_list(session: Session, team_id: int, start_date: datetime) -> None:
+    members = session.scalars(
+        select(TeamMember).where(TeamMember.team_id == team_id)
+    ).all()
+    session.execute(
+        select(
+            User.first_name,
+            User.last_name,
+            User.username,
+            StoryPoint.date_completed,
+            StoryPoint.points,
+            StoryPoint.description,
+        )
+        .join(User, StoryPoint.user_id == User.id)
+        .where(
+            StoryPoint.user_id.in_([member.user_id for member in members]),
+            StoryPoint.date_completed >= start_date,
+        )
+        .order_by(desc(StoryPoint.date_completed))
+    ).all()
+
+
+def export_join(session: Session, team_id: int, start_date: datetime) -> None:
+    session.execute(_team_story_points_query(team_id, start_date)).all()
+
+
+VARIANTS = {
+    "stats/in_list": stats_in_list,
+    "stats/join": stats_join,
+    "export/in_list": export_in_list,
+    "export/join": export_join,
+}
+
+
+def measure(engine, team_id: int, window_days: int, repeat: int) -> dict:
+    start_date = datetime.utcnow() - timedelta(days=window_days)
+    results = {}
+    for name, variant in VARIANTS.items():
+        timings = []
+        try:
+            for _ in range(repeat):
+                with Session(engine) as session:
+                    started = time.perf_counter()
+                    variant(session, team_id, start_date)
+                    timings.append((time.perf_counter() - started) * 1000)
+        except DBAPIError as exc:
+            # e.g. SQLite's limit on bound parameters per statement
+            results[name] = f"error: {exc.orig}"
+            continue
+        results[name] = statistics.median(timings)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--points-per-member", type=int, default=5)
+    parser.add_argument("--history-days", type=int, default=90)
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = bench_engine()
+
+    print(f"Seeding teams of {args.sizes} members into {engine.url}")
+    seed(engine, args.sizes, args.points_per_member, args.history_days, args.seed)
+
+    print(f"\n{'members':>8}  " + "".join(f"{name:>16}" for name in VARIANTS))
+    for team_id, size in enumerate(args.sizes, 1):
+        results = measure(engine, team_id, args.window_days, args.repeat)
+        cells = [
+            f"{value:>14.2f}ms" if isinstance(value, float) else f"{'error':>16}"
+            for value in results.values()
+        ]
+        print(f"{size:>8}  " + "".join(cells))
+        for name, value in results.items():
+            if isinstance(value, str):
+                print(f"          {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Update throughput of the bot's Application at different concurrency limits.
+
+Usage::
+
+    python -m benchmarks.update_concurrency --chats 50 --updates-per-chat 10
+    python -m benchmarks.update_concurrency --limits 1 8 64 --latency-ms 50
+
+Updates from ``--chats`` private chats are pushed through a real
+``Application`` configured like ``StoryBot.build_application`` (with
+``PerChatUpdateProcessor``). The handler awaits ``--latency-ms`` to stand in
+for a database query or Bot API call. The run also checks that every chat's
+updates were handled in the order they arrived.
+"""
+import argparse
+import asyncio
+import time
+
+from telegram import Update, User
+from telegram.ext import Application, ExtBot, MessageHandler, filters
+
+from bot.concurrency import PerChatUpdateProcessor
+
+
+class _OfflineBot(ExtBot):
+    """Bot that answers getMe locally, so no token or network is needed."""
+
+    async def get_me(self, *args, **kwargs) -> User:
+        self._bot_user = User(1, "StoryBot", True, username="story_bot")
+        return self._bot_user
+
+
+def make_updates(bot, chats: int, per_chat: int):
+    return [
+        Update.de_json(
+            {
+                "update_id": seq * chats + chat_id,
+                "message": {
+                    "message_id": seq,
+                    "date": 1700000000,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+                    "text": str(seq),
+                },
+            },
+            bot,
+        )
+        for seq in range(per_chat)
+        for chat_id in range(1, chats + 1)
+    ]
+
+
+async def run_once(limit: int, chats: int, per_chat: int, latency: float) -> dict:
+    processor = PerChatUpdateProcessor(limit)
+    application = (
+        Application.builder()
+        .bot(_OfflineBot("123:LOAD"))
+        .updater(None)
+        .concurrent_updates(processor)
+        .build()
+    )
+    seen = {}
+    in_flight = {"now": 0, "max": 0}
+
+    async def handle(update, context):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(latency)
+        seen.setdefault(update.effective_chat.id, []).append(int(update.message.text))
+        in_flight["now"] -= 1
+
+    application.add_handler(MessageHandler(filters.TEXT, handle))
+    updates = make_updates(application.bot, chats, per_chat)
+
+    async with application:
+        await application.start()
+        started = time.perf_counter()
+        for update in updates:
+            await application.update_queue.put(update)
+        await application.update_queue.join()
+        # Updates queued behind a busy chat finish after the queue is drained
+        await application.stop()
+        elapsed = time.perf_counter() - started
+
+    out_of_order = sum(1 for order in seen.values() if order != sorted(order))
+    return {
+        "updates": sum(len(order) for order in seen.values()),
+        "seconds": elapsed,
+        "max_in_flight": in_flight["max"],
+        "out_of_order_chats": out_of_order,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limits", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--chats", type=int, default=40)
+    parser.add_argument("--updates-per-chat", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{args.chats} chats x {args.updates_per_chat} updates, "
+        f"{args.latency_ms:g} ms per handler\n"
+    )
+    print("limit  updates  seconds  updates/s  max_in_flight  out_of_order")
+    baseline = None
+    for limit in args.limits:
+        result = asyncio.run(
+            run_once(limit, args.chats, args.updates_per_chat, args.latency_ms / 1000)
+        )
+        throughput = result["updates"] / result["seconds"]
+        baseline = baseline or throughput
+        print(
+            f"{limit:>5}{result['updates']:>9}{result['seconds']:>9.2f}"
+            f"{throughput:>11.1f}{result['max_in_flight']:>15}"
+            f"{result['out_of_order_chats']:>14}   ({throughput / baseline:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
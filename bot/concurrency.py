@@ -0,0 +1,75 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+def ordering_key(update: object) -> Optional[Hashable]:
+    """Updates sharing a key are processed strictly in arrival order."""
+    if not isinstance(update, Update):
+        return None
+    if update.effective_chat is not None:
+        return ("chat", update.effective_chat.id)
+    if update.effective_user is not None:
+        return ("user", update.effective_user.id)
+    return None
+
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Process up to ``max_concurrent_updates`` updates at once, one per chat.
+
+    The first update of a chat runs in its concurrency slot. Updates that
+    arrive for the same chat while it is busy are queued and run by that slot
+    once the earlier ones finish, so a chat never holds more than one slot
+    and its handlers never interleave: the ``waiting_for_points`` step kept
+    in the state backend is read and written by one update at a time.
+    Updates without a chat or user run unordered.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        self._pending: Dict[Hashable, Deque[Awaitable[Any]]] = {}
+
+    @property
+    def busy_chats(self) -> int:
+        return len(self._pending)
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = ordering_key(update)
+        if key is None:
+            await coroutine
+            return
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            # The chat's slot picks this up after the updates before it
+            pending.append(coroutine)
+            return
+
+        pending = self._pending[key] = deque([coroutine])
+        try:
+            while pending:
+                try:
+                    await pending[0]
+                except Exception:
+                    # Application.process_update reports handler errors itself;
+                    # anything else must not stall the rest of the chat
+                    logger.exception("Unhandled error while processing an update")
+                pending.popleft()
+        finally:
+            del self._pending[key]
+            for leftover in pending:
+                # Only reachable on cancellation; avoid "never awaited" warnings
+                if asyncio.iscoroutine(leftover):
+                    leftover.close()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -6,9 +6,15 @@ from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes, CallbackQueryHandler
 
+from bot.concurrency import PerChatUpdateProcessor
+from bot.metrics import BOT_CONNECTION_POOL_SIZE, TimedRequest, start_metrics_server
+from core.config import get_settings
+from core.ingestion import StoryPointIngestor
+from core.metrics import HANDLER_LATENCY, timed
 from core.models import User, StoryPoint
-from db.database import get_session
-from core.services import StoryPointService, UserService
+from core.services import AsyncStoryPointService, AsyncUserService
+from core.state import StateBackend, get_state_backend
+from db import database
 
 logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
@@ -16,19 +22,40 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# State namespace of users whose next message is a story point entry
+WAITING_FOR_POINTS = "waiting_for_points"
+
+# Seconds an unanswered "add points" prompt stays active
+CONVERSATION_TTL = 3600
+
 
 class StoryBot:
-    def __init__(self, token: str):
+    def __init__(self, token: str, state: Optional[StateBackend] = None):
         self.token = token
-        self.user_service = UserService()
-        self.story_service = StoryPointService()
+        settings = get_settings()
+        # Conversation state lives in the backend rather than context.user_data,
+        # so any replica can handle the user's next message
+        self.state = state or get_state_backend()
+
+        self.ingestor = None
+        if settings.ingestion_enabled:
+            self.ingestor = StoryPointIngestor(
+                flush_interval=settings.ingestion_flush_interval_ms / 1000,
+                max_batch=settings.ingestion_max_batch,
+                max_queue=settings.ingestion_max_queue,
+            )
+
+        self.user_service = AsyncUserService()
+        self.story_service = AsyncStoryPointService(ingestor=self.ingestor)
+        self._metrics_runner = None
 
+    @timed(HANDLER_LATENCY, "start")
     async def start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         user = update.effective_user
         if not user:
             return
 
-        self.user_service.get_or_create_user(
+        await self.user_service.get_or_create_user(
             telegram_id=str(user.id),
             username=user.username,
             first_name=user.first_name,
@@ -50,6 +77,7 @@ class StoryBot:
             reply_markup=reply_markup
         )
 
+    @timed(HANDLER_LATENCY, "button_callback")
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         query = update.callback_query
         await query.answer()
@@ -59,7 +87,9 @@ class StoryBot:
                 "Введи количество Story Points и описание задачи:\n"
                 "Например: 5 Реализовал API для пользователей"
             )
-            context.user_data['waiting_for_points'] = True
+            await self.state.set(
+                WAITING_FOR_POINTS, str(query.from_user.id), True, ttl=CONVERSATION_TTL
+            )
 
         elif query.data == "my_stats":
             await self.show_user_stats(query, context)
@@ -70,11 +100,17 @@ class StoryBot:
         elif query.data == "help":
             await self.show_help(query, context)
 
+    @timed(HANDLER_LATENCY, "handle_message")
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        if context.user_data.get('waiting_for_points'):
+        user = update.effective_user
+        if not user:
+            return
+
+        # pop() consumes the flag atomically, so only one replica handles the entry
+        if await self.state.pop(WAITING_FOR_POINTS, str(user.id)):
             await self.process_story_points(update, context)
-            context.user_data['waiting_for_points'] = False
 
+    @timed(HANDLER_LATENCY, "process_story_points")
     async def process_story_points(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         user = update.effective_user
         if not user:
@@ -98,7 +134,7 @@ class StoryBot:
                 await update.message.reply_text("❌ Количество Story Points должно быть положительным!")
                 return
 
-            self.story_service.add_story_point(
+            await self.story_service.add_story_point(
                 telegram_id=str(user.id),
                 points=points,
                 description=description
@@ -115,9 +151,10 @@ class StoryBot:
                 "Например: 5 Реализовал API для пользователей"
             )
 
+    @timed(HANDLER_LATENCY, "show_user_stats")
     async def show_user_stats(self, query, context: ContextTypes.DEFAULT_TYPE) -> None:
         user = query.from_user
-        stats = self.story_service.get_user_stats(str(user.id))
+        stats = await self.story_service.get_user_stats(str(user.id))
         
         if not stats:
             await query.edit_message_text("📊 У тебя пока нет записей Story Points.")
@@ -136,8 +173,9 @@ class StoryBot:
         
         await query.edit_message_text(text)
 
+    @timed(HANDLER_LATENCY, "show_leaderboard")
     async def show_leaderboard(self, query, context: ContextTypes.DEFAULT_TYPE) -> None:
-        leaderboard = self.story_service.get_leaderboard(limit=10)
+        leaderboard = await self.story_service.get_leaderboard(limit=10)
         
         if not leaderboard:
             await query.edit_message_text("🏆 Лидерборд пока пуст.")
@@ -153,6 +191,7 @@ class StoryBot:
         
         await query.edit_message_text(text)
 
+    @timed(HANDLER_LATENCY, "show_help")
     async def show_help(self, query, context: ContextTypes.DEFAULT_TYPE) -> None:
         help_text = (
             "📋 Справка по командам:\n\n"
@@ -169,15 +208,66 @@ class StoryBot:
         )
         await query.edit_message_text(help_text)
 
-    def run(self) -> None:
-        application = Application.builder().token(self.token).build()
+    async def post_init(self, application: Application) -> None:
+        database.db_manager.init()
+        warmed = await database.db_manager.warm_up()
+        if warmed:
+            logger.info("Opened %d database connections ahead of the first update", warmed)
+        await self.state.purge_expired()
+        if self.ingestor is not None:
+            await self.ingestor.start()
+        settings = get_settings()
+        # The webhook listener serves /metrics itself
+        if settings.metrics_port and not settings.webhook_enabled:
+            self._metrics_runner = await start_metrics_server(
+                settings.metrics_listen, settings.metrics_port
+            )
+
+    async def post_shutdown(self, application: Application) -> None:
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+        if self.ingestor is not None:
+            await self.ingestor.stop()
+            logger.info("Story point ingestion stopped: %s", self.ingestor.metrics())
+        logger.info("Database pool at shutdown: %s", database.db_manager.pool_status()["async"])
+        await database.db_manager.dispose()
+
+    def health_details(self) -> dict:
+        details = {"db_pool": database.db_manager.pool_status()["async"]}
+        if self.ingestor is not None:
+            details["ingestion"] = self.ingestor.metrics()
+        return details
+
+    def build_application(self) -> Application:
+        application = (
+            Application.builder()
+            .token(self.token)
+            .request(TimedRequest(connection_pool_size=BOT_CONNECTION_POOL_SIZE))
+            .concurrent_updates(PerChatUpdateProcessor(get_settings().update_concurrency))
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+            .build()
+        )
 
         application.add_handler(CommandHandler("start", self.start))
         application.add_handler(CallbackQueryHandler(self.button_callback))
         application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
+        return application
 
-        logger.info("Starting StoryBot...")
-        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    def run(self) -> None:
+        application = self.build_application()
+        settings = get_settings()
+
+        if settings.webhook_enabled:
+            # aiohttp is only needed for the webhook listener
+            from bot.webhook import serve_webhook
+
+            logger.info("Starting StoryBot in webhook mode...")
+            asyncio.run(serve_webhook(application, settings, self.health_details))
+        else:
+            logger.info("Starting StoryBot...")
+            application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 def main():
@@ -0,0 +1,77 @@
+import logging
+import time
+from typing import TYPE_CHECKING, Iterable, Tuple
+
+from telegram.request import HTTPXRequest
+
+from core.metrics import REGISTRY, TELEGRAM_LATENCY, GaugeSample
+from db import database
+
+# aiohttp is imported when a listener is started; polling-mode processes
+# without a metrics port never load it
+if TYPE_CHECKING:
+    from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+METRICS_PATH = "/metrics"
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Connection pool size PTB's ApplicationBuilder gives the bot's own requests
+BOT_CONNECTION_POOL_SIZE = 256
+
+_POOL_GAUGES = {
+    "checked_out": "Connections currently checked out of the pool.",
+    "max_checked_out": "Most connections checked out at once.",
+    "connections_opened": "Connections opened since start.",
+    "connections_closed": "Connections closed since start.",
+    "checkout_timeouts": "Checkouts that timed out waiting for a connection.",
+    "waits": "Checkouts that found the pool at capacity and queued.",
+    "wait_avg_ms": "Average queueing time of those checkouts, in milliseconds.",
+    "wait_max_ms": "Longest queueing time for a pool connection, in milliseconds.",
+    "connect_avg_ms": "Average time to open a new database connection, in milliseconds.",
+    "connect_max_ms": "Longest time to open a new database connection, in milliseconds.",
+}
+
+
+class TimedRequest(HTTPXRequest):
+    """``HTTPXRequest`` recording each Bot API call in ``TELEGRAM_LATENCY`` by method."""
+
+    async def do_request(self, url: str, method: str, *args, **kwargs) -> Tuple[int, bytes]:
+        started = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        finally:
+            TELEGRAM_LATENCY.observe(time.perf_counter() - started, url.rsplit("/", 1)[-1])
+
+
+def pool_gauges() -> Iterable[GaugeSample]:
+    for engine, status in database.db_manager.pool_status().items():
+        for key, documentation in _POOL_GAUGES.items():
+            yield f"storybot_db_pool_{key}", documentation, {"engine": engine}, status[key]
+
+
+REGISTRY.register_collector("db_pool", pool_gauges)
+
+
+async def metrics_handler(request: 'web.Request') -> 'web.Response':
+    from aiohttp import web
+
+    return web.Response(
+        body=REGISTRY.render_prometheus().encode(), headers={"Content-Type": CONTENT_TYPE}
+    )
+
+
+async def start_metrics_server(listen: str, port: int) -> 'web.AppRunner':
+    """Serve ``METRICS_PATH`` on its own listener; ``cleanup()`` the runner to stop."""
+    from aiohttp import web
+
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, listen, port).start()
+    logger.info("Serving metrics on %s:%d%s", listen, port, METRICS_PATH)
+    return runner
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import signal
+from typing import Any, Callable, Dict, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from bot.metrics import METRICS_PATH, metrics_handler
+from core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Header Telegram echoes the ``secret_token`` given to ``set_webhook`` in
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+HEALTH_PATH = "/healthz"
+
+
+def create_webhook_app(
+    application: Application,
+    path: str,
+    secret_token: Optional[str] = None,
+    health_details: Optional[Callable[[], Dict[str, Any]]] = None,
+) -> web.Application:
+    """aiohttp app feeding Telegram webhook POSTs into ``application.update_queue``.
+
+    Updates are acknowledged as soon as they are queued; the application's
+    own update loop dispatches them to the handlers. ``HEALTH_PATH`` answers
+    200 while the application is running and 503 otherwise, with
+    ``health_details()`` merged into the JSON body. ``METRICS_PATH`` serves
+    the latency histograms in Prometheus format.
+    """
+
+    async def handle_update(request: web.Request) -> web.Response:
+        if secret_token and request.headers.get(SECRET_TOKEN_HEADER) != secret_token:
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="Invalid JSON")
+
+        update = Update.de_json(data, application.bot)
+        if update is None:
+            return web.Response(status=400, text="Invalid update")
+        await application.update_queue.put(update)
+        return web.Response()
+
+    async def health(request: web.Request) -> web.Response:
+        body = {
+            "status": "ok" if application.running else "unavailable",
+            "update_queue": application.update_queue.qsize(),
+        }
+        if health_details is not None:
+            body.update(health_details())
+        return web.json_response(body, status=200 if application.running else 503)
+
+    app = web.Application()
+    app.router.add_post(path, handle_update)
+    app.router.add_get(HEALTH_PATH, health)
+    app.router.add_get(METRICS_PATH, metrics_handler)
+    return app
+
+
+async def serve_webhook(
+    application: Application,
+    settings: Settings,
+    health_details: Optional[Callable[[], Dict[str, Any]]] = None,
+    stop_event: Optional[asyncio.Event] = None,
+) -> None:
+    """Run ``application`` behind the webhook listener until SIGINT/SIGTERM.
+
+    Mirrors ``Application.run_webhook``: ``post_init``, ``post_stop`` and
+    ``post_shutdown`` callbacks are honoured. The webhook is registered with
+    Telegram only when ``webhook_url`` is configured, so a local listener can
+    be driven by a fake client without touching the Bot API.
+    """
+    if stop_event is None:
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+    runner = web.AppRunner(
+        create_webhook_app(
+            application,
+            settings.webhook_path,
+            settings.webhook_secret_token,
+            health_details,
+        )
+    )
+
+    await application.initialize()
+    if application.post_init:
+        await application.post_init(application)
+    try:
+        await application.start()
+        if settings.webhook_url:
+            await application.bot.set_webhook(
+                url=settings.webhook_url.rstrip("/") + settings.webhook_path,
+                secret_token=settings.webhook_secret_token or None,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        else:
+            logger.warning("WEBHOOK_URL is not set; the webhook is not registered with Telegram")
+
+        await runner.setup()
+        await web.TCPSite(runner, settings.webhook_listen, settings.webhook_port).start()
+        logger.info(
+            "Listening for webhook updates on %s:%d%s",
+            settings.webhook_listen, settings.webhook_port, settings.webhook_path,
+        )
+        await stop_event.wait()
+    finally:
+        await runner.cleanup()
+        if application.running:
+            await application.stop()
+            if application.post_stop:
+                await application.post_stop(application)
+        await application.shutdown()
+        if application.post_shutdown:
+            await application.post_shutdown(application)
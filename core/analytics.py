@@ -0,0 +1,169 @@
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from core.metrics import SERVICE_LATENCY, timed
+
+# Trailing window for the rolling velocity, in days
+ROLLING_DAYS = 7
+
+# Span of the exponentially weighted daily velocity, in days
+EWMA_SPAN = 7
+
+PERCENTILES = (50, 75, 90)
+
+DailyRow = Tuple[Hashable, Union[date, datetime, str], float, int]
+
+# pandas and NumPy are imported by the functions that use them, so importing
+# this module (and core.export) stays cheap until a report is computed
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+def _daily_frames(
+    rows: Iterable[DailyRow],
+    entities: Sequence[Hashable],
+    calendar: 'pd.DatetimeIndex',
+) -> Tuple['pd.DataFrame', 'pd.DataFrame']:
+    """Pivot ``(entity, day, points, tasks)`` rows into day x entity matrices.
+
+    Days without activity, and entities without any rows, become zeros.
+    """
+    import pandas as pd
+
+    frame = pd.DataFrame.from_records(
+        list(rows), columns=["entity", "day", "points", "tasks"]
+    )
+    frame["day"] = pd.to_datetime(frame["day"]).dt.normalize()
+    frame["points"] = frame["points"].astype("float64")
+    frame["tasks"] = frame["tasks"].astype("int64")
+
+    if frame.empty:
+        points = tasks = pd.DataFrame()
+    else:
+        wide = frame.pivot_table(
+            index="day", columns="entity", values=["points", "tasks"], aggfunc="sum"
+        )
+        points, tasks = wide["points"], wide["tasks"]
+    return (
+        points.reindex(index=calendar, columns=entities).fillna(0.0),
+        tasks.reindex(index=calendar, columns=entities).fillna(0).astype("int64"),
+    )
+
+
+def _ratio(numerator: 'np.ndarray', denominator: 'np.ndarray') -> 'np.ndarray':
+    import numpy as np
+
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(len(numerator), dtype="float64"),
+        where=denominator > 0,
+    )
+
+
+@timed(SERVICE_LATENCY, "analytics.velocity_stats")
+def velocity_stats(
+    rows: Iterable[DailyRow],
+    start_date: Union[date, datetime],
+    end_date: Union[date, datetime],
+    entities: Optional[Sequence[Hashable]] = None,
+    rolling_days: int = ROLLING_DAYS,
+    ewma_span: int = EWMA_SPAN,
+    percentiles: Sequence[int] = PERCENTILES,
+) -> Dict[Hashable, Dict[str, Any]]:
+    """Velocity summary and gap-filled daily series for many entities at once.
+
+    ``rows`` are ``(entity, day, points, tasks)`` tuples, e.g. the result of a
+    daily ``GROUP BY``. Every calendar day from ``start_date`` to ``end_date``
+    is present in the output, with zeros on days without activity. All
+    statistics are computed column-wise over a day x entity matrix, so the
+    cost does not grow with a Python loop over entities or days.
+
+    ``entities`` fixes the set (and order) of entities in the result; entities
+    without rows get an all-zero report. It defaults to the entities in
+    ``rows``.
+    """
+    import pandas as pd
+
+    rows = list(rows)
+    if entities is None:
+        entities = list(dict.fromkeys(row[0] for row in rows))
+    calendar = pd.date_range(
+        pd.Timestamp(start_date).normalize(), pd.Timestamp(end_date).normalize(), freq="D"
+    )
+    points, tasks = _daily_frames(rows, entities, calendar)
+
+    rolling = points.rolling(rolling_days, min_periods=1).sum()
+    ewma = points.ewm(span=ewma_span, adjust=False).mean()
+
+    total_points = points.sum().to_numpy()
+    total_tasks = tasks.sum().to_numpy()
+    active_days = (tasks > 0).sum().to_numpy()
+
+    summary = pd.DataFrame(
+        {
+            "total_points": total_points,
+            "total_tasks": total_tasks,
+            "active_days": active_days,
+            "avg_points_per_day": _ratio(total_points, active_days),
+            "avg_tasks_per_day": _ratio(total_tasks, active_days),
+            "avg_points_per_task": _ratio(total_points, total_tasks),
+            "avg_points_per_calendar_day": total_points / len(calendar),
+            "rolling_velocity": rolling.iloc[-1].to_numpy(),
+            "best_rolling_velocity": rolling.max().to_numpy(),
+            "ewma_velocity": ewma.iloc[-1].to_numpy(),
+            "std_points_per_day": points.std(ddof=0).fillna(0.0).to_numpy(),
+        },
+        index=pd.Index(entities),
+    ).round(2)
+    quantiles = points.quantile([p / 100 for p in percentiles]).fillna(0.0).round(2)
+
+    dates = calendar.strftime("%Y-%m-%d").tolist()
+    rolling = rolling.round(2)
+    ewma = ewma.round(2)
+
+    reports: Dict[Hashable, Dict[str, Any]] = {}
+    for position, entity in enumerate(entities):
+        stats = summary.iloc[position]
+        report_summary = {
+            name: int(value) if name in ("total_tasks", "active_days") else float(value)
+            for name, value in stats.items()
+        }
+        report_summary["rolling_days"] = rolling_days
+        report_summary["percentiles"] = {
+            f"p{p}": float(value)
+            for p, value in zip(percentiles, quantiles.iloc[:, position])
+        }
+        reports[entity] = {
+            "summary": report_summary,
+            "series": _series(
+                dates,
+                points.iloc[:, position].tolist(),
+                tasks.iloc[:, position].tolist(),
+                rolling.iloc[:, position].tolist(),
+                ewma.iloc[:, position].tolist(),
+            ),
+        }
+    return reports
+
+
+def _series(
+    dates: List[str],
+    points: List[float],
+    tasks: List[int],
+    rolling: List[float],
+    ewma: List[float],
+) -> List[Dict[str, Any]]:
+    return [
+        {
+            "date": day,
+            "points": day_points,
+            "tasks": day_tasks,
+            "rolling_points": day_rolling,
+            "ewma_points": day_ewma,
+        }
+        for day, day_points, day_tasks, day_rolling, day_ewma in zip(
+            dates, points, tasks, rolling, ewma
+        )
+    ]
@@ -0,0 +1,99 @@
+import csv
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, TextIO
+
+# Columns (CSV) / keys (JSONL) of an imported story point
+REQUIRED_FIELDS = ("telegram_id", "points", "date_completed")
+
+FORMATS = ("csv", "jsonl")
+
+# Unknown telegram ids an ImportReport lists; rows of further unknown users
+# are only counted, so a file of bad ids cannot exhaust memory
+MAX_REPORTED_UNKNOWN_IDS = 100
+
+
+@dataclass
+class ImportReport:
+    rows_imported: int = 0
+    rows_skipped: int = 0
+    batches: int = 0
+    unknown_telegram_ids: set = field(default_factory=set)
+    # Skipped rows whose telegram id did not fit in unknown_telegram_ids
+    unknown_rows_unlisted: int = 0
+    seconds: float = 0.0
+
+    def skip_unknown(self, telegram_id: str) -> None:
+        self.rows_skipped += 1
+        if telegram_id in self.unknown_telegram_ids:
+            return
+        if len(self.unknown_telegram_ids) < MAX_REPORTED_UNKNOWN_IDS:
+            self.unknown_telegram_ids.add(telegram_id)
+        else:
+            self.unknown_rows_unlisted += 1
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_imported / self.seconds if self.seconds else 0.0
+
+
+def detect_format(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Cannot infer import format from {path.name!r}; pass csv or jsonl")
+
+
+def _parse_record(raw: Dict[str, Any], line: int) -> Dict[str, Any]:
+    missing = [name for name in REQUIRED_FIELDS if raw.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Line {line}: missing {', '.join(missing)}")
+
+    try:
+        date_completed = raw["date_completed"]
+        if not isinstance(date_completed, datetime):
+            date_completed = datetime.fromisoformat(str(date_completed))
+        return {
+            "telegram_id": str(raw["telegram_id"]),
+            "points": float(raw["points"]),
+            "description": raw.get("description") or None,
+            "date_completed": date_completed,
+        }
+    except ValueError as exc:
+        raise ValueError(f"Line {line}: {exc}") from exc
+
+
+def iter_records(stream: TextIO, format: str) -> Iterator[Dict[str, Any]]:
+    """Yield parsed story point records one at a time from an open text stream."""
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield _parse_record(record, reader.line_num)
+    elif format == "jsonl":
+        for line, text in enumerate(stream, 1):
+            if not text.strip():
+                continue
+            try:
+                raw = json.loads(text)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"Line {line}: invalid JSON: {exc}") from exc
+            yield _parse_record(raw, line)
+    else:
+        raise ValueError(f"Unsupported import format {format!r}; expected one of {FORMATS}")
+
+
+def iter_batches(
+    records: Iterator[Dict[str, Any]], batch_size: int
+) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,76 @@
+from functools import lru_cache
+from typing import Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Runtime configuration, read from environment variables."""
+
+    model_config = SettingsConfigDict(extra="ignore")
+
+    # Write-behind ingestion of story point submissions
+    ingestion_enabled: bool = False
+    ingestion_flush_interval_ms: int = 50
+    ingestion_max_batch: int = 500
+    ingestion_max_queue: int = 10_000
+
+    # Connection pool of the database engines (ignored for in-memory SQLite).
+    # Size the pool to roughly update_concurrency; checkouts beyond
+    # pool_size + max_overflow wait up to pool_timeout seconds
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    # Seconds before a pooled connection is replaced; -1 keeps it forever
+    db_pool_recycle: int = 1800
+    # Test connections on checkout, so ones dropped by the server are replaced
+    db_pool_pre_ping: bool = True
+    # Connections the bot opens at startup, before the first update arrives
+    # (capped at db_pool_size); 0 opens them on first use
+    db_warm_up_connections: int = 0
+
+    # SQLite file databases: pragmas set on every new connection. WAL lets
+    # readers run alongside the single writer; synchronous=normal is durable
+    # across application crashes (not power loss) and skips most fsyncs
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_cache_size_kib: int = 65536
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # Milliseconds a writer waits for the lock before "database is locked"
+    sqlite_busy_timeout_ms: int = 5000
+
+    # Slow-query log: statements slower than the threshold (unset = off) are
+    # written as JSON lines to a rotating file, optionally with their plan
+    slow_query_threshold_ms: Optional[float] = None
+    slow_query_explain: bool = False
+    # Seconds before the same statement is explained again
+    slow_query_explain_interval: float = 600.0
+    slow_query_log_path: str = "slow_queries.log"
+    slow_query_log_max_bytes: int = 10 * 1024 * 1024
+    slow_query_log_backups: int = 5
+
+    # Where conversation state is kept: "memory" (one process) or "sql"
+    # (the bot_state table, shared by every replica)
+    state_backend: str = "memory"
+
+    # Updates handled at once; updates of one chat always run in order
+    update_concurrency: int = 16
+
+    # Prometheus metrics: served on /metrics of the webhook listener, and in
+    # polling mode on metrics_listen:metrics_port when a port is set
+    metrics_listen: str = "127.0.0.1"
+    metrics_port: Optional[int] = None
+
+    # Webhook mode: receive updates over HTTP instead of long polling
+    webhook_enabled: bool = False
+    # Public base URL Telegram posts to; unset leaves registration to the operator
+    webhook_url: Optional[str] = None
+    webhook_listen: str = "0.0.0.0"
+    webhook_port: int = 8443
+    webhook_path: str = "/telegram"
+    webhook_secret_token: Optional[str] = None
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
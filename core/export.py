@@ -1,16 +1,422 @@
+import asyncio
 import csv
+import functools
 import io
+import itertools
+import os
+import tempfile
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    List,
+    Dict,
+    Any,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import pandas as pd
-from sqlalchemy import func, desc
-from sqlalchemy.orm import Session
+from sqlalchemy import func, desc, literal, select, union_all
+from sqlalchemy.sql import Select
 
+from core.analytics import velocity_stats
+from core.metrics import instrument_methods
 from core.models import User, StoryPoint, Team, TeamMember
-from db.database import get_session
+from core.rollup import daily_points_window
+from core.services import AsyncUserService
+from db.database import get_async_session
 
+# openpyxl, pyarrow and (through core.analytics) pandas are imported on the
+# first export that needs them: most bot processes never export anything,
+# and together they add a large share of the cold-start import time
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
 
+# Rows fetched per server-side cursor round trip and encoded per chunk
+STREAM_CHUNK_ROWS = 1000
+
+# Spooled exports stay in memory up to this size, then roll over to disk
+SPOOL_MAX_SIZE = 5 * 1024 * 1024
+
+USER_STORY_POINTS_HEADER = ['Дата', 'Story Points', 'Описание', 'Дата создания']
+TEAM_STORY_POINTS_HEADER = ['Команда', 'Пользователь', 'Дата', 'Story Points', 'Описание']
+LEADERBOARD_HEADER = ['Позиция', 'Пользователь', 'Всего Story Points', 'Всего задач', 'Среднее за задачу']
+
+PARQUET_COMPRESSION = 'zstd'
+
+T = TypeVar('T')
+
+
+async def _run_in_executor(func: Callable[..., T], *args: Any) -> T:
+    """Run CPU-bound serialization off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+class _CsvChunkEncoder:
+    """Encode batches of CSV rows to UTF-8 bytes, reusing a single buffer.
+
+    ``encode`` formats the records as well, so a whole batch is one call to
+    hand to ``_run_in_executor``.
+    """
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def encode(
+        self,
+        records: Iterable[Any],
+        format_row: Callable[[Any], Iterable[Any]] = list
+    ) -> bytes:
+        self._writer.writerows(map(format_row, records))
+        chunk = self._buffer.getvalue().encode('utf-8')
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return chunk
+
+
+def _display_name(first_name, last_name, username) -> str:
+    name = first_name or username or "Неизвестный"
+    if last_name:
+        name += f" {last_name}"
+    return name
+
+
+def _write_csv(
+    header: List[str],
+    records: Iterable[Any],
+    format_row: Callable[[Any], Iterable[Any]]
+) -> io.StringIO:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(header)
+    writer.writerows(map(format_row, records))
+    output.seek(0)
+    return output
+
+
+class _ExcelStreamWriter:
+    """Write-only openpyxl workbook filled one batch of rows at a time.
+
+    Rows are flushed to a temporary file as they are appended, and the
+    finished workbook is saved into a spooled file, so memory use does not
+    grow with the number of rows.
+    """
+
+    def __init__(self, sheet_name: str, header: List[str]):
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(sheet_name)
+        self.sheet.append(header)
+
+    def append_rows(
+        self,
+        records: Iterable[Any],
+        format_row: Callable[[Any], Iterable[Any]] = list
+    ) -> None:
+        for record in records:
+            self.sheet.append(format_row(record))
+
+    def add_summary(self, rows: Iterable[Iterable[Any]]) -> None:
+        summary = self.workbook.create_sheet('Сводка')
+        summary.append(['Метрика', 'Значение'])
+        for row in rows:
+            summary.append(row)
+
+    def save(self) -> IO[bytes]:
+        output = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self.workbook.save(output)
+        output.seek(0)
+        return output
+
+
+class _ParquetStreamWriter:
+    """Compressed Parquet writer fed one batch of rows at a time.
+
+    Every appended batch becomes a row group. With ``partition_by_month`` the
+    rows are split into a hive-style ``month=YYYY-MM`` directory layout under
+    ``destination``; otherwise a single file is written to ``destination`` or,
+    when no destination is given, to a spooled temporary file.
+    """
+
+    def __init__(
+        self,
+        schema: 'pa.Schema',
+        build_batch: Callable[[List[Any]], 'pa.RecordBatch'],
+        destination: Optional[str] = None,
+        partition_by_month: bool = False
+    ):
+        _pyarrow()
+        if partition_by_month and destination is None:
+            raise ValueError("partition_by_month requires a destination directory")
+
+        self.schema = schema
+        self.build_batch = build_batch
+        self.destination = destination
+        self.partition_by_month = partition_by_month
+        self._sink = None if destination else tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        self._writers: Dict[Optional[str], 'pq.ParquetWriter'] = {}
+
+    def append_rows(self, rows: List[Any]) -> None:
+        if not self.partition_by_month:
+            self._write(None, rows)
+            return
+        # Export queries are ordered by date, so each month is one contiguous run
+        for month, group in itertools.groupby(
+            rows, key=lambda row: row.date_completed.strftime('%Y-%m')
+        ):
+            self._write(month, list(group))
+
+    def save(self) -> Union[IO[bytes], str]:
+        if not self._writers and not self.partition_by_month:
+            # Always produce a readable file, even for an empty export
+            self._writer(None)
+        for writer in self._writers.values():
+            writer.close()
+        if self._sink is not None:
+            self._sink.seek(0)
+            return self._sink
+        return self.destination
+
+    def abort(self) -> None:
+        """Close the open writers and the spooled file after a failed export."""
+        for writer in self._writers.values():
+            try:
+                writer.close()
+            except Exception:
+                # The export has already failed; its error is the one to report
+                pass
+        self._writers.clear()
+        if self._sink is not None:
+            self._sink.close()
+
+    def _write(self, month: Optional[str], rows: List[Any]) -> None:
+        if rows:
+            self._writer(month).write_batch(self.build_batch(rows))
+
+    def _writer(self, month: Optional[str]) -> 'pq.ParquetWriter':
+        writer = self._writers.get(month)
+        if writer is None:
+            if month is not None:
+                directory = os.path.join(self.destination, f"month={month}")
+                os.makedirs(directory, exist_ok=True)
+                where = os.path.join(directory, 'part-0.parquet')
+            else:
+                where = self._sink if self._sink is not None else self.destination
+            _, pq = _pyarrow()
+            writer = pq.ParquetWriter(where, self.schema, compression=PARQUET_COMPRESSION)
+            self._writers[month] = writer
+        return writer
+
+
+def _pyarrow() -> Tuple[Any, Any]:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # installed with the "analytics" extra
+        raise RuntimeError(
+            "Parquet export requires pyarrow (install the 'analytics' extra)"
+        ) from None
+    return pa, pq
+
+
+def _user_parquet_schema() -> 'pa.Schema':
+    pa, _ = _pyarrow()
+    return pa.schema([
+        ('date_completed', pa.timestamp('us')),
+        ('points', pa.float32()),
+        ('description', pa.string()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+
+def _user_parquet_batch(rows: List[Any]) -> 'pa.RecordBatch':
+    pa, _ = _pyarrow()
+    return pa.record_batch(
+        [
+            pa.array([row.date_completed for row in rows], pa.timestamp('us')),
+            pa.array([row.points for row in rows], pa.float32()),
+            pa.array([row.description for row in rows], pa.string()),
+            pa.array([row.created_at for row in rows], pa.timestamp('us')),
+        ],
+        schema=_user_parquet_schema()
+    )
+
+
+def _team_parquet_schema() -> 'pa.Schema':
+    pa, _ = _pyarrow()
+    return pa.schema([
+        ('team', pa.dictionary(pa.int32(), pa.string())),
+        ('user', pa.dictionary(pa.int32(), pa.string())),
+        ('date_completed', pa.timestamp('us')),
+        ('points', pa.float32()),
+        ('description', pa.string()),
+    ])
+
+
+def _team_parquet_batch(team_name: str, rows: List[Any]) -> 'pa.RecordBatch':
+    pa, _ = _pyarrow()
+    return pa.record_batch(
+        [
+            pa.array([team_name] * len(rows), pa.string()).dictionary_encode(),
+            pa.array(
+                [_display_name(row.first_name, row.last_name, row.username) for row in rows],
+                pa.string()
+            ).dictionary_encode(),
+            pa.array([row.date_completed for row in rows], pa.timestamp('us')),
+            pa.array([row.points for row in rows], pa.float32()),
+            pa.array([row.description for row in rows], pa.string()),
+        ],
+        schema=_team_parquet_schema()
+    )
+
+
+def _active_days(series: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Days with activity, kept for consumers of the pre-series report format."""
+    return [
+        {'date': day['date'], 'points': day['points'], 'tasks': day['tasks']}
+        for day in series
+        if day['tasks']
+    ]
+
+
+def _points_summary(total_points: float, total_tasks: int, days: int) -> List[List[Any]]:
+    return [
+        ['Всего Story Points', total_points],
+        ['Всего задач', total_tasks],
+        ['Среднее за задачу', round(total_points / total_tasks, 2) if total_tasks > 0 else 0],
+        ['Период', f"{days} дней"]
+    ]
+
+
+class _PointsTotals:
+    """Running totals of streamed story point rows for the "Сводка" sheet."""
+
+    def __init__(self, count_members: bool = False):
+        self.points = 0.0
+        self.tasks = 0
+        # Distinct user ids: namesakes are different members
+        self.members = set() if count_members else None
+
+    def add(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self.points += row.points
+            self.tasks += 1
+            if self.members is not None:
+                self.members.add(row.user_id)
+
+    def summary(self, days: int) -> List[List[Any]]:
+        rows = _points_summary(self.points, self.tasks, days)
+        if self.members is not None:
+            rows.append(['Активных участников', len(self.members)])
+        return rows
+
+
+def _append_story_points(
+    writer: _ExcelStreamWriter,
+    totals: _PointsTotals,
+    format_row: Callable[[Any], Iterable[Any]],
+    rows: List[Any]
+) -> None:
+    totals.add(rows)
+    writer.append_rows(rows, format_row)
+
+
+def _save_story_points(writer: _ExcelStreamWriter, totals: _PointsTotals, days: int) -> IO[bytes]:
+    writer.add_summary(totals.summary(days))
+    return writer.save()
+
+
+def _user_story_points_query(user_id: int, start_date: datetime) -> Select:
+    return select(
+        StoryPoint.date_completed,
+        StoryPoint.points,
+        StoryPoint.description,
+        StoryPoint.created_at
+    ).where(
+        StoryPoint.user_id == user_id,
+        StoryPoint.date_completed >= start_date
+    ).order_by(desc(StoryPoint.date_completed))
+
+
+def _user_story_point_row(row) -> List[Any]:
+    return [
+        row.date_completed.strftime('%Y-%m-%d %H:%M:%S'),
+        row.points,
+        row.description or '',
+        row.created_at.strftime('%Y-%m-%d %H:%M:%S')
+    ]
+
+
+def _team_story_points_query(team_id: int, start_date: datetime) -> Select:
+    return select(
+        StoryPoint.user_id,
+        User.first_name,
+        User.last_name,
+        User.username,
+        StoryPoint.date_completed,
+        StoryPoint.points,
+        StoryPoint.description
+    ).join(
+        User, StoryPoint.user_id == User.id
+    ).join(
+        TeamMember, TeamMember.user_id == StoryPoint.user_id
+    ).where(
+        TeamMember.team_id == team_id,
+        StoryPoint.date_completed >= start_date
+    ).order_by(desc(StoryPoint.date_completed))
+
+
+def _team_story_point_row(team_name: str, row) -> List[Any]:
+    return [
+        team_name,
+        _display_name(row.first_name, row.last_name, row.username),
+        row.date_completed.strftime('%Y-%m-%d %H:%M:%S'),
+        row.points,
+        row.description or ''
+    ]
+
+
+def _leaderboard_query(start_date: datetime, limit: int) -> Select:
+    return select(
+        User.first_name,
+        User.last_name,
+        User.username,
+        func.sum(StoryPoint.points).label('total_points'),
+        func.count(StoryPoint.id).label('total_tasks'),
+        func.avg(StoryPoint.points).label('avg_points')
+    ).join(
+        StoryPoint, User.id == StoryPoint.user_id
+    ).where(
+        StoryPoint.date_completed >= start_date
+    ).group_by(
+        User.id, User.first_name, User.last_name, User.username
+    ).order_by(
+        desc('total_points')
+    ).limit(limit)
+
+
+def _leaderboard_row(entry: Tuple[int, Any]) -> List[Any]:
+    """One leaderboard line from a ``(position, result)`` pair."""
+    position, result = entry
+    return [
+        position,
+        _display_name(result.first_name, result.last_name, result.username),
+        float(result.total_points),
+        result.total_tasks,
+        round(float(result.avg_points), 2)
+    ]
+
+
+@instrument_methods
 class ExportService:
     def __init__(self):
         pass
@@ -21,40 +427,20 @@ class ExportService:
         days: int = 30
     ) -> io.StringIO:
         """Export user's story points to CSV format"""
-        async with get_session() as session:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+        async with get_async_session() as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
             if not user:
                 raise ValueError(f"User with telegram_id {telegram_id} not found")
             
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            story_points = session.query(StoryPoint).filter(
-                StoryPoint.user_id == user.id,
-                StoryPoint.date_completed >= start_date
-            ).order_by(desc(StoryPoint.date_completed)).all()
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'Дата',
-                'Story Points',
-                'Описание',
-                'Дата создания'
-            ])
-            
-            # Write data
-            for sp in story_points:
-                writer.writerow([
-                    sp.date_completed.strftime('%Y-%m-%d %H:%M:%S'),
-                    sp.points,
-                    sp.description or '',
-                    sp.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                ])
-            
-            output.seek(0)
-            return output
+            story_points = (await session.execute(
+                _user_story_points_query(user.id, start_date)
+            )).all()
+        
+        return await _run_in_executor(
+            _write_csv, USER_STORY_POINTS_HEADER, story_points, _user_story_point_row
+        )
 
     async def export_team_data_csv(
         self, 
@@ -62,58 +448,23 @@ class ExportService:
         days: int = 30
     ) -> io.StringIO:
         """Export team's story points to CSV format"""
-        async with get_session() as session:
-            team = session.query(Team).filter(Team.id == team_id).first()
-            if not team:
+        async with get_async_session() as session:
+            team_name = await session.scalar(select(Team.name).where(Team.id == team_id))
+            if team_name is None:
                 raise ValueError(f"Team with id {team_id} not found")
             
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            # Get team members
-            team_members = session.query(TeamMember).filter(
-                TeamMember.team_id == team_id
-            ).all()
-            
-            user_ids = [member.user_id for member in team_members]
-            
-            # Get story points for all team members
-            story_points = session.query(
-                StoryPoint, User
-            ).join(
-                User, StoryPoint.user_id == User.id
-            ).filter(
-                StoryPoint.user_id.in_(user_ids),
-                StoryPoint.date_completed >= start_date
-            ).order_by(desc(StoryPoint.date_completed)).all()
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'Команда',
-                'Пользователь',
-                'Дата',
-                'Story Points',
-                'Описание'
-            ])
-            
-            # Write data
-            for sp, user in story_points:
-                user_name = user.first_name or user.username or "Неизвестный"
-                if user.last_name:
-                    user_name += f" {user.last_name}"
-                
-                writer.writerow([
-                    team.name,
-                    user_name,
-                    sp.date_completed.strftime('%Y-%m-%d %H:%M:%S'),
-                    sp.points,
-                    sp.description or ''
-                ])
-            
-            output.seek(0)
-            return output
+            story_points = (await session.execute(
+                _team_story_points_query(team_id, start_date)
+            )).all()
+        
+        return await _run_in_executor(
+            _write_csv,
+            TEAM_STORY_POINTS_HEADER,
+            story_points,
+            functools.partial(_team_story_point_row, team_name)
+        )
 
     async def export_leaderboard_csv(
         self, 
@@ -121,110 +472,259 @@ class ExportService:
         limit: int = 50
     ) -> io.StringIO:
         """Export leaderboard to CSV format"""
-        async with get_session() as session:
+        async with get_async_session() as session:
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            results = session.query(
-                User.first_name,
-                User.last_name,
-                User.username,
-                func.sum(StoryPoint.points).label('total_points'),
-                func.count(StoryPoint.id).label('total_tasks'),
-                func.avg(StoryPoint.points).label('avg_points')
-            ).join(
-                StoryPoint, User.id == StoryPoint.user_id
-            ).filter(
-                StoryPoint.date_completed >= start_date
-            ).group_by(
-                User.id, User.first_name, User.last_name, User.username
-            ).order_by(
-                desc('total_points')
-            ).limit(limit).all()
-            
-            output = io.StringIO()
-            writer = csv.writer(output)
-            
-            # Write header
-            writer.writerow([
-                'Позиция',
-                'Пользователь',
-                'Всего Story Points',
-                'Всего задач',
-                'Среднее за задачу'
-            ])
-            
-            # Write data
-            for i, result in enumerate(results, 1):
-                user_name = result.first_name or result.username or "Неизвестный"
-                if result.last_name:
-                    user_name += f" {result.last_name}"
-                
-                writer.writerow([
-                    i,
-                    user_name,
-                    float(result.total_points),
-                    result.total_tasks,
-                    round(float(result.avg_points), 2)
-                ])
-            
-            output.seek(0)
-            return output
+            results = (await session.execute(
+                _leaderboard_query(start_date, limit)
+            )).all()
+        
+        return await _run_in_executor(
+            _write_csv, LEADERBOARD_HEADER, enumerate(results, 1), _leaderboard_row
+        )
+
+    async def stream_user_data_csv(
+        self,
+        telegram_id: str,
+        days: int = 30,
+        chunk_rows: int = STREAM_CHUNK_ROWS
+    ) -> AsyncIterator[bytes]:
+        """Yield the user CSV export as UTF-8 chunks of at most ``chunk_rows`` rows.
+
+        Rows are read through a server-side cursor, so memory use does not
+        depend on how many story points the export covers.
+        """
+        encoder = _CsvChunkEncoder()
+
+        async with get_async_session() as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
+            if not user:
+                raise ValueError(f"User with telegram_id {telegram_id} not found")
+
+            start_date = datetime.utcnow() - timedelta(days=days)
+
+            result = await session.stream(
+                _user_story_points_query(user.id, start_date)
+                .execution_options(yield_per=chunk_rows)
+            )
+
+            yield encoder.encode([USER_STORY_POINTS_HEADER])
+
+            async for partition in result.partitions():
+                yield await _run_in_executor(encoder.encode, partition, _user_story_point_row)
+
+    async def stream_team_data_csv(
+        self,
+        team_id: int,
+        days: int = 30,
+        chunk_rows: int = STREAM_CHUNK_ROWS
+    ) -> AsyncIterator[bytes]:
+        """Yield the team CSV export as UTF-8 chunks of at most ``chunk_rows`` rows."""
+        encoder = _CsvChunkEncoder()
+
+        async with get_async_session() as session:
+            team_name = await session.scalar(select(Team.name).where(Team.id == team_id))
+            if team_name is None:
+                raise ValueError(f"Team with id {team_id} not found")
+
+            start_date = datetime.utcnow() - timedelta(days=days)
+
+            result = await session.stream(
+                _team_story_points_query(team_id, start_date)
+                .execution_options(yield_per=chunk_rows)
+            )
+
+            yield encoder.encode([TEAM_STORY_POINTS_HEADER])
+
+            format_row = functools.partial(_team_story_point_row, team_name)
+            async for partition in result.partitions():
+                yield await _run_in_executor(encoder.encode, partition, format_row)
+
+    @staticmethod
+    async def spool(
+        chunks: AsyncIterator[bytes],
+        max_size: int = SPOOL_MAX_SIZE
+    ) -> tempfile.SpooledTemporaryFile:
+        """Collect a streamed export into a temp file that spills to disk when large.
+
+        The returned file is rewound and can be passed straight to an upload
+        (e.g. ``reply_document``); the caller is responsible for closing it.
+        """
+        spooled = tempfile.SpooledTemporaryFile(max_size=max_size)
+        try:
+            async for chunk in chunks:
+                spooled.write(chunk)
+        except BaseException:
+            spooled.close()
+            raise
+        spooled.seek(0)
+        return spooled
 
     async def export_user_data_excel(
         self, 
         telegram_id: str, 
-        days: int = 30
-    ) -> io.BytesIO:
-        """Export user's story points to Excel format"""
-        async with get_session() as session:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+        days: int = 30,
+        chunk_rows: int = STREAM_CHUNK_ROWS
+    ) -> IO[bytes]:
+        """Export user's story points to Excel format
+
+        Rows are streamed from the database into a write-only workbook and the
+        "Сводка" sheet is built from running totals, so memory use stays flat.
+        Returns a rewound file object; the caller should close it.
+        """
+        writer = await _run_in_executor(
+            _ExcelStreamWriter, 'Story Points', USER_STORY_POINTS_HEADER
+        )
+        totals = _PointsTotals()
+
+        async with get_async_session() as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
             if not user:
                 raise ValueError(f"User with telegram_id {telegram_id} not found")
             
             start_date = datetime.utcnow() - timedelta(days=days)
             
-            story_points = session.query(StoryPoint).filter(
-                StoryPoint.user_id == user.id,
-                StoryPoint.date_completed >= start_date
-            ).order_by(desc(StoryPoint.date_completed)).all()
-            
-            # Prepare data for DataFrame
-            data = []
-            for sp in story_points:
-                data.append({
-                    'Дата': sp.date_completed.strftime('%Y-%m-%d %H:%M:%S'),
-                    'Story Points': sp.points,
-                    'Описание': sp.description or '',
-                    'Дата создания': sp.created_at.strftime('%Y-%m-%d %H:%M:%S')
-                })
-            
-            df = pd.DataFrame(data)
-            
-            # Create Excel file in memory
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Story Points')
-                
-                # Add summary sheet
-                summary_data = {
-                    'Метрика': [
-                        'Всего Story Points',
-                        'Всего задач',
-                        'Среднее за задачу',
-                        'Период'
-                    ],
-                    'Значение': [
-                        df['Story Points'].sum(),
-                        len(df),
-                        round(df['Story Points'].mean(), 2) if len(df) > 0 else 0,
-                        f"{days} дней"
-                    ]
-                }
-                summary_df = pd.DataFrame(summary_data)
-                summary_df.to_excel(writer, index=False, sheet_name='Сводка')
-            
-            output.seek(0)
-            return output
+            result = await session.stream(
+                _user_story_points_query(user.id, start_date)
+                .execution_options(yield_per=chunk_rows)
+            )
+            async for partition in result.partitions():
+                await _run_in_executor(
+                    _append_story_points, writer, totals, _user_story_point_row, partition
+                )
+        
+        return await _run_in_executor(_save_story_points, writer, totals, days)
+
+    async def export_team_data_excel(
+        self,
+        team_id: int,
+        days: int = 30,
+        chunk_rows: int = STREAM_CHUNK_ROWS
+    ) -> IO[bytes]:
+        """Export team's story points to Excel format, streamed like the user export"""
+        writer = await _run_in_executor(
+            _ExcelStreamWriter, 'Story Points', TEAM_STORY_POINTS_HEADER
+        )
+        totals = _PointsTotals(count_members=True)
+
+        async with get_async_session() as session:
+            team_name = await session.scalar(select(Team.name).where(Team.id == team_id))
+            if team_name is None:
+                raise ValueError(f"Team with id {team_id} not found")
+
+            start_date = datetime.utcnow() - timedelta(days=days)
+
+            result = await session.stream(
+                _team_story_points_query(team_id, start_date)
+                .execution_options(yield_per=chunk_rows)
+            )
+            format_row = functools.partial(_team_story_point_row, team_name)
+            async for partition in result.partitions():
+                await _run_in_executor(
+                    _append_story_points, writer, totals, format_row, partition
+                )
+
+        return await _run_in_executor(_save_story_points, writer, totals, days)
+
+    async def export_leaderboard_excel(
+        self,
+        days: int = 30,
+        limit: int = 50
+    ) -> IO[bytes]:
+        """Export leaderboard to Excel format"""
+        async with get_async_session() as session:
+            start_date = datetime.utcnow() - timedelta(days=days)
+
+            results = (await session.execute(
+                _leaderboard_query(start_date, limit)
+            )).all()
+
+        def build() -> IO[bytes]:
+            writer = _ExcelStreamWriter('Лидерборд', LEADERBOARD_HEADER)
+            writer.append_rows(enumerate(results, 1), _leaderboard_row)
+            writer.add_summary([['Участников', len(results)], ['Период', f"{days} дней"]])
+            return writer.save()
+
+        return await _run_in_executor(build)
+
+    async def export_user_data_parquet(
+        self,
+        telegram_id: str,
+        days: int = 30,
+        destination: Optional[str] = None,
+        partition_by_month: bool = False,
+        chunk_rows: int = STREAM_CHUNK_ROWS
+    ) -> Union[IO[bytes], str]:
+        """Export user's story points to zstd-compressed Parquet
+
+        Rows are fetched in ``chunk_rows`` batches and each batch is written as
+        a row group. Without ``destination`` a rewound spooled file is returned;
+        otherwise the data is written to ``destination`` (a directory when
+        ``partition_by_month`` is set) and that path is returned.
+        """
+        writer = await _run_in_executor(
+            _ParquetStreamWriter,
+            _user_parquet_schema(), _user_parquet_batch, destination, partition_by_month
+        )
+
+        try:
+            async with get_async_session() as session:
+                user = await AsyncUserService(session).resolve_identity(telegram_id)
+                if not user:
+                    raise ValueError(f"User with telegram_id {telegram_id} not found")
+
+                start_date = datetime.utcnow() - timedelta(days=days)
+
+                result = await session.stream(
+                    _user_story_points_query(user.id, start_date)
+                    .execution_options(yield_per=chunk_rows)
+                )
+                async for partition in result.partitions():
+                    await _run_in_executor(writer.append_rows, partition)
+
+            return await _run_in_executor(writer.save)
+        except BaseException:
+            writer.abort()
+            raise
+
+    async def export_team_data_parquet(
+        self,
+        team_id: int,
+        days: int = 30,
+        destination: Optional[str] = None,
+        partition_by_month: bool = False,
+        chunk_rows: int = STREAM_CHUNK_ROWS
+    ) -> Union[IO[bytes], str]:
+        """Export team's story points to Parquet; see ``export_user_data_parquet``"""
+        writer = None
+        try:
+            async with get_async_session() as session:
+                team_name = await session.scalar(select(Team.name).where(Team.id == team_id))
+                if team_name is None:
+                    raise ValueError(f"Team with id {team_id} not found")
+
+                writer = await _run_in_executor(
+                    _ParquetStreamWriter,
+                    _team_parquet_schema(),
+                    functools.partial(_team_parquet_batch, team_name),
+                    destination,
+                    partition_by_month
+                )
+
+                start_date = datetime.utcnow() - timedelta(days=days)
+
+                result = await session.stream(
+                    _team_story_points_query(team_id, start_date)
+                    .execution_options(yield_per=chunk_rows)
+                )
+                async for partition in result.partitions():
+                    await _run_in_executor(writer.append_rows, partition)
+
+            return await _run_in_executor(writer.save)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
 
     async def get_velocity_report(
         self, 
@@ -232,101 +732,213 @@ class ExportService:
         team_id: Optional[int] = None,
         days: int = 30
     ) -> Dict[str, Any]:
-        """Generate velocity report for user or team"""
-        async with get_session() as session:
-            start_date = datetime.utcnow() - timedelta(days=days)
+        """Generate velocity report for user or team
+
+        ``summary`` and the zero-filled ``series`` come from
+        ``core.analytics.velocity_stats``; team reports also carry the
+        same statistics for every member, computed in the same pass.
+        """
+        async with get_async_session() as session:
+            end_date = datetime.utcnow()
+            start_date = end_date - timedelta(days=days)
             
             if telegram_id:
-                user = session.query(User).filter(User.telegram_id == telegram_id).first()
+                user = await AsyncUserService(session).resolve_identity(telegram_id)
                 if not user:
                     raise ValueError(f"User with telegram_id {telegram_id} not found")
                 
                 # Daily breakdown
-                daily_stats = session.query(
-                    func.date(StoryPoint.date_completed).label('date'),
-                    func.sum(StoryPoint.points).label('points'),
-                    func.count(StoryPoint.id).label('tasks')
-                ).filter(
-                    StoryPoint.user_id == user.id,
-                    StoryPoint.date_completed >= start_date
-                ).group_by(
-                    func.date(StoryPoint.date_completed)
-                ).order_by('date').all()
+                window = daily_points_window(start_date, user_id=user.id)
+                daily_stats = (await session.execute(
+                    select(
+                        window.c.day.label('date'),
+                        func.sum(window.c.points).label('points'),
+                        func.sum(window.c.tasks).label('tasks')
+                    ).group_by(
+                        window.c.day
+                    ).order_by('date')
+                )).all()
                 
                 report = {
                     'type': 'user',
                     'name': user.first_name or user.username or "Неизвестный",
                     'period_days': days,
-                    'daily_breakdown': [
-                        {
-                            'date': stat.date.strftime('%Y-%m-%d'),
-                            'points': float(stat.points),
-                            'tasks': stat.tasks
-                        }
-                        for stat in daily_stats
-                    ]
+                    **velocity_stats(
+                        [(user.id, stat.date, stat.points, stat.tasks) for stat in daily_stats],
+                        start_date, end_date, entities=[user.id]
+                    )[user.id]
                 }
                 
             elif team_id:
-                team = session.query(Team).filter(Team.id == team_id).first()
+                team = await session.scalar(select(Team).where(Team.id == team_id))
                 if not team:
                     raise ValueError(f"Team with id {team_id} not found")
                 
-                team_members = session.query(TeamMember).filter(
-                    TeamMember.team_id == team_id
-                ).all()
+                members = (await session.execute(
+                    select(
+                        User.id, User.first_name, User.last_name, User.username
+                    ).join(
+                        TeamMember, TeamMember.user_id == User.id
+                    ).where(TeamMember.team_id == team_id)
+                )).all()
+                
+                user_ids = [member.id for member in members]
                 
-                user_ids = [member.user_id for member in team_members]
+                # Daily breakdown per member; the team series is their sum
+                window = daily_points_window(start_date, team_id=team_id)
+                daily_stats = (await session.execute(
+                    select(
+                        window.c.user_id,
+                        window.c.day.label('date'),
+                        func.sum(window.c.points).label('points'),
+                        func.sum(window.c.tasks).label('tasks')
+                    ).group_by(
+                        window.c.user_id, window.c.day
+                    )
+                )).all()
                 
-                # Daily breakdown for team
-                daily_stats = session.query(
-                    func.date(StoryPoint.date_completed).label('date'),
-                    func.sum(StoryPoint.points).label('points'),
-                    func.count(StoryPoint.id).label('tasks')
-                ).filter(
-                    StoryPoint.user_id.in_(user_ids),
-                    StoryPoint.date_completed >= start_date
-                ).group_by(
-                    func.date(StoryPoint.date_completed)
-                ).order_by('date').all()
+                rows = [(stat.user_id, stat.date, stat.points, stat.tasks) for stat in daily_stats]
+                member_stats = velocity_stats(rows, start_date, end_date, entities=user_ids)
+                team_stats = velocity_stats(
+                    [(team.id, *row[1:]) for row in rows], start_date, end_date, entities=[team.id]
+                )[team.id]
                 
                 report = {
                     'type': 'team',
                     'name': team.name,
                     'period_days': days,
-                    'members_count': len(team_members),
-                    'daily_breakdown': [
-                        {
-                            'date': stat.date.strftime('%Y-%m-%d'),
-                            'points': float(stat.points),
-                            'tasks': stat.tasks
-                        }
-                        for stat in daily_stats
-                    ]
+                    'members_count': len(members),
+                    **team_stats,
+                    'members': sorted(
+                        (
+                            {
+                                'name': _display_name(
+                                    member.first_name, member.last_name, member.username
+                                ),
+                                'summary': member_stats[member.id]['summary']
+                            }
+                            for member in members
+                        ),
+                        key=lambda member: member['summary']['total_points'],
+                        reverse=True
+                    )
                 }
             else:
                 raise ValueError("Either telegram_id or team_id must be provided")
-            
-            # Calculate velocity metrics
-            if report['daily_breakdown']:
-                total_points = sum(day['points'] for day in report['daily_breakdown'])
-                total_tasks = sum(day['tasks'] for day in report['daily_breakdown'])
-                working_days = len(report['daily_breakdown'])
-                
-                report['summary'] = {
-                    'total_points': total_points,
-                    'total_tasks': total_tasks,
-                    'avg_points_per_day': round(total_points / working_days, 2) if working_days > 0 else 0,
-                    'avg_tasks_per_day': round(total_tasks / working_days, 2) if working_days > 0 else 0,
-                    'avg_points_per_task': round(total_points / total_tasks, 2) if total_tasks > 0 else 0
-                }
-            else:
-                report['summary'] = {
-                    'total_points': 0,
-                    'total_tasks': 0,
-                    'avg_points_per_day': 0,
-                    'avg_tasks_per_day': 0,
-                    'avg_points_per_task': 0
+        
+        report['daily_breakdown'] = _active_days(report['series'])
+        
+        return report
+
+    async def get_velocity_reports(
+        self,
+        team_ids: Iterable[int] = (),
+        telegram_ids: Iterable[str] = (),
+        days: int = 30
+    ) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+        """Velocity reports for many teams and users at once
+
+        Returns ``{'teams': {team_id: report}, 'users': {telegram_id: report}}``
+        with reports shaped like ``get_velocity_report`` (without the
+        per-member breakdown). The daily points of every entity come from a
+        single ``GROUP BY entity, day`` statement, so the number of queries
+        does not depend on how many entities are requested.
+        """
+        team_ids = list(dict.fromkeys(team_ids))
+        telegram_ids = list(dict.fromkeys(telegram_ids))
+
+        async with get_async_session() as session:
+            end_date = datetime.utcnow()
+            start_date = end_date - timedelta(days=days)
+
+            teams = {}
+            if team_ids:
+                teams = {
+                    row.id: row
+                    for row in await session.execute(
+                        select(
+                            Team.id,
+                            Team.name,
+                            func.count(TeamMember.user_id).label('members_count')
+                        ).outerjoin(
+                            TeamMember, TeamMember.team_id == Team.id
+                        ).where(
+                            Team.id.in_(team_ids)
+                        ).group_by(Team.id, Team.name)
+                    )
                 }
-            
-            return report
\ No newline at end of file
+                missing = [team_id for team_id in team_ids if team_id not in teams]
+                if missing:
+                    raise ValueError(f"Teams with ids {missing} not found")
+
+            users = await AsyncUserService(session).resolve_identities(telegram_ids)
+            missing = [telegram_id for telegram_id in telegram_ids if telegram_id not in users]
+            if missing:
+                raise ValueError(f"Users with telegram_ids {missing} not found")
+
+            daily = []
+            if team_ids:
+                window = daily_points_window(
+                    start_date,
+                    user_ids=select(TeamMember.user_id).where(TeamMember.team_id.in_(team_ids))
+                )
+                daily.append(
+                    select(
+                        literal('team').label('kind'),
+                        TeamMember.team_id.label('entity'),
+                        window.c.day,
+                        func.sum(window.c.points).label('points'),
+                        func.sum(window.c.tasks).label('tasks')
+                    ).join(
+                        TeamMember, TeamMember.user_id == window.c.user_id
+                    ).where(
+                        TeamMember.team_id.in_(team_ids)
+                    ).group_by(TeamMember.team_id, window.c.day)
+                )
+            if users:
+                window = daily_points_window(
+                    start_date, user_ids=[user.id for user in users.values()]
+                )
+                daily.append(
+                    select(
+                        literal('user').label('kind'),
+                        window.c.user_id.label('entity'),
+                        window.c.day,
+                        func.sum(window.c.points).label('points'),
+                        func.sum(window.c.tasks).label('tasks')
+                    ).group_by(window.c.user_id, window.c.day)
+                )
+
+            rows = {'team': [], 'user': []}
+            if daily:
+                for row in await session.execute(union_all(*daily)):
+                    rows[row.kind].append((row.entity, row.day, row.points, row.tasks))
+
+        team_stats = velocity_stats(rows['team'], start_date, end_date, entities=team_ids)
+        user_stats = velocity_stats(
+            rows['user'], start_date, end_date,
+            entities=[users[telegram_id].id for telegram_id in telegram_ids]
+        )
+
+        reports = {'teams': {}, 'users': {}}
+        for team_id in team_ids:
+            stats = team_stats[team_id]
+            reports['teams'][team_id] = {
+                'type': 'team',
+                'name': teams[team_id].name,
+                'period_days': days,
+                'members_count': teams[team_id].members_count,
+                **stats,
+                'daily_breakdown': _active_days(stats['series'])
+            }
+        for telegram_id in telegram_ids:
+            user = users[telegram_id]
+            stats = user_stats[user.id]
+            reports['users'][telegram_id] = {
+                'type': 'user',
+                'name': user.first_name or user.username or "Неизвестный",
+                'period_days': days,
+                **stats,
+                'daily_breakdown': _active_days(stats['series'])
+            }
+        return reports
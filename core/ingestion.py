@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from core.models import StoryPoint
+from core.rollup import rollup_increments, rollup_upsert
+from core.services import AsyncUserService, invalidate_leaderboard
+from db.database import get_async_session
+
+logger = logging.getLogger(__name__)
+
+# Queued in place of a submission to make the flush loop exit
+_STOP = object()
+
+
+@dataclass
+class _Submission:
+    telegram_id: str
+    points: float
+    description: Optional[str]
+    date_completed: datetime
+    future: asyncio.Future
+
+
+class StoryPointIngestor:
+    """Write-behind queue that turns bursts of submissions into multi-row INSERTs.
+
+    ``submit`` enqueues a story point and waits until the batch holding it
+    has been committed. A background task flushes the queue every
+    ``flush_interval`` seconds, or as soon as ``max_batch`` rows are waiting.
+    Once ``stop`` is called, ``submit`` raises, and submissions the task did
+    not get to write fail with ``RuntimeError`` instead of waiting forever.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 0.05,
+        max_batch: int = 500,
+        max_queue: int = 10_000,
+    ):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        self.flushes = 0
+        self.rows_written = 0
+        self.rows_failed = 0
+        self.last_flush_size = 0
+        self.max_flush_size = 0
+        self.last_flush_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if not self.running:
+            self._closed = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush everything already queued, then stop the background task."""
+        if not self.running:
+            return
+        self._closed = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(
+        self,
+        telegram_id: str,
+        points: float,
+        description: Optional[str] = None,
+        date_completed: Optional[datetime] = None,
+    ) -> StoryPoint:
+        if self._closed or not self.running:
+            raise RuntimeError("StoryPointIngestor is not running")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(
+            _Submission(
+                telegram_id=telegram_id,
+                points=points,
+                description=description,
+                date_completed=date_completed or datetime.utcnow(),
+                future=future,
+            )
+        )
+        # A put that waited for queue space may land after the task has
+        # exited and drained the queue
+        if not self.running:
+            self._fail_pending([])
+        return await future
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self._queue.qsize(),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "rows_failed": self.rows_failed,
+            "last_flush_size": self.last_flush_size,
+            "max_flush_size": self.max_flush_size,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        batch: List[_Submission] = []
+
+        try:
+            while not stopping:
+                item = await self._queue.get()
+                if item is _STOP:
+                    break
+
+                batch = [item]
+                deadline = loop.time() + self.flush_interval
+                while len(batch) < self.max_batch:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                await self._flush(batch)
+        finally:
+            # Stopped, or cancelled mid-flush: nothing will write what is left
+            self._closed = True
+            self._fail_pending(batch)
+
+    def _fail_pending(self, batch: List[_Submission]) -> None:
+        """Fail the futures of ``batch`` and of everything still queued."""
+        pending = list(batch)
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is not _STOP:
+                pending.append(item)
+
+        for submission in pending:
+            if not submission.future.done():
+                self.rows_failed += 1
+                submission.future.set_exception(
+                    RuntimeError("StoryPointIngestor stopped before the story point was written")
+                )
+
+    async def _flush(self, batch: List[_Submission]) -> None:
+        started = time.perf_counter()
+        try:
+            async with get_async_session() as session:
+                identities = await AsyncUserService(session).resolve_identities(
+                    {submission.telegram_id for submission in batch}
+                )
+
+                accepted = []
+                for submission in batch:
+                    if submission.telegram_id in identities:
+                        accepted.append(submission)
+                    elif not submission.future.done():
+                        self.rows_failed += 1
+                        submission.future.set_exception(
+                            ValueError(
+                                f"User with telegram_id {submission.telegram_id} not found"
+                            )
+                        )
+
+                if not accepted:
+                    return
+
+                rows = [
+                    {
+                        "user_id": identities[submission.telegram_id].id,
+                        "points": submission.points,
+                        "description": submission.description,
+                        "date_completed": submission.date_completed,
+                    }
+                    for submission in accepted
+                ]
+                story_points = (
+                    await session.scalars(
+                        insert(StoryPoint).returning(
+                            StoryPoint, sort_by_parameter_order=True
+                        ),
+                        rows,
+                    )
+                ).all()
+                await session.execute(
+                    rollup_upsert(
+                        session.get_bind().dialect.name,
+                        rollup_increments(
+                            (row["user_id"], row["date_completed"], row["points"])
+                            for row in rows
+                        ),
+                    )
+                )
+                await session.commit()
+        except Exception as exc:
+            logger.exception("Failed to flush %d story points", len(batch))
+            for submission in batch:
+                if not submission.future.done():
+                    self.rows_failed += 1
+                    submission.future.set_exception(exc)
+            return
+
+        await invalidate_leaderboard()
+
+        self.flushes += 1
+        self.rows_written += len(accepted)
+        self.last_flush_size = len(accepted)
+        self.max_flush_size = max(self.max_flush_size, len(accepted))
+        self.last_flush_seconds = time.perf_counter() - started
+
+        for submission, story_point in zip(accepted, story_points):
+            if not submission.future.done():
+                submission.future.set_result(story_point)
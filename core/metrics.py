@@ -0,0 +1,278 @@
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency buckets, from sub-millisecond
+# statements to multi-second exports
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Service method running in the current task, e.g. "AsyncTeamService.get_team_stats";
+# statement timings are attributed to it
+current_operation: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_operation", default=None
+)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram, as Prometheus represents one.
+
+    Quantiles are estimated from the buckets by linear interpolation (what
+    Prometheus' ``histogram_quantile`` does), so memory stays constant no
+    matter how many observations are made.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def cumulative_counts(self) -> List[int]:
+        """Observations ``<=`` each bucket bound, ending with the ``+Inf`` total."""
+        with self._lock:
+            counts = list(self._counts)
+        total = 0
+        cumulative = []
+        for count in counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def quantile(self, q: float) -> float:
+        cumulative = self.cumulative_counts()
+        total = cumulative[-1]
+        if not total:
+            return 0.0
+        rank = q * total
+        index = bisect.bisect_left(cumulative, rank)
+        if index == len(self.buckets):
+            # Above the largest bound: report the bound, as Prometheus does
+            return self.buckets[-1]
+        lower = self.buckets[index - 1] if index else 0.0
+        below = cumulative[index - 1] if index else 0
+        in_bucket = cumulative[index] - below
+        return lower + (self.buckets[index] - lower) * (rank - below) / in_bucket
+
+    def snapshot(self) -> Dict[str, float]:
+        """Count, total and p50/p95/p99 in milliseconds."""
+        summary = {"count": self.count, "sum_ms": self.sum * 1000}
+        for q in QUANTILES:
+            summary[f"p{round(q * 100)}_ms"] = self.quantile(q) * 1000
+        return summary
+
+
+class HistogramFamily:
+    """A named metric with one ``Histogram`` per combination of label values."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram())
+        return child
+
+    def observe(self, seconds: float, *values: str) -> None:
+        self.labels(*values).observe(seconds)
+
+    @contextmanager
+    def time(self, *values: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *values)
+
+    def children(self) -> List[Tuple[Tuple[str, ...], Histogram]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+# A collector returns gauge samples: (name, documentation, labels, value)
+GaugeSample = Tuple[str, str, Dict[str, str], float]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: Dict[str, HistogramFamily] = {}
+        self._collectors: Dict[str, Callable[[], Iterable[GaugeSample]]] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...]) -> HistogramFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = HistogramFamily(name, documentation, labelnames)
+        return family
+
+    def register_collector(self, key: str, collector: Callable[[], Iterable[GaugeSample]]) -> None:
+        """Add (or replace) a callback polled for gauge samples at render time."""
+        self._collectors[key] = collector
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Quantile summaries per family and label values, for logs and health checks."""
+        return {
+            name: {
+                ",".join(values): histogram.snapshot()
+                for values, histogram in family.children()
+            }
+            for name, family in self._families.items()
+        }
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for family in self._families.values():
+            lines.append(f"# HELP {family.name} {family.documentation}")
+            lines.append(f"# TYPE {family.name} histogram")
+            for values, histogram in family.children():
+                labels = dict(zip(family.labelnames, values))
+                cumulative = histogram.cumulative_counts()
+                for bound, count in zip(histogram.buckets + (float("inf"),), cumulative):
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{family.name}_bucket{_labels({**labels, 'le': le})} {count}")
+                lines.append(f"{family.name}_sum{_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{family.name}_count{_labels(labels)} {cumulative[-1]}")
+
+        documented = set()
+        for collector in list(self._collectors.values()):
+            for name, documentation, labels, value in collector():
+                if name not in documented:
+                    documented.add(name)
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{_labels(labels)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        for family in self._families.values():
+            family.clear()
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+HANDLER_LATENCY = REGISTRY.histogram(
+    "storybot_handler_duration_seconds", "Time spent in a bot update handler.", ("handler",)
+)
+SERVICE_LATENCY = REGISTRY.histogram(
+    "storybot_service_duration_seconds", "Time spent in a service method.", ("method",)
+)
+STATEMENT_LATENCY = REGISTRY.histogram(
+    "storybot_db_statement_duration_seconds",
+    "Time spent executing a SQL statement, by statement and calling service method.",
+    ("statement", "caller"),
+)
+TELEGRAM_LATENCY = REGISTRY.histogram(
+    "storybot_telegram_request_duration_seconds", "Time spent in a Bot API request.", ("method",)
+)
+
+
+def timed(family: HistogramFamily, label: str, track_operation: bool = False):
+    """Decorator recording each call's duration in ``family`` under ``label``.
+
+    Works for plain functions, coroutine functions and async generators (timed
+    until exhausted or closed). With ``track_operation``, ``current_operation``
+    names ``label`` while the call runs, so SQL statements it issues are
+    attributed to it; async generators are not tracked, since their body runs
+    interleaved with the caller's code.
+    """
+
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                finally:
+                    family.observe(time.perf_counter() - started, label)
+
+        elif inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                token = current_operation.set(label) if track_operation else None
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    family.observe(time.perf_counter() - started, label)
+                    if token is not None:
+                        current_operation.reset(token)
+
+        else:
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                token = current_operation.set(label) if track_operation else None
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    family.observe(time.perf_counter() - started, label)
+                    if token is not None:
+                        current_operation.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(cls):
+    """Class decorator timing every public method in ``SERVICE_LATENCY``.
+
+    Methods are labelled ``ClassName.method`` and become the
+    ``current_operation`` while they run.
+    """
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.isfunction(attribute):
+            continue
+        setattr(
+            cls,
+            name,
+            timed(SERVICE_LATENCY, f"{cls.__name__}.{name}", track_operation=True)(attribute),
+        )
+    return cls
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, Text
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Float, Text, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -36,6 +36,53 @@ class StoryPoint(Base):
 
     user = relationship("User", back_populates="story_points")
 
+    __table_args__ = (
+        # Per-user windows: stats, history and exports
+        Index(
+            "ix_story_points_user_id_date_completed",
+            "user_id",
+            "date_completed",
+            postgresql_include=["points"],
+        ),
+        # Global windows: leaderboard
+        Index(
+            "ix_story_points_date_completed",
+            "date_completed",
+            postgresql_include=["user_id", "points"],
+        ),
+    )
+
+
+class DailyUserPoints(Base):
+    """Per-user, per-day totals of ``story_points``, maintained on write."""
+
+    __tablename__ = "daily_user_points"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    sum_points = Column(Float, nullable=False, default=0)
+    task_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # Global windows: leaderboard
+        Index(
+            "ix_daily_user_points_day",
+            "day",
+            postgresql_include=["user_id", "sum_points", "task_count"],
+        ),
+    )
+
+
+class BotState(Base):
+    """Conversation flags and cache markers shared by bot replicas (``core.state``)."""
+
+    __tablename__ = "bot_state"
+
+    namespace = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    value = Column(Text, nullable=False)
+    expires_at = Column(DateTime, nullable=True)
+
 
 class Team(Base):
     __tablename__ = "teams"
@@ -59,4 +106,9 @@ class TeamMember(Base):
     joined_at = Column(DateTime, default=datetime.utcnow)
 
     team = relationship("Team", back_populates="team_members")
-    user = relationship("User")
\ No newline at end of file
+    user = relationship("User")
+
+    __table_args__ = (
+        # One membership per user and team; also serves team -> members joins
+        Index("uq_team_members_team_id_user_id", "team_id", "user_id", unique=True),
+    )
@@ -0,0 +1,125 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Subquery
+from sqlalchemy.sql.dml import Insert
+
+from core.models import DailyUserPoints, StoryPoint, TeamMember
+from db.dialects import upsert_insert
+
+
+def rollup_increments(
+    entries: Iterable[Tuple[int, datetime, float]],
+) -> List[Dict[str, Any]]:
+    """Fold ``(user_id, date_completed, points)`` entries into per-day increments.
+
+    Each ``(user_id, day)`` pair appears once, as a single upsert statement may
+    not touch the same row twice.
+    """
+    totals: Dict[Tuple[int, date], List[float]] = defaultdict(lambda: [0.0, 0])
+    for user_id, date_completed, points in entries:
+        total = totals[(user_id, date_completed.date())]
+        total[0] += points
+        total[1] += 1
+
+    return [
+        {"user_id": user_id, "day": day, "sum_points": points, "task_count": tasks}
+        for (user_id, day), (points, tasks) in totals.items()
+    ]
+
+
+def rollup_upsert(dialect_name: str, increments: List[Dict[str, Any]]) -> Insert:
+    """Build the statement adding ``increments`` to ``daily_user_points``."""
+    stmt = upsert_insert(dialect_name)(DailyUserPoints).values(increments)
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyUserPoints.user_id, DailyUserPoints.day],
+        set_={
+            "sum_points": DailyUserPoints.sum_points + stmt.excluded.sum_points,
+            "task_count": DailyUserPoints.task_count + stmt.excluded.task_count,
+        },
+    )
+
+
+def daily_points_window(
+    start_date: datetime,
+    user_id: Optional[int] = None,
+    user_ids: Optional[Any] = None,
+    team_id: Optional[int] = None,
+) -> Subquery:
+    """Per-user daily ``(user_id, day, points, tasks)`` rows since ``start_date``.
+
+    Whole days are read from the rollup. The first day of the window is only
+    partially covered by ``start_date``, so it is aggregated from the raw
+    ``story_points`` rows instead, which keeps totals identical to filtering
+    ``date_completed >= start_date`` directly.
+
+    ``user_id`` or ``user_ids`` (a list or a select of ids) narrow both parts;
+    ``team_id`` narrows them to the team's members through a join on
+    ``team_members``.
+    """
+    first_day = start_date.date()
+    next_midnight = datetime.combine(first_day + timedelta(days=1), time.min)
+
+    whole_days = select(
+        DailyUserPoints.user_id.label("user_id"),
+        DailyUserPoints.day.label("day"),
+        DailyUserPoints.sum_points.label("points"),
+        DailyUserPoints.task_count.label("tasks"),
+    ).where(DailyUserPoints.day > first_day)
+
+    raw_day = func.date(StoryPoint.date_completed)
+    partial_day = (
+        select(
+            StoryPoint.user_id,
+            raw_day,
+            func.sum(StoryPoint.points),
+            func.count(StoryPoint.id),
+        )
+        .where(
+            StoryPoint.date_completed >= start_date,
+            StoryPoint.date_completed < next_midnight,
+        )
+        .group_by(StoryPoint.user_id, raw_day)
+    )
+
+    if user_id is not None:
+        whole_days = whole_days.where(DailyUserPoints.user_id == user_id)
+        partial_day = partial_day.where(StoryPoint.user_id == user_id)
+    if user_ids is not None:
+        whole_days = whole_days.where(DailyUserPoints.user_id.in_(user_ids))
+        partial_day = partial_day.where(StoryPoint.user_id.in_(user_ids))
+    if team_id is not None:
+        # (team_id, user_id) is unique, so the join never duplicates rows
+        whole_days = whole_days.join(
+            TeamMember, TeamMember.user_id == DailyUserPoints.user_id
+        ).where(TeamMember.team_id == team_id)
+        partial_day = partial_day.join(
+            TeamMember, TeamMember.user_id == StoryPoint.user_id
+        ).where(TeamMember.team_id == team_id)
+
+    return union_all(whole_days, partial_day).subquery("daily_points")
+
+
+def rebuild_daily_rollup(session: Session) -> int:
+    """Recompute ``daily_user_points`` from ``story_points``; returns the row count.
+
+    The caller owns the transaction, so the rebuild is atomic with its commit.
+    """
+    raw_day = func.date(StoryPoint.date_completed)
+
+    session.execute(delete(DailyUserPoints))
+    session.execute(
+        insert(DailyUserPoints).from_select(
+            ["user_id", "day", "sum_points", "task_count"],
+            select(
+                StoryPoint.user_id,
+                raw_day,
+                func.sum(StoryPoint.points),
+                func.count(StoryPoint.id),
+            ).group_by(StoryPoint.user_id, raw_day),
+        )
+    )
+    return session.scalar(select(func.count()).select_from(DailyUserPoints))
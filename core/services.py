@@ -1,14 +1,223 @@
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
-
-from sqlalchemy import func, desc
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+    Any,
+)
+
+from sqlalchemy import func, desc, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import Insert
 
+from core.bulk_import import ImportReport, detect_format, iter_batches, iter_records
+from core.cache import LRUCache, TTLCache
+from core.metrics import instrument_methods
 from core.models import User, StoryPoint, Team, TeamMember
-from db.database import get_session
+from core.rollup import daily_points_window, rollup_increments, rollup_upsert
+from core.state import get_state_backend
+from db.database import get_session, get_async_session
+from db.dialects import upsert_insert
+
+if TYPE_CHECKING:
+    from core.ingestion import StoryPointIngestor
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a leaderboard stays cached. Writes invalidate it immediately, so
+# this only bounds how late entries sliding out of the window are dropped.
+LEADERBOARD_CACHE_TTL = 60
+
+# Keyed by (days, limit); shared by the sync and async services
+leaderboard_cache = TTLCache(ttl=LEADERBOARD_CACHE_TTL)
+
+# State backend entry replaced on every write. The async services add it to
+# the cache key, so a replica stops serving leaderboards computed before a
+# write made by another replica.
+LEADERBOARD_VERSION = ("cache", "leaderboard_version")
+
+# Seconds a process trusts its last read of LEADERBOARD_VERSION. A cache hit
+# costs a state backend round trip at most this often, and other replicas'
+# writes show up at most this late.
+LEADERBOARD_VERSION_TTL = 2.0
+
+_leaderboard_version = TTLCache(ttl=LEADERBOARD_VERSION_TTL)
+
+# Invalidations published by sync services called from a running event loop
+_pending_invalidations: set = set()
+
+
+async def _shared_leaderboard_version() -> str:
+    """The last published LEADERBOARD_VERSION, read at most once per TTL."""
+    version = _leaderboard_version.get(LEADERBOARD_VERSION)
+    if version is None:
+        version = await get_state_backend().get(*LEADERBOARD_VERSION, "")
+        _leaderboard_version.set(LEADERBOARD_VERSION, version)
+    return version
+
+
+def _new_leaderboard_version() -> str:
+    """Drop this process's cached leaderboards and switch it to a new version."""
+    leaderboard_cache.invalidate()
+    version = uuid.uuid4().hex
+    _leaderboard_version.set(LEADERBOARD_VERSION, version)
+    return version
+
+
+async def _publish_leaderboard_version(version: str) -> None:
+    try:
+        await get_state_backend().set(*LEADERBOARD_VERSION, version)
+    except Exception:
+        logger.exception("Failed to publish leaderboard invalidation")
+
+
+async def invalidate_leaderboard() -> None:
+    """Drop cached leaderboards in this process and, via the state backend, elsewhere.
+
+    A failing backend only delays other replicas until their entries expire,
+    so it is logged rather than failing the write that triggered it.
+    """
+    await _publish_leaderboard_version(_new_leaderboard_version())
+
+
+def _invalidate_leaderboard_from_sync() -> None:
+    """``invalidate_leaderboard`` for the sync services, which run outside the event loop.
+
+    This process's cache is dropped before returning, so the writer's next
+    read is exact; only publishing the version to other replicas may be left
+    to the running loop.
+    """
+    version = _new_leaderboard_version()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        try:
+            get_state_backend().set_sync(*LEADERBOARD_VERSION, version)
+        except Exception:
+            logger.exception("Failed to publish leaderboard invalidation")
+        return
+    task = loop.create_task(_publish_leaderboard_version(version))
+    _pending_invalidations.add(task)
+    task.add_done_callback(_pending_invalidations.discard)
+
+
+# Number of telegram_id -> UserIdentity entries kept in memory
+IDENTITY_CACHE_SIZE = 10_000
+
 
+class UserIdentity(NamedTuple):
+    """The parts of a ``User`` other services need, cheap to cache."""
 
+    id: int
+    telegram_id: str
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+    def has_profile(
+        self,
+        username: Optional[str],
+        first_name: Optional[str],
+        last_name: Optional[str],
+    ) -> bool:
+        return (self.username, self.first_name, self.last_name) == (
+            username,
+            first_name,
+            last_name,
+        )
+
+
+_identity_columns = (
+    User.id,
+    User.telegram_id,
+    User.username,
+    User.first_name,
+    User.last_name,
+)
+
+
+def _user_upsert(
+    dialect_name: str,
+    telegram_id: str,
+    username: Optional[str],
+    first_name: Optional[str],
+    last_name: Optional[str],
+) -> Insert:
+    """INSERT the user, or UPDATE its profile only if a field differs.
+
+    Returns the identity row when a row was written. An unchanged profile
+    leaves the row untouched and returns nothing.
+    """
+    stmt = upsert_insert(dialect_name)(User).values(
+        telegram_id=telegram_id,
+        username=username,
+        first_name=first_name,
+        last_name=last_name,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[User.telegram_id],
+        set_={
+            "username": stmt.excluded.username,
+            "first_name": stmt.excluded.first_name,
+            "last_name": stmt.excluded.last_name,
+            "updated_at": datetime.utcnow(),
+        },
+        where=or_(
+            User.username.is_distinct_from(stmt.excluded.username),
+            User.first_name.is_distinct_from(stmt.excluded.first_name),
+            User.last_name.is_distinct_from(stmt.excluded.last_name),
+        ),
+    ).returning(*_identity_columns)
+
+
+def _window_stats(stats) -> Dict[str, Any]:
+    """Turn summed ``daily_points_window`` totals into the stats dict."""
+    total_points = float(stats.total_points) if stats.total_points else 0
+    total_tasks = int(stats.total_tasks) if stats.total_tasks else 0
+
+    return {
+        "total_points": total_points,
+        "total_tasks": total_tasks,
+        "avg_points": total_points / total_tasks if total_tasks else 0,
+    }
+
+
+def _team_stats_query(team_id: int, start_date: datetime) -> Select:
+    """Team totals and member count in one statement, joined on ``team_members``."""
+    window = daily_points_window(start_date, team_id=team_id)
+    members_count = (
+        select(func.count())
+        .select_from(TeamMember)
+        .where(TeamMember.team_id == team_id)
+        .scalar_subquery()
+    )
+    return select(
+        func.sum(window.c.points).label("total_points"),
+        func.sum(window.c.tasks).label("total_tasks"),
+        members_count.label("members_count"),
+    )
+
+
+@instrument_methods
 class UserService:
+    # Shared by every service instance, sync and async alike
+    identity_cache = LRUCache(maxsize=IDENTITY_CACHE_SIZE)
+
     def __init__(self, session: Optional[Session] = None):
         self.session = session
 
@@ -18,41 +227,93 @@ class UserService:
         username: Optional[str] = None,
         first_name: Optional[str] = None,
         last_name: Optional[str] = None,
-    ) -> User:
+    ) -> UserIdentity:
+        identity = self.identity_cache.get(telegram_id)
+        if identity is not None and identity.has_profile(username, first_name, last_name):
+            return identity
+
         session = self.session or get_session()
         close_session = self.session is None
         
         try:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
-
-            if not user:
-                user = User(
-                    telegram_id=telegram_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name,
+            row = session.execute(
+                _user_upsert(
+                    session.get_bind().dialect.name,
+                    telegram_id,
+                    username,
+                    first_name,
+                    last_name,
                 )
-                session.add(user)
-                session.commit()
-                session.refresh(user)
-            else:
-                # Update user info if changed
-                if (
-                    username != user.username
-                    or first_name != user.first_name
-                    or last_name != user.last_name
-                ):
-                    user.username = username
-                    user.first_name = first_name
-                    user.last_name = last_name
-                    user.updated_at = datetime.utcnow()
-                    session.commit()
+            ).first()
+            if row is None:
+                # Profile unchanged, so the upsert wrote and returned nothing
+                row = session.execute(
+                    select(*_identity_columns).where(User.telegram_id == telegram_id)
+                ).one()
+            session.commit()
+        finally:
+            if close_session:
+                session.close()
+
+        identity = UserIdentity(*row)
+        self.identity_cache.set(telegram_id, identity)
+        return identity
 
-            return user
+    def resolve_identity(self, telegram_id: str) -> Optional[UserIdentity]:
+        """Look up a user's id and display fields, from the cache when possible."""
+        identity = self.identity_cache.get(telegram_id)
+        if identity is not None:
+            return identity
+
+        session = self.session or get_session()
+        close_session = self.session is None
+
+        try:
+            row = session.execute(
+                select(*_identity_columns).where(User.telegram_id == telegram_id)
+            ).first()
         finally:
             if close_session:
                 session.close()
 
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        self.identity_cache.set(telegram_id, identity)
+        return identity
+
+    def resolve_identities(self, telegram_ids: Iterable[str]) -> Dict[str, UserIdentity]:
+        """Batch ``resolve_identity``: cache misses share a single query."""
+        identities = {}
+        missing = set()
+        for telegram_id in telegram_ids:
+            identity = self.identity_cache.get(telegram_id)
+            if identity is not None:
+                identities[telegram_id] = identity
+            else:
+                missing.add(telegram_id)
+
+        if missing:
+            session = self.session or get_session()
+            close_session = self.session is None
+
+            try:
+                rows = session.execute(
+                    select(*_identity_columns).where(User.telegram_id.in_(missing))
+                )
+                for row in rows:
+                    identity = UserIdentity(*row)
+                    self.identity_cache.set(identity.telegram_id, identity)
+                    identities[identity.telegram_id] = identity
+            finally:
+                if close_session:
+                    session.close()
+
+        return identities
+
+    def invalidate_identity(self, telegram_id: str) -> None:
+        self.identity_cache.delete(telegram_id)
+
     def get_user_by_telegram_id(self, telegram_id: str) -> Optional[User]:
         session = self.session or get_session()
         close_session = self.session is None
@@ -64,6 +325,7 @@ class UserService:
                 session.close()
 
 
+@instrument_methods
 class StoryPointService:
     def add_story_point(
         self,
@@ -77,7 +339,7 @@ class StoryPointService:
 
         session = get_session()
         try:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+            user = UserService(session).resolve_identity(telegram_id)
             if not user:
                 raise ValueError(f"User with telegram_id {telegram_id} not found")
 
@@ -88,7 +350,14 @@ class StoryPointService:
                 date_completed=date_completed,
             )
             session.add(story_point)
+            session.execute(
+                rollup_upsert(
+                    session.get_bind().dialect.name,
+                    rollup_increments([(user.id, date_completed, points)]),
+                )
+            )
             session.commit()
+            _invalidate_leaderboard_from_sync()
             session.refresh(story_point)
 
             return story_point
@@ -100,47 +369,41 @@ class StoryPointService:
     ) -> Optional[Dict[str, Any]]:
         session = get_session()
         try:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+            user = UserService(session).resolve_identity(telegram_id)
             if not user:
                 return None
 
             start_date = datetime.utcnow() - timedelta(days=days)
+            window = daily_points_window(start_date, user_id=user.id)
 
-            stats = (
-                session.query(
-                    func.sum(StoryPoint.points).label("total_points"),
-                    func.count(StoryPoint.id).label("total_tasks"),
-                    func.avg(StoryPoint.points).label("avg_points"),
-                )
-                .filter(
-                    StoryPoint.user_id == user.id,
-                    StoryPoint.date_completed >= start_date,
-                )
-                .first()
-            )
+            stats = session.query(
+                func.sum(window.c.points).label("total_points"),
+                func.sum(window.c.tasks).label("total_tasks"),
+            ).first()
 
-            return {
-                "total_points": float(stats.total_points) if stats.total_points else 0,
-                "total_tasks": stats.total_tasks if stats.total_tasks else 0,
-                "avg_points": float(stats.avg_points) if stats.avg_points else 0,
-            }
+            return _window_stats(stats)
         finally:
             session.close()
 
     def get_leaderboard(self, days: int = 30, limit: int = 10) -> List[Dict[str, Any]]:
+        cached = leaderboard_cache.get((days, limit))
+        if cached is not None:
+            return [dict(entry) for entry in cached]
+
+        generation = leaderboard_cache.generation
         session = get_session()
         try:
             start_date = datetime.utcnow() - timedelta(days=days)
+            window = daily_points_window(start_date)
 
             results = (
                 session.query(
                     User.first_name,
                     User.last_name,
                     User.username,
-                    func.sum(StoryPoint.points).label("total_points"),
+                    func.sum(window.c.points).label("total_points"),
                 )
-                .join(StoryPoint, User.id == StoryPoint.user_id)
-                .filter(StoryPoint.date_completed >= start_date)
+                .join(window, User.id == window.c.user_id)
                 .group_by(User.id, User.first_name, User.last_name, User.username)
                 .order_by(desc("total_points"))
                 .limit(limit)
@@ -155,16 +418,86 @@ class StoryPointService:
 
                 leaderboard.append({"name": name, "points": float(result.total_points)})
 
+            leaderboard_cache.set(
+                (days, limit), [dict(entry) for entry in leaderboard], generation
+            )
             return leaderboard
         finally:
             session.close()
 
+    def bulk_import(
+        self,
+        source: Union[str, Path, TextIO],
+        format: Optional[str] = None,
+        batch_size: int = 5000,
+    ) -> ImportReport:
+        """Stream historical story points from a CSV or JSONL file into the database.
+
+        Records need ``telegram_id``, ``points`` and ``date_completed`` (ISO 8601);
+        ``description`` is optional. Rows of unknown users are skipped and
+        counted. Each batch is committed on its own, together with its rollup
+        update, so memory use is bounded by ``batch_size``.
+        """
+        if isinstance(source, (str, Path)):
+            path = Path(source)
+            with path.open(newline="", encoding="utf-8") as stream:
+                return self.bulk_import(stream, format or detect_format(path), batch_size)
+        if format is None:
+            raise ValueError("format is required when importing from a stream")
+
+        report = ImportReport()
+        started = time.perf_counter()
+        session = get_session()
+        try:
+            dialect_name = session.get_bind().dialect.name
+            for batch in iter_batches(iter_records(source, format), batch_size):
+                identities = UserService(session).resolve_identities(
+                    {record["telegram_id"] for record in batch}
+                )
+
+                rows = []
+                for record in batch:
+                    identity = identities.get(record["telegram_id"])
+                    if identity is None:
+                        report.skip_unknown(record["telegram_id"])
+                        continue
+                    rows.append(
+                        {
+                            "user_id": identity.id,
+                            "points": record["points"],
+                            "description": record["description"],
+                            "date_completed": record["date_completed"],
+                        }
+                    )
+
+                if rows:
+                    session.execute(insert(StoryPoint), rows)
+                    session.execute(
+                        rollup_upsert(
+                            dialect_name,
+                            rollup_increments(
+                                (row["user_id"], row["date_completed"], row["points"])
+                                for row in rows
+                            ),
+                        )
+                    )
+                    session.commit()
+                    _invalidate_leaderboard_from_sync()
+
+                report.rows_imported += len(rows)
+                report.batches += 1
+        finally:
+            session.close()
+            report.seconds = time.perf_counter() - started
+
+        return report
+
     def get_user_story_points(
         self, telegram_id: str, days: int = 30
     ) -> List[StoryPoint]:
         session = get_session()
         try:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+            user = UserService(session).resolve_identity(telegram_id)
             if not user:
                 return []
 
@@ -183,6 +516,7 @@ class StoryPointService:
             session.close()
 
 
+@instrument_methods
 class TeamService:
     def create_team(self, name: str, description: Optional[str] = None) -> Team:
         session = get_session()
@@ -200,10 +534,18 @@ class TeamService:
     ) -> TeamMember:
         session = get_session()
         try:
-            user = session.query(User).filter(User.telegram_id == telegram_id).first()
+            user = UserService(session).resolve_identity(telegram_id)
             if not user:
                 raise ValueError(f"User with telegram_id {telegram_id} not found")
 
+            team_member = session.scalar(
+                select(TeamMember).where(
+                    TeamMember.team_id == team_id, TeamMember.user_id == user.id
+                )
+            )
+            if team_member is not None:
+                return team_member
+
             team_member = TeamMember(team_id=team_id, user_id=user.id, role=role)
             session.add(team_member)
             session.commit()
@@ -217,30 +559,306 @@ class TeamService:
         try:
             start_date = datetime.utcnow() - timedelta(days=days)
 
-            members = (
-                session.query(TeamMember).filter(TeamMember.team_id == team_id).all()
+            stats = session.execute(_team_stats_query(team_id, start_date)).one()
+
+            return {**_window_stats(stats), "members_count": stats.members_count}
+        finally:
+            session.close()
+
+
+@asynccontextmanager
+async def _async_session_scope(
+    session: Optional[AsyncSession] = None,
+) -> AsyncIterator[AsyncSession]:
+    """Reuse the caller's session or open (and close) a new one."""
+    if session is not None:
+        yield session
+    else:
+        async with get_async_session() as new_session:
+            yield new_session
+
+
+@instrument_methods
+class AsyncUserService:
+    """Non-blocking counterpart of ``UserService`` built on ``AsyncSession``."""
+
+    identity_cache = UserService.identity_cache
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        self.session = session
+
+    async def get_or_create_user(
+        self,
+        telegram_id: str,
+        username: Optional[str] = None,
+        first_name: Optional[str] = None,
+        last_name: Optional[str] = None,
+    ) -> UserIdentity:
+        identity = self.identity_cache.get(telegram_id)
+        if identity is not None and identity.has_profile(username, first_name, last_name):
+            return identity
+
+        async with _async_session_scope(self.session) as session:
+            row = (
+                await session.execute(
+                    _user_upsert(
+                        session.get_bind().dialect.name,
+                        telegram_id,
+                        username,
+                        first_name,
+                        last_name,
+                    )
+                )
+            ).first()
+            if row is None:
+                # Profile unchanged, so the upsert wrote and returned nothing
+                row = (
+                    await session.execute(
+                        select(*_identity_columns).where(
+                            User.telegram_id == telegram_id
+                        )
+                    )
+                ).one()
+            await session.commit()
+
+        identity = UserIdentity(*row)
+        self.identity_cache.set(telegram_id, identity)
+        return identity
+
+    async def get_user_by_telegram_id(self, telegram_id: str) -> Optional[User]:
+        async with _async_session_scope(self.session) as session:
+            return await session.scalar(
+                select(User).where(User.telegram_id == telegram_id)
+            )
+
+    async def resolve_identity(self, telegram_id: str) -> Optional[UserIdentity]:
+        """Look up a user's id and display fields, from the cache when possible."""
+        identity = self.identity_cache.get(telegram_id)
+        if identity is not None:
+            return identity
+
+        async with _async_session_scope(self.session) as session:
+            row = (
+                await session.execute(
+                    select(*_identity_columns).where(User.telegram_id == telegram_id)
+                )
+            ).first()
+
+        if row is None:
+            return None
+        identity = UserIdentity(*row)
+        self.identity_cache.set(telegram_id, identity)
+        return identity
+
+    async def resolve_identities(
+        self, telegram_ids: Iterable[str]
+    ) -> Dict[str, UserIdentity]:
+        """Batch ``resolve_identity``: cache misses share a single query."""
+        identities = {}
+        missing = set()
+        for telegram_id in telegram_ids:
+            identity = self.identity_cache.get(telegram_id)
+            if identity is not None:
+                identities[telegram_id] = identity
+            else:
+                missing.add(telegram_id)
+
+        if missing:
+            async with _async_session_scope(self.session) as session:
+                rows = await session.execute(
+                    select(*_identity_columns).where(User.telegram_id.in_(missing))
+                )
+                for row in rows:
+                    identity = UserIdentity(*row)
+                    self.identity_cache.set(identity.telegram_id, identity)
+                    identities[identity.telegram_id] = identity
+
+        return identities
+
+    def invalidate_identity(self, telegram_id: str) -> None:
+        self.identity_cache.delete(telegram_id)
+
+
+@instrument_methods
+class AsyncStoryPointService:
+    """Non-blocking counterpart of ``StoryPointService``.
+
+    With an ``ingestor``, ``add_story_point`` hands the row to its write-behind
+    queue and returns once the batch containing it has been committed.
+    """
+
+    def __init__(
+        self,
+        session: Optional[AsyncSession] = None,
+        ingestor: Optional["StoryPointIngestor"] = None,
+    ):
+        self.session = session
+        self.ingestor = ingestor
+
+    async def add_story_point(
+        self,
+        telegram_id: str,
+        points: float,
+        description: Optional[str] = None,
+        date_completed: Optional[datetime] = None,
+    ) -> StoryPoint:
+        if date_completed is None:
+            date_completed = datetime.utcnow()
+
+        if self.ingestor is not None:
+            return await self.ingestor.submit(
+                telegram_id, points, description, date_completed
             )
 
-            user_ids = [member.user_id for member in members]
+        async with _async_session_scope(self.session) as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
+            if not user:
+                raise ValueError(f"User with telegram_id {telegram_id} not found")
+
+            story_point = StoryPoint(
+                user_id=user.id,
+                points=points,
+                description=description,
+                date_completed=date_completed,
+            )
+            session.add(story_point)
+            await session.execute(
+                rollup_upsert(
+                    session.get_bind().dialect.name,
+                    rollup_increments([(user.id, date_completed, points)]),
+                )
+            )
+            await session.commit()
+            await invalidate_leaderboard()
+            await session.refresh(story_point)
+
+            return story_point
+
+    async def get_user_stats(
+        self, telegram_id: str, days: int = 30
+    ) -> Optional[Dict[str, Any]]:
+        async with _async_session_scope(self.session) as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
+            if not user:
+                return None
+
+            start_date = datetime.utcnow() - timedelta(days=days)
+            window = daily_points_window(start_date, user_id=user.id)
 
             stats = (
-                session.query(
-                    func.sum(StoryPoint.points).label("total_points"),
-                    func.count(StoryPoint.id).label("total_tasks"),
-                    func.avg(StoryPoint.points).label("avg_points"),
+                await session.execute(
+                    select(
+                        func.sum(window.c.points).label("total_points"),
+                        func.sum(window.c.tasks).label("total_tasks"),
+                    )
                 )
-                .filter(
-                    StoryPoint.user_id.in_(user_ids),
+            ).one()
+
+            return _window_stats(stats)
+
+    async def get_leaderboard(
+        self, days: int = 30, limit: int = 10
+    ) -> List[Dict[str, Any]]:
+        cache_key = (days, limit, await _shared_leaderboard_version())
+        cached = leaderboard_cache.get(cache_key)
+        if cached is not None:
+            return [dict(entry) for entry in cached]
+
+        generation = leaderboard_cache.generation
+        async with _async_session_scope(self.session) as session:
+            start_date = datetime.utcnow() - timedelta(days=days)
+            window = daily_points_window(start_date)
+
+            results = await session.execute(
+                select(
+                    User.first_name,
+                    User.last_name,
+                    User.username,
+                    func.sum(window.c.points).label("total_points"),
+                )
+                .join(window, User.id == window.c.user_id)
+                .group_by(User.id, User.first_name, User.last_name, User.username)
+                .order_by(desc("total_points"))
+                .limit(limit)
+            )
+
+            leaderboard = []
+            for result in results:
+                name = result.first_name or result.username or "Неизвестный"
+                if result.last_name:
+                    name += f" {result.last_name}"
+
+                leaderboard.append({"name": name, "points": float(result.total_points)})
+
+            leaderboard_cache.set(
+                cache_key, [dict(entry) for entry in leaderboard], generation
+            )
+            return leaderboard
+
+    async def get_user_story_points(
+        self, telegram_id: str, days: int = 30
+    ) -> List[StoryPoint]:
+        async with _async_session_scope(self.session) as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
+            if not user:
+                return []
+
+            start_date = datetime.utcnow() - timedelta(days=days)
+
+            result = await session.scalars(
+                select(StoryPoint)
+                .where(
+                    StoryPoint.user_id == user.id,
                     StoryPoint.date_completed >= start_date,
                 )
-                .first()
+                .order_by(desc(StoryPoint.date_completed))
             )
+            return list(result)
 
-            return {
-                "total_points": float(stats.total_points) if stats.total_points else 0,
-                "total_tasks": stats.total_tasks if stats.total_tasks else 0,
-                "avg_points": float(stats.avg_points) if stats.avg_points else 0,
-                "members_count": len(members),
-            }
-        finally:
-            session.close()
+
+@instrument_methods
+class AsyncTeamService:
+    """Non-blocking counterpart of ``TeamService``."""
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        self.session = session
+
+    async def create_team(self, name: str, description: Optional[str] = None) -> Team:
+        async with _async_session_scope(self.session) as session:
+            team = Team(name=name, description=description)
+            session.add(team)
+            await session.commit()
+            await session.refresh(team)
+            return team
+
+    async def add_team_member(
+        self, team_id: int, telegram_id: str, role: str = "member"
+    ) -> TeamMember:
+        async with _async_session_scope(self.session) as session:
+            user = await AsyncUserService(session).resolve_identity(telegram_id)
+            if not user:
+                raise ValueError(f"User with telegram_id {telegram_id} not found")
+
+            team_member = await session.scalar(
+                select(TeamMember).where(
+                    TeamMember.team_id == team_id, TeamMember.user_id == user.id
+                )
+            )
+            if team_member is not None:
+                return team_member
+
+            team_member = TeamMember(team_id=team_id, user_id=user.id, role=role)
+            session.add(team_member)
+            await session.commit()
+            await session.refresh(team_member)
+            return team_member
+
+    async def get_team_stats(self, team_id: int, days: int = 30) -> Dict[str, Any]:
+        async with _async_session_scope(self.session) as session:
+            start_date = datetime.utcnow() - timedelta(days=days)
+
+            stats = (
+                await session.execute(_team_stats_query(team_id, start_date))
+            ).one()
+
+            return {**_window_stats(stats), "members_count": stats.members_count}
@@ -0,0 +1,206 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, or_, select
+
+from core.config import get_settings
+from core.models import BotState
+from db.database import get_async_session, get_session
+from db.dialects import upsert_insert
+
+
+class StateBackend(ABC):
+    """Small key-value store for state that must be shared between bot replicas.
+
+    Keys live in a ``namespace``; values must be JSON-serializable. An entry
+    stored with a ``ttl`` (seconds) reads as missing once it expires.
+    """
+
+    @abstractmethod
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        ...
+
+    @abstractmethod
+    def set_sync(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        """``set`` for synchronous callers, which may have no event loop to run it on."""
+
+    @abstractmethod
+    async def pop(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Atomically read and delete an entry, so only one reader consumes it."""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str) -> None:
+        ...
+
+    async def purge_expired(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        return 0
+
+
+class MemoryStateBackend(StateBackend):
+    """Process-local backend; the default for a single bot process."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], Tuple[Optional[float], Any]] = {}
+
+    def _live(self, namespace: str, key: str) -> Optional[Tuple[Optional[float], Any]]:
+        entry = self._entries.get((namespace, key))
+        if entry is not None and entry[0] is not None and entry[0] <= self._clock():
+            del self._entries[(namespace, key)]
+            return None
+        return entry
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        entry = self._live(namespace, key)
+        return default if entry is None else entry[1]
+
+    async def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        self.set_sync(namespace, key, value, ttl)
+
+    def set_sync(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._entries[(namespace, key)] = (expires_at, value)
+
+    async def pop(self, namespace: str, key: str, default: Any = None) -> Any:
+        entry = self._live(namespace, key)
+        if entry is None:
+            return default
+        del self._entries[(namespace, key)]
+        return entry[1]
+
+    async def delete(self, namespace: str, key: str) -> None:
+        self._entries.pop((namespace, key), None)
+
+    async def purge_expired(self) -> int:
+        now = self._clock()
+        expired = [
+            entry_key
+            for entry_key, (expires_at, _) in self._entries.items()
+            if expires_at is not None and expires_at <= now
+        ]
+        for entry_key in expired:
+            del self._entries[entry_key]
+        return len(expired)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SqlStateBackend(StateBackend):
+    """Backend on the ``bot_state`` table, shared by every replica using the database.
+
+    Every operation is a single statement on the ``(namespace, key)`` primary
+    key, so reads cost one index lookup.
+    """
+
+    def _live(self):
+        return or_(BotState.expires_at.is_(None), BotState.expires_at > datetime.utcnow())
+
+    async def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        async with get_async_session() as session:
+            value = await session.scalar(
+                select(BotState.value).where(
+                    BotState.namespace == namespace, BotState.key == key, self._live()
+                )
+            )
+        return default if value is None else json.loads(value)
+
+    def _upsert(
+        self, dialect_name: str, namespace: str, key: str, value: Any, ttl: Optional[float]
+    ):
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl) if ttl is not None else None
+        stmt = upsert_insert(dialect_name)(BotState).values(
+            namespace=namespace,
+            key=key,
+            value=json.dumps(value),
+            expires_at=expires_at,
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[BotState.namespace, BotState.key],
+            set_={"value": stmt.excluded.value, "expires_at": stmt.excluded.expires_at},
+        )
+
+    async def set(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        async with get_async_session() as session:
+            await session.execute(
+                self._upsert(session.get_bind().dialect.name, namespace, key, value, ttl)
+            )
+            await session.commit()
+
+    def set_sync(
+        self, namespace: str, key: str, value: Any, ttl: Optional[float] = None
+    ) -> None:
+        # The sync engine's pool, so the async engine is never touched from
+        # outside its event loop
+        session = get_session()
+        try:
+            session.execute(
+                self._upsert(session.get_bind().dialect.name, namespace, key, value, ttl)
+            )
+            session.commit()
+        finally:
+            session.close()
+
+    async def pop(self, namespace: str, key: str, default: Any = None) -> Any:
+        async with get_async_session() as session:
+            row = (
+                await session.execute(
+                    delete(BotState)
+                    .where(BotState.namespace == namespace, BotState.key == key)
+                    .returning(BotState.value, BotState.expires_at)
+                )
+            ).one_or_none()
+            await session.commit()
+        if row is None or (row.expires_at is not None and row.expires_at <= datetime.utcnow()):
+            return default
+        return json.loads(row.value)
+
+    async def delete(self, namespace: str, key: str) -> None:
+        async with get_async_session() as session:
+            await session.execute(
+                delete(BotState).where(BotState.namespace == namespace, BotState.key == key)
+            )
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        async with get_async_session() as session:
+            result = await session.execute(
+                delete(BotState).where(BotState.expires_at <= datetime.utcnow())
+            )
+            await session.commit()
+        return result.rowcount
+
+
+STATE_BACKENDS = {
+    "memory": MemoryStateBackend,
+    "sql": SqlStateBackend,
+}
+
+
+@lru_cache
+def get_state_backend() -> StateBackend:
+    """Process-wide backend selected by the ``STATE_BACKEND`` setting."""
+    name = get_settings().state_backend
+    try:
+        return STATE_BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown state backend {name!r}; expected one of {sorted(STATE_BACKENDS)}")
@@ -0,0 +1,23 @@
+"""Rebuild the ``daily_user_points`` rollup from ``story_points``.
+
+Usage::
+
+    python -m db.backfill_rollup
+"""
+from core.rollup import rebuild_daily_rollup
+from db.database import get_session
+
+
+def backfill_rollup() -> int:
+    session = get_session()
+    try:
+        rows = rebuild_daily_rollup(session)
+        session.commit()
+        return rows
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    rows = backfill_rollup()
+    print(f"Daily rollup rebuilt: {rows} rows")
@@ -1,42 +1,213 @@
 import os
-from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
+from core.config import Settings, get_settings
 from core.models import Base
+from db.dialects import async_database_url, is_sqlite_file, set_sqlite_pragmas
+from db.pool_metrics import PoolMetrics, instrumented_pool_class
+from db.slow_queries import SlowQueryRecorder
+from db.statement_metrics import attach_statement_timer
+
+DEFAULT_DATABASE_URL = "sqlite:///./storybot.db"
+
+
+def pool_options(database_url: str, settings: Settings) -> Dict[str, Any]:
+    """Queue pool arguments from ``settings``; in-memory SQLite keeps its default pool."""
+    if make_url(database_url).get_backend_name() == "sqlite" and not is_sqlite_file(database_url):
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def sqlite_pragmas(settings: Settings) -> Dict[str, Any]:
+    """Connection pragmas of the SQLite profile, in the order they are applied."""
+    return {
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        # A negative cache_size is in KiB rather than pages
+        "cache_size": -settings.sqlite_cache_size_kib,
+        "mmap_size": settings.sqlite_mmap_size,
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+    }
 
 
 class DatabaseManager:
-    def __init__(self):
-        self.database_url = os.getenv("DATABASE_URL", "sqlite:///./storybot.db")
-        self.async_database_url = self.database_url.replace("postgresql://", "postgresql+asyncpg://")
-        
-        # Sync engine for migrations
-        self.engine = create_engine(
-            self.database_url,
-            connect_args={"check_same_thread": False} if "sqlite" in self.database_url else {}
+    """Engines and session factories for one database.
+
+    Nothing is connected on construction: the engines are created by
+    ``init()``, or on first use of ``engine``/``async_engine`` and their
+    session factories, so importing this module stays cheap. ``warm_up()``
+    opens pooled connections ahead of the first request and ``dispose()``
+    closes them; a disposed manager initializes again on next use.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, database_url: Optional[str] = None):
+        # Both are resolved on first use, after the entry point has loaded .env
+        self._settings = settings
+        self._database_url = database_url
+        self.pool_metrics = {"sync": PoolMetrics(), "async": PoolMetrics()}
+        self.slow_queries: Optional[SlowQueryRecorder] = None
+        self._slow_queries_configured = False
+        self._engine: Optional[Engine] = None
+        self._async_engine: Optional[AsyncEngine] = None
+        self._session_factory: Optional[sessionmaker] = None
+        self._async_session_factory: Optional[async_sessionmaker] = None
+
+    @property
+    def settings(self) -> Settings:
+        return self._settings or get_settings()
+
+    @property
+    def database_url(self) -> str:
+        return self._database_url or os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+    @database_url.setter
+    def database_url(self, value: str) -> None:
+        self._database_url = value
+
+    @property
+    def async_database_url(self) -> str:
+        return async_database_url(self.database_url)
+
+    # Sync engine for migrations
+    @property
+    def engine(self) -> Engine:
+        if self._engine is None:
+            self._init_sync()
+        return self._engine
+
+    @engine.setter
+    def engine(self, value: Engine) -> None:
+        self._engine = value
+
+    @property
+    def SessionLocal(self) -> sessionmaker:
+        if self._session_factory is None:
+            self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        return self._session_factory
+
+    @SessionLocal.setter
+    def SessionLocal(self, value: sessionmaker) -> None:
+        self._session_factory = value
+
+    # Async engine for application
+    @property
+    def async_engine(self) -> AsyncEngine:
+        if self._async_engine is None:
+            self._init_async()
+        return self._async_engine
+
+    @async_engine.setter
+    def async_engine(self, value: AsyncEngine) -> None:
+        self._async_engine = value
+
+    @property
+    def AsyncSessionLocal(self) -> async_sessionmaker:
+        if self._async_session_factory is None:
+            self._async_session_factory = async_sessionmaker(
+                self.async_engine, class_=AsyncSession, expire_on_commit=False
+            )
+        return self._async_session_factory
+
+    @AsyncSessionLocal.setter
+    def AsyncSessionLocal(self, value: async_sessionmaker) -> None:
+        self._async_session_factory = value
+
+    def init(self) -> None:
+        """Create whichever engines do not exist yet; safe to call repeatedly."""
+        if self._engine is None:
+            self._init_sync()
+        if self._async_engine is None:
+            self._init_async()
+
+    def _init_sync(self) -> None:
+        url = self.database_url
+        self._engine = self._create_engine(
+            create_engine,
+            url,
+            QueuePool,
+            self.pool_metrics["sync"],
+            connect_args={"check_same_thread": False} if "sqlite" in url else {},
         )
-        
-        # Async engine for application
-        self.async_engine = create_async_engine(
-            self.async_database_url if "postgresql" in self.database_url else "sqlite+aiosqlite:///./storybot.db"
-        )
-        
-        self.SessionLocal = sessionmaker(
-            autocommit=False,
-            autoflush=False,
-            bind=self.engine
-        )
-        
-        self.AsyncSessionLocal = async_sessionmaker(
-            self.async_engine,
-            class_=AsyncSession,
-            expire_on_commit=False
+
+    def _init_async(self) -> None:
+        self._async_engine = self._create_engine(
+            create_async_engine,
+            self.async_database_url,
+            AsyncAdaptedQueuePool,
+            self.pool_metrics["async"],
         )
 
+    def _create_engine(self, factory, url, pool_class, metrics, **kwargs):
+        settings = self.settings
+        options = pool_options(url, settings)
+        if options:
+            kwargs.update(options, poolclass=instrumented_pool_class(pool_class, metrics))
+        engine = factory(url, **kwargs)
+        sync_engine = getattr(engine, "sync_engine", engine)
+        metrics.attach(sync_engine)
+        attach_statement_timer(sync_engine)
+        # One recorder (and log file handler) shared by both engines
+        if not self._slow_queries_configured:
+            self._slow_queries_configured = True
+            if settings.slow_query_threshold_ms is not None:
+                self.slow_queries = SlowQueryRecorder.from_settings(settings)
+        if self.slow_queries is not None:
+            self.slow_queries.attach(sync_engine)
+        if is_sqlite_file(url):
+            set_sqlite_pragmas(sync_engine, sqlite_pragmas(settings))
+        return engine
+
+    async def warm_up(self, connections: Optional[int] = None) -> int:
+        """Open pooled connections to the async engine before they are needed.
+
+        ``connections`` defaults to ``db_warm_up_connections`` and is capped at
+        the pool size, so no overflow connection is kept open. The connections
+        are held together, so each one is new, and then returned to the pool.
+        Returns how many were opened.
+        """
+        if connections is None:
+            connections = self.settings.db_warm_up_connections
+        engine = self.async_engine
+        if hasattr(engine.pool, "size"):
+            connections = min(connections, engine.pool.size())
+        async with AsyncExitStack() as stack:
+            for _ in range(connections):
+                conn = await stack.enter_async_context(engine.connect())
+                await conn.execute(text("SELECT 1"))
+        return max(connections, 0)
+
+    async def dispose(self) -> None:
+        """Close both engines' pooled connections and drop the engines."""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
+        self._engine = self._async_engine = None
+        self._session_factory = self._async_session_factory = None
+
+    def pool_status(self) -> Dict[str, Dict[str, Any]]:
+        """Occupancy, churn and checkout wait counters of both engines' pools.
+
+        Engines that have not been created yet report their counters only.
+        """
+        return {
+            "sync": self.pool_metrics["sync"].snapshot(getattr(self._engine, "pool", None)),
+            "async": self.pool_metrics["async"].snapshot(getattr(self._async_engine, "pool", None)),
+        }
+
     def create_tables(self):
         Base.metadata.create_all(bind=self.engine)
 
@@ -55,7 +226,7 @@ class DatabaseManager:
         return self.SessionLocal()
 
 
-# Global database manager instance
+# Global database manager instance; its engines are created on first use
 db_manager = DatabaseManager()
 
 
@@ -65,6 +236,7 @@ def get_session() -> Session:
 
 
 # Async session context manager
+@asynccontextmanager
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with db_manager.get_async_session() as session:
         yield session
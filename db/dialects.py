@@ -0,0 +1,59 @@
+from typing import Any, Callable, Dict
+
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.sql.dml import Insert
+
+# Dialects whose INSERT supports ON CONFLICT ... DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_insert(dialect_name: str) -> Callable[..., Insert]:
+    """Return the dialect-specific ``insert()`` that offers ``on_conflict_do_update``."""
+    try:
+        return _UPSERT_INSERTS[dialect_name]
+    except KeyError:
+        raise ValueError(f"Upserts are not supported for dialect {dialect_name!r}")
+
+
+# Drivers used by the async engine for each backend
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def async_database_url(database_url: str) -> str:
+    """The async-driver URL for the same database, e.g. ``sqlite:///x.db`` -> ``sqlite+aiosqlite:///x.db``."""
+    url = make_url(database_url)
+    driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.get_driver_name() == driver:
+        return database_url
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+        hide_password=False
+    )
+
+
+def is_sqlite_file(database_url: str) -> bool:
+    url = make_url(database_url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def set_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Any]) -> None:
+    """Run ``PRAGMA name = value`` for each of ``pragmas`` on every new connection.
+
+    Works for async engines too when given ``async_engine.sync_engine``.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
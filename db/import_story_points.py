@@ -0,0 +1,43 @@
+"""Import historical story points from a CSV or JSONL file.
+
+Usage::
+
+    python -m db.import_story_points history.csv --batch-size 10000
+    python -m db.import_story_points history.jsonl
+
+Each record needs telegram_id, points and date_completed (ISO 8601), plus an
+optional description. Users must already exist.
+"""
+import argparse
+
+from core.bulk_import import FORMATS
+from core.services import StoryPointService
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import historical story points")
+    parser.add_argument("path", help="CSV or JSONL file to import")
+    parser.add_argument(
+        "--format", choices=FORMATS, help="file format (default: from extension)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=5000, help="rows per INSERT batch"
+    )
+    args = parser.parse_args()
+
+    report = StoryPointService().bulk_import(
+        args.path, format=args.format, batch_size=args.batch_size
+    )
+
+    print(
+        f"Imported {report.rows_imported} rows in {report.batches} batches "
+        f"({report.seconds:.1f}s, {report.rows_per_second:.0f} rows/s)"
+    )
+    if report.rows_skipped:
+        users = len(report.unknown_telegram_ids)
+        more = "+" if report.unknown_rows_unlisted else ""
+        print(f"Skipped {report.rows_skipped} rows of {users}{more} unknown users")
+
+
+if __name__ == "__main__":
+    main()
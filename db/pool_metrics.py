@@ -0,0 +1,150 @@
+import threading
+import time
+from typing import Any, Dict, Type
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Counters for one engine's connection pool, fed by SQLAlchemy pool events.
+
+    ``checked_out``/``max_checked_out`` track occupancy, ``connections_opened``,
+    ``connections_closed`` and ``invalidations`` track churn. ``waits`` and
+    the ``wait_*`` fields cover checkouts that found the pool at capacity and
+    had to queue for a connection; ``connect_*`` is how long opening a new
+    DBAPI connection took, which is setup latency rather than contention.
+    Pool events fire on whichever thread uses the pool, so updates take a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.checkout_timeouts = 0
+        self.connect_count = 0
+        self.connect_seconds_total = 0.0
+        self.connect_seconds_max = 0.0
+
+    def attach(self, engine: Engine) -> None:
+        """Listen to ``engine``'s pool; listeners survive ``engine.dispose()``."""
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "close", self._on_close)
+        event.listen(engine, "close_detached", self._on_close)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def record_connect(self, seconds: float) -> None:
+        with self._lock:
+            self.connect_count += 1
+            self.connect_seconds_total += seconds
+            self.connect_seconds_max = max(self.connect_seconds_max, seconds)
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def _on_close(self, dbapi_connection, *args) -> None:
+        with self._lock:
+            self.connections_closed += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, pool: Pool) -> Dict[str, Any]:
+        """Counters plus the pool's own view of its size at this moment."""
+        with self._lock:
+            metrics = {
+                "checkouts": self.checkouts,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "connections_opened": self.connections_opened,
+                "connections_closed": self.connections_closed,
+                "invalidations": self.invalidations,
+                "checkout_timeouts": self.checkout_timeouts,
+                "waits": self.wait_count,
+                "wait_avg_ms": _average_ms(self.wait_seconds_total, self.wait_count),
+                "wait_max_ms": self.wait_seconds_max * 1000,
+                "connect_avg_ms": _average_ms(self.connect_seconds_total, self.connect_count),
+                "connect_max_ms": self.connect_seconds_max * 1000,
+            }
+        for name in ("size", "checkedin"):
+            if hasattr(pool, name):
+                metrics[f"pool_{name}"] = getattr(pool, name)()
+        return metrics
+
+
+def _average_ms(seconds_total: float, count: int) -> float:
+    return seconds_total / count * 1000 if count else 0.0
+
+
+def _at_capacity(pool: Pool) -> bool:
+    """No idle connection and no room to open one: a checkout has to queue."""
+    if not hasattr(pool, "overflow") or pool._max_overflow < 0:
+        return False
+    return pool.checkedin() == 0 and pool.overflow() >= pool._max_overflow
+
+
+def instrumented_pool_class(base: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """``base`` with checkout waits and connection setup reported to ``metrics``.
+
+    Pool events only fire once a connection has been handed out, so a wait
+    is timed around ``Pool.connect``, and only for checkouts that find the
+    pool at capacity. Opening DBAPI connections is timed separately around
+    ``_create_connection``. ``Pool.recreate`` (used by ``engine.dispose()``)
+    instantiates ``type(self)``, so the timing carries over to the
+    replacement pool.
+    """
+
+    class InstrumentedPool(base):
+        def connect(self):
+            queued = _at_capacity(self)
+            started = time.perf_counter()
+            timed_out = False
+            try:
+                return super().connect()
+            except PoolTimeoutError:
+                queued = timed_out = True
+                raise
+            finally:
+                if queued:
+                    metrics.record_wait(time.perf_counter() - started, timed_out)
+
+        def _create_connection(self):
+            started = time.perf_counter()
+            try:
+                return super()._create_connection()
+            finally:
+                metrics.record_connect(time.perf_counter() - started)
+
+    InstrumentedPool.__name__ = InstrumentedPool.__qualname__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
@@ -0,0 +1,151 @@
+import json
+import logging
+import time
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.cache import LRUCache
+from core.config import Settings
+from core.metrics import current_operation
+
+logger = logging.getLogger(__name__)
+
+# Statements worth explaining; PRAGMA, SAVEPOINT, DDL and the like are not
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+_SAVEPOINT = "storybot_slow_query_explain"
+
+# Longest repr of the bound parameters kept in a record
+MAX_PARAMETERS_LENGTH = 2000
+
+# Statements whose last EXPLAIN time is remembered; the least recently
+# explained are forgotten first, and may be explained again sooner
+MAX_EXPLAINED_STATEMENTS = 1000
+
+
+class SlowQueryRecorder:
+    """Writes statements slower than ``threshold_ms`` to a JSON-lines log.
+
+    Each record has the duration, the service method that issued the
+    statement (``core.metrics.current_operation``), the SQL and its bound
+    parameters. With ``explain``, the plan is captured too: ``EXPLAIN QUERY
+    PLAN`` on SQLite, and on PostgreSQL ``EXPLAIN ANALYZE`` for reads or
+    plain ``EXPLAIN`` for writes, inside a savepoint that is always rolled
+    back so the application's transaction is unaffected. A statement is
+    explained at most once per ``explain_interval`` seconds, since
+    ``EXPLAIN ANALYZE`` runs the query again.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        log: logging.Logger,
+        explain: bool = False,
+        explain_interval: float = 600.0,
+        clock=time.monotonic,
+    ):
+        self.threshold = threshold_ms / 1000
+        self.log = log
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.recorded = 0
+        self._clock = clock
+        self._explained = LRUCache(MAX_EXPLAINED_STATEMENTS)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "SlowQueryRecorder":
+        # A logger outside the logging hierarchy: slow queries go to their
+        # own file only, and each recorder keeps its own handler
+        log = logging.Logger("storybot.slow_queries", logging.INFO)
+        log.addHandler(
+            RotatingFileHandler(
+                settings.slow_query_log_path,
+                maxBytes=settings.slow_query_log_max_bytes,
+                backupCount=settings.slow_query_log_backups,
+                encoding="utf-8",
+                delay=True,
+            )
+        )
+        return cls(
+            settings.slow_query_threshold_ms,
+            log,
+            explain=settings.slow_query_explain,
+            explain_interval=settings.slow_query_explain_interval,
+        )
+
+    def attach(self, engine: Engine) -> None:
+        """Watch ``engine``'s statements; pass ``async_engine.sync_engine`` for async engines."""
+        event.listen(engine, "before_cursor_execute", self._start)
+        event.listen(engine, "after_cursor_execute", self._stop)
+
+    def _start(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None:
+            context._storybot_slow_query_started = time.perf_counter()
+
+    def _stop(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, "_storybot_slow_query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        if elapsed < self.threshold:
+            return
+
+        record = {
+            "time": datetime.utcnow().isoformat(timespec="milliseconds"),
+            "duration_ms": round(elapsed * 1000, 3),
+            "caller": current_operation.get(),
+            "dialect": conn.dialect.name,
+            "statement": statement,
+            "parameters": _truncate(repr(parameters)),
+        }
+        if self.explain and not executemany and self._due(statement):
+            record["plan"] = self._explain(conn, statement, parameters)
+        self.recorded += 1
+        self.log.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _due(self, statement: str) -> bool:
+        now = self._clock()
+        last = self._explained.get(statement)
+        if last is not None and now - last < self.explain_interval:
+            return False
+        self._explained.set(statement, now)
+        return True
+
+    def _explain(self, conn, statement: str, parameters: Any) -> Optional[List[str]]:
+        verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+        if verb not in _EXPLAINABLE:
+            return None
+
+        dialect = conn.dialect.name
+        # A separate cursor on the same DBAPI connection, so the plan sees
+        # the transaction's own uncommitted rows and no pool slot is needed
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if dialect == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                # Rows are (id, parent, notused, detail)
+                return [row[-1] for row in cursor.fetchall()]
+            if dialect == "postgresql":
+                analyze = "ANALYZE " if verb in ("SELECT", "WITH") else ""
+                cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+                try:
+                    cursor.execute(f"EXPLAIN {analyze}{statement}", parameters)
+                    return [row[0] for row in cursor.fetchall()]
+                finally:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+            return None
+        except Exception as exc:
+            logger.warning("Could not explain slow statement: %s", exc)
+            return None
+        finally:
+            cursor.close()
+
+
+def _truncate(value: str) -> str:
+    if len(value) <= MAX_PARAMETERS_LENGTH:
+        return value
+    return value[:MAX_PARAMETERS_LENGTH] + "..."
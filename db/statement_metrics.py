@@ -0,0 +1,44 @@
+import re
+import time
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.metrics import STATEMENT_LATENCY, current_operation
+
+_VERB = re.compile(r"\s*(\w+)")
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_label(statement: str) -> str:
+    """Low-cardinality name of a statement: its verb and first table, e.g. ``SELECT users``."""
+    verb = _VERB.match(statement)
+    table = _TABLE.search(statement)
+    label = verb.group(1).upper() if verb else "?"
+    return f"{label} {table.group(1)}" if table else label
+
+
+def attach_statement_timer(engine: Engine) -> None:
+    """Record every statement's execution time in ``STATEMENT_LATENCY``.
+
+    The start time is kept on the execution context, so concurrent statements
+    on other connections do not interfere. Pass ``async_engine.sync_engine``
+    for async engines.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._storybot_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _stop(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_storybot_started", None)
+        if started is not None:
+            STATEMENT_LATENCY.observe(
+                time.perf_counter() - started,
+                statement_label(statement),
+                current_operation.get() or "-",
+            )
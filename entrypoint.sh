@@ -1,9 +1,9 @@
 #!/bin/bash
 set -e
 
-# Initialize database tables
-echo "Initializing database..."
-python -c "from db.database import init_db; init_db()"
+# Apply database migrations
+echo "Applying database migrations..."
+alembic upgrade head
 
 # Run the main command
 echo "Starting StoryBot..."
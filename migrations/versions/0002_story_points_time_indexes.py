@@ -0,0 +1,38 @@
+"""Indexes for time-windowed story_points queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # INCLUDE columns are PostgreSQL-only; other dialects ignore the option.
+    op.create_index(
+        "ix_story_points_user_id_date_completed",
+        "story_points",
+        ["user_id", "date_completed"],
+        postgresql_include=["points"],
+    )
+    op.create_index(
+        "ix_story_points_date_completed",
+        "story_points",
+        ["date_completed"],
+        postgresql_include=["user_id", "points"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_story_points_date_completed", table_name="story_points")
+    op.drop_index("ix_story_points_user_id_date_completed", table_name="story_points")
@@ -0,0 +1,62 @@
+"""Daily per-user rollup of story points
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    daily_user_points = op.create_table(
+        "daily_user_points",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("sum_points", sa.Float(), nullable=False),
+        sa.Column("task_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+    op.create_index(
+        "ix_daily_user_points_day",
+        "daily_user_points",
+        ["day"],
+        postgresql_include=["user_id", "sum_points", "task_count"],
+    )
+
+    # Backfill from existing rows; same query as core.rollup.rebuild_daily_rollup
+    story_points = sa.table(
+        "story_points",
+        sa.column("id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+        sa.column("points", sa.Float),
+        sa.column("date_completed", sa.DateTime),
+    )
+    day = sa.func.date(story_points.c.date_completed)
+    op.execute(
+        daily_user_points.insert().from_select(
+            ["user_id", "day", "sum_points", "task_count"],
+            sa.select(
+                story_points.c.user_id,
+                day,
+                sa.func.sum(story_points.c.points),
+                sa.func.count(story_points.c.id),
+            ).group_by(story_points.c.user_id, day),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_daily_user_points_day", table_name="daily_user_points")
+    op.drop_table("daily_user_points")
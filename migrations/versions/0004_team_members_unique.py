@@ -0,0 +1,46 @@
+"""Unique (team_id, user_id) index on team_members
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Repeated add_team_member calls used to insert duplicate memberships;
+    # keep the oldest row of each (team_id, user_id) pair.
+    team_members = sa.table(
+        "team_members",
+        sa.column("id", sa.Integer),
+        sa.column("team_id", sa.Integer),
+        sa.column("user_id", sa.Integer),
+    )
+    first_ids = (
+        sa.select(sa.func.min(team_members.c.id))
+        .group_by(team_members.c.team_id, team_members.c.user_id)
+        .scalar_subquery()
+    )
+    op.execute(team_members.delete().where(team_members.c.id.not_in(first_ids)))
+
+    op.create_index(
+        "uq_team_members_team_id_user_id",
+        "team_members",
+        ["team_id", "user_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("uq_team_members_team_id_user_id", table_name="team_members")
@@ -2,11 +2,16 @@ import pytest
 import os
 import tempfile
 import importlib
+from unittest.mock import patch
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from telegram import User as TelegramUser
+from telegram.ext import ExtBot
 
 from core.models import Base
+from core.services import leaderboard_cache, UserService
 from db.database import get_session, get_async_session, DatabaseManager
 
 # Save original database configuration
@@ -63,6 +68,10 @@ def db_session(monkeypatch, test_db):
     
     monkeypatch.setattr(db.database, "get_async_session", mock_async_session)
     
+    # Cached results must not leak between tests
+    leaderboard_cache.invalidate()
+    UserService.identity_cache.clear()
+    
     # Clean up any existing data
     for table in reversed(Base.metadata.sorted_tables):
         session.execute(table.delete())
@@ -78,6 +87,38 @@ def db_session(monkeypatch, test_db):
     session.close()
 
 
+@pytest.fixture(scope="function")
+def async_db(monkeypatch, tmp_path):
+    """Point the async session factory at a fresh file-backed SQLite database.
+
+    An in-memory database cannot be shared between the sync engine used to
+    create the schema and the aiosqlite engine, so each test gets its own file.
+    """
+    db_path = tmp_path / "async_test.db"
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    test_db_manager = DatabaseManager(database_url=f"sqlite:///{db_path}")
+    # NullPool keeps aiosqlite connections from outliving the test's event loop
+    test_db_manager.async_engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool
+    )
+    test_db_manager.AsyncSessionLocal = async_sessionmaker(
+        test_db_manager.async_engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
+    import db.database
+    monkeypatch.setattr(db.database, "db_manager", test_db_manager)
+    leaderboard_cache.invalidate()
+    UserService.identity_cache.clear()
+
+    yield test_db_manager
+
+
 @pytest.fixture
 def sample_user_data():
     """Sample user data for testing."""
@@ -104,4 +145,16 @@ def sample_team_data():
     return {
         "name": "Test Team",
         "description": "A test team for unit testing"
-    }
\ No newline at end of file
+    }
+
+@pytest.fixture
+def bot_user():
+    """Let Application.initialize() run without calling getMe on the Bot API."""
+    me = TelegramUser(1, "StoryBot", True, username="story_bot")
+
+    async def get_me(self, *args, **kwargs):
+        self._bot_user = me
+        return me
+
+    with patch.object(ExtBot, "get_me", get_me):
+        yield me
@@ -0,0 +1,57 @@
+from datetime import date, datetime
+
+import pytest
+
+from core.analytics import velocity_stats
+
+
+class TestVelocityStats:
+    def test_fills_calendar_gaps_with_zero_days(self):
+        stats = velocity_stats(
+            [("a", date(2024, 1, 1), 3.0, 1), ("a", date(2024, 1, 3), 5.0, 2)],
+            date(2024, 1, 1),
+            date(2024, 1, 4),
+        )["a"]
+
+        assert [day["date"] for day in stats["series"]] == [
+            "2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"
+        ]
+        assert [day["points"] for day in stats["series"]] == [3.0, 0.0, 5.0, 0.0]
+        assert stats["summary"]["active_days"] == 2
+        assert stats["summary"]["avg_points_per_day"] == 4.0
+        assert stats["summary"]["avg_points_per_calendar_day"] == 2.0
+
+    def test_rolling_ewma_and_spread(self):
+        rows = [("a", date(2024, 1, day), float(day), 1) for day in range(1, 5)]
+
+        stats = velocity_stats(
+            rows, date(2024, 1, 1), date(2024, 1, 4), rolling_days=2, ewma_span=3
+        )["a"]
+
+        assert [day["rolling_points"] for day in stats["series"]] == [1.0, 3.0, 5.0, 7.0]
+        # adjust=False EWMA with alpha = 2 / (span + 1) = 0.5
+        assert [day["ewma_points"] for day in stats["series"]] == [1.0, 1.5, 2.25, 3.12]
+        assert stats["summary"]["rolling_velocity"] == 7.0
+        assert stats["summary"]["std_points_per_day"] == pytest.approx(1.12)
+        assert stats["summary"]["percentiles"]["p50"] == 2.5
+
+    def test_many_entities_in_one_pass(self):
+        rows = [
+            (1, datetime(2024, 1, 1, 15, 30), 2.0, 1),
+            (2, "2024-01-02", 8.0, 2),
+            (1, date(2024, 1, 2), 1.0, 1),
+        ]
+
+        stats = velocity_stats(rows, date(2024, 1, 1), date(2024, 1, 2), entities=[1, 2, 3])
+
+        assert list(stats) == [1, 2, 3]
+        assert stats[1]["summary"]["total_points"] == 3.0
+        assert stats[2]["summary"]["avg_points_per_task"] == 4.0
+        assert stats[3]["summary"]["total_tasks"] == 0
+        assert [day["points"] for day in stats[3]["series"]] == [0.0, 0.0]
+
+    def test_no_rows(self):
+        stats = velocity_stats([], date(2024, 1, 1), date(2024, 1, 1), entities=["a"])
+
+        assert stats["a"]["summary"]["total_points"] == 0.0
+        assert stats["a"]["summary"]["avg_points_per_task"] == 0.0
@@ -2,14 +2,20 @@ import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime
 
-from bot.main import StoryBot
+from bot.concurrency import PerChatUpdateProcessor
+from bot.main import StoryBot, WAITING_FOR_POINTS
 from core.models import User, StoryPoint
+from core.state import MemoryStateBackend
 
 
 class TestStoryBot:
     @pytest.fixture
-    def bot(self):
-        return StoryBot("test_token")
+    def state(self):
+        return MemoryStateBackend()
+
+    @pytest.fixture
+    def bot(self, state):
+        return StoryBot("test_token", state=state)
 
     @pytest.fixture
     def mock_update(self):
@@ -71,11 +77,12 @@ class TestStoryBot:
         # Should return early without calling any services
 
     @pytest.mark.asyncio
-    async def test_button_callback_add_points(self, bot, mock_context):
+    async def test_button_callback_add_points(self, bot, state, mock_context):
         query = Mock()
         query.answer = AsyncMock()
         query.edit_message_text = AsyncMock()
         query.data = "add_points"
+        query.from_user.id = 123456789
         
         update = Mock()
         update.callback_query = query
@@ -84,7 +91,7 @@ class TestStoryBot:
         
         query.answer.assert_called_once()
         query.edit_message_text.assert_called_once()
-        assert mock_context.user_data['waiting_for_points'] == True
+        assert await state.get(WAITING_FOR_POINTS, "123456789") == True
 
     @pytest.mark.asyncio
     async def test_button_callback_my_stats(self, bot, mock_context):
@@ -161,8 +168,8 @@ class TestStoryBot:
         assert "Справка" in call_args[0][0]
 
     @pytest.mark.asyncio
-    async def test_handle_message_waiting_for_points(self, bot, mock_update, mock_context):
-        mock_context.user_data['waiting_for_points'] = True
+    async def test_handle_message_waiting_for_points(self, bot, state, mock_update, mock_context):
+        await state.set(WAITING_FOR_POINTS, "123456789", True)
         
         with patch.object(bot, 'process_story_points') as mock_process:
             mock_process.return_value = None
@@ -170,7 +177,24 @@ class TestStoryBot:
             await bot.handle_message(mock_update, mock_context)
             
             mock_process.assert_called_once_with(mock_update, mock_context)
-            assert mock_context.user_data['waiting_for_points'] == False
+            assert await state.get(WAITING_FOR_POINTS, "123456789") is None
+
+    @pytest.mark.asyncio
+    async def test_waiting_flag_is_shared_between_replicas(
+        self, state, mock_callback_query, mock_update, mock_context
+    ):
+        first, second = StoryBot("test_token", state=state), StoryBot("test_token", state=state)
+        mock_callback_query.data = "add_points"
+        
+        await first.button_callback(Mock(callback_query=mock_callback_query), mock_context)
+        
+        with patch.object(first, 'process_story_points') as first_process, \
+                patch.object(second, 'process_story_points') as second_process:
+            await second.handle_message(mock_update, mock_context)
+            await first.handle_message(mock_update, mock_context)
+        
+        second_process.assert_called_once()
+        first_process.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_handle_message_not_waiting(self, bot, mock_update, mock_context):
@@ -310,4 +334,10 @@ class TestStoryBot:
             assert "🥈" in message  # Silver medal for second place
             assert "🥉" in message  # Bronze medal for third place
             assert "Winner" in message
-            assert "25" in message
\ No newline at end of file
+            assert "25" in message
+
+    def test_build_application_uses_per_chat_processor(self, bot):
+        application = bot.build_application()
+        
+        assert isinstance(application.update_processor, PerChatUpdateProcessor)
+        assert application.update_processor.max_concurrent_updates == 16
@@ -0,0 +1,79 @@
+from core.cache import LRUCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_get_missing_returns_default(self):
+        cache = TTLCache(ttl=10)
+        
+        assert cache.get("missing") is None
+        assert cache.get("missing", default=[]) == []
+
+    def test_entry_expires_after_ttl(self):
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        
+        cache.set("key", "value")
+        clock.now = 9.9
+        assert cache.get("key") == "value"
+        
+        clock.now = 10.0
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_invalidate_clears_entries(self):
+        cache = TTLCache(ttl=10)
+        cache.set("key", "value")
+        
+        cache.invalidate()
+        
+        assert cache.get("key") is None
+        assert cache.generation == 1
+
+    def test_set_with_stale_generation_is_ignored(self):
+        cache = TTLCache(ttl=10)
+        generation = cache.generation
+        
+        # A write lands while the reader is still computing its value
+        cache.invalidate()
+        cache.set("key", "stale", generation)
+        
+        assert cache.get("key") is None
+        
+        cache.set("key", "fresh", cache.generation)
+        assert cache.get("key") == "fresh"
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        # Touch "a" so "b" becomes the eviction candidate
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_delete_and_clear(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        cache.delete("a")
+        cache.delete("missing")
+        assert cache.get("a") is None
+        
+        cache.clear()
+        assert len(cache) == 0
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+
+from bot.concurrency import PerChatUpdateProcessor, ordering_key
+
+
+def _update(update_id: int, chat_id: int, text: str, bot) -> Update:
+    return Update.de_json(
+        {
+            "update_id": update_id,
+            "message": {
+                "message_id": update_id,
+                "date": 1700000000,
+                "chat": {"id": chat_id, "type": "private"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+                "text": text,
+            },
+        },
+        bot,
+    )
+
+
+async def _run(application: Application, updates) -> None:
+    async with application:
+        await application.start()
+        for update in updates:
+            await application.update_queue.put(update)
+        await application.update_queue.join()
+        await application.stop()
+
+
+class TestPerChatUpdateProcessor:
+    @pytest.mark.asyncio
+    async def test_chats_run_concurrently_in_order(self, bot_user):
+        processor = PerChatUpdateProcessor(4)
+        application = (
+            Application.builder().token("123:TEST").updater(None).concurrent_updates(processor).build()
+        )
+        order = {}
+        active = {"now": 0, "max": 0, "per_chat": {}}
+
+        async def handle(update, context):
+            chat_id = update.effective_chat.id
+            assert not active["per_chat"].get(chat_id), "same chat ran concurrently"
+            active["per_chat"][chat_id] = True
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+            await asyncio.sleep(0.01)
+            order.setdefault(chat_id, []).append(int(update.message.text))
+            active["now"] -= 1
+            active["per_chat"][chat_id] = False
+
+        application.add_handler(MessageHandler(filters.TEXT, handle))
+        updates = [
+            _update(seq * 10 + chat_id, chat_id, str(seq), application.bot)
+            for seq in range(5)
+            for chat_id in (1, 2, 3)
+        ]
+
+        await _run(application, updates)
+        # Updates queued behind a busy chat are acknowledged before they run
+        while processor.busy_chats:
+            await asyncio.sleep(0.01)
+
+        assert order == {chat_id: [0, 1, 2, 3, 4] for chat_id in (1, 2, 3)}
+        assert active["max"] == 3
+
+    @pytest.mark.asyncio
+    async def test_busy_chat_holds_one_slot(self, bot_user):
+        processor = PerChatUpdateProcessor(2)
+        application = (
+            Application.builder().token("123:TEST").updater(None).concurrent_updates(processor).build()
+        )
+        finished = []
+
+        async def handle(update, context):
+            await asyncio.sleep(0.05 if update.effective_chat.id == 1 else 0)
+            finished.append((update.effective_chat.id, update.message.text))
+
+        application.add_handler(MessageHandler(filters.TEXT, handle))
+        updates = [_update(i, 1, f"slow {i}", application.bot) for i in range(4)]
+        updates.append(_update(99, 2, "fast", application.bot))
+
+        await _run(application, updates)
+        while processor.busy_chats:
+            await asyncio.sleep(0.01)
+
+        # Chat 2 did not wait for chat 1's backlog
+        assert finished.index((2, "fast")) == 0
+        assert [text for chat_id, text in finished if chat_id == 1] == [
+            "slow 0", "slow 1", "slow 2", "slow 3"
+        ]
+
+    def test_ordering_key(self, bot_user):
+        update = _update(1, 7, "hi", None)
+
+        assert ordering_key(update) == ("chat", 7)
+        assert ordering_key(Update(2)) is None
+        assert ordering_key("not an update") is None
@@ -0,0 +1,258 @@
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from dotenv import dotenv_values
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from core.config import Settings
+from core.metrics import SERVICE_LATENCY, timed
+from core.models import User
+from db.database import DatabaseManager, pool_options
+from db.dialects import async_database_url
+from db.slow_queries import SlowQueryRecorder
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'pool.db'}")
+    manager = DatabaseManager(
+        Settings(db_pool_size=1, db_max_overflow=0, db_pool_timeout=0.2, db_pool_pre_ping=False)
+    )
+    yield manager
+    manager.engine.dispose()
+
+
+class TestPoolOptions:
+    def test_settings_are_applied_to_file_and_server_databases(self):
+        settings = Settings(db_pool_size=20, db_max_overflow=5, db_pool_recycle=-1)
+
+        for url in ("sqlite:///./storybot.db", "postgresql://bot@localhost/storybot"):
+            options = pool_options(url, settings)
+            assert options["pool_size"] == 20
+            assert options["max_overflow"] == 5
+            assert options["pool_recycle"] == -1
+            assert options["pool_pre_ping"] is True
+
+    def test_in_memory_sqlite_keeps_default_pool(self):
+        assert pool_options("sqlite://", Settings()) == {}
+        assert pool_options("sqlite:///:memory:", Settings()) == {}
+
+    def test_engine_uses_configured_pool(self, manager):
+        assert manager.engine.pool.size() == 1
+        assert manager.engine.pool.timeout() == 0.2
+
+
+class TestPoolMetrics:
+    def test_occupancy_and_churn(self, manager):
+        with manager.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert manager.pool_status()["sync"]["checked_out"] == 1
+
+        status = manager.pool_status()["sync"]
+        assert status["checkouts"] == 1
+        assert status["checked_out"] == 0
+        assert status["max_checked_out"] == 1
+        assert status["connections_opened"] == 1
+        assert status["pool_checkedin"] == 1
+        assert status["waits"] == 0
+
+        manager.engine.dispose()
+        assert manager.pool_status()["sync"]["connections_closed"] == 1
+
+    def test_checkout_wait_and_timeout(self, manager):
+        held = manager.engine.connect()
+        released = threading.Event()
+
+        def release_later():
+            released.wait(0.05)
+            held.close()
+
+        with pytest.raises(PoolTimeoutError):
+            manager.engine.connect()
+
+        thread = threading.Thread(target=release_later)
+        thread.start()
+        with manager.engine.connect():
+            pass
+        thread.join()
+
+        status = manager.pool_status()["sync"]
+        assert status["checkout_timeouts"] == 1
+        # The timed-out checkout and the one that waited for the release
+        assert status["waits"] == 2
+        assert status["wait_max_ms"] >= 150
+        assert status["wait_avg_ms"] > 0
+        assert status["connections_opened"] == 1
+
+    def test_connection_setup_is_not_reported_as_wait(self, manager):
+        event.listen(manager.engine, "connect", lambda *args: time.sleep(0.05))
+
+        with manager.engine.connect():
+            pass
+
+        status = manager.pool_status()["sync"]
+        assert status["waits"] == 0
+        assert status["wait_max_ms"] == 0
+        assert status["connect_max_ms"] >= 50
+
+
+class TestSqliteProfile:
+    def test_async_url_follows_configured_database(self, manager, tmp_path):
+        assert manager.async_database_url == f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}"
+        assert async_database_url("postgresql://bot:secret@db/storybot") == (
+            "postgresql+asyncpg://bot:secret@db/storybot"
+        )
+        assert async_database_url("sqlite+aiosqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+
+    def test_pragmas_on_sync_connections(self, manager):
+        with manager.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            # NORMAL
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+            assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+    @pytest.mark.asyncio
+    async def test_pragmas_on_async_connections(self, manager):
+        try:
+            async with manager.async_engine.connect() as conn:
+                assert (await conn.exec_driver_sql("PRAGMA journal_mode")).scalar() == "wal"
+                assert (await conn.exec_driver_sql("PRAGMA busy_timeout")).scalar() == 5000
+        finally:
+            await manager.async_engine.dispose()
+
+    def test_in_memory_database_is_left_alone(self, monkeypatch):
+        monkeypatch.setenv("DATABASE_URL", "sqlite://")
+        manager = DatabaseManager(Settings())
+        with manager.engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "memory"
+
+
+class TestLifecycle:
+    @pytest.fixture
+    def lazy_manager(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'lazy.db'}")
+        return DatabaseManager(Settings(db_pool_size=3, db_warm_up_connections=2))
+
+    def test_engines_are_created_by_init(self, lazy_manager):
+        assert "pool_size" not in lazy_manager.pool_status()["async"]
+
+        lazy_manager.init()
+        engine = lazy_manager.engine
+        lazy_manager.init()
+
+        assert lazy_manager.engine is engine
+        assert lazy_manager.pool_status()["sync"]["pool_size"] == 3
+        assert lazy_manager.pool_status()["async"]["pool_size"] == 3
+        engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_fills_the_pool_and_dispose_closes_it(self, lazy_manager):
+        assert await lazy_manager.warm_up() == 2
+        status = lazy_manager.pool_status()["async"]
+        assert status["connections_opened"] == 2
+        assert status["pool_checkedin"] == 2
+        # Capped at the pool size
+        assert await lazy_manager.warm_up(10) == 3
+
+        await lazy_manager.dispose()
+        status = lazy_manager.pool_status()["async"]
+        assert status["connections_closed"] == 3
+        assert "pool_size" not in status
+
+        # A disposed manager starts over on next use
+        async with lazy_manager.get_async_session() as session:
+            assert (await session.execute(text("SELECT 1"))).scalar() == 1
+        await lazy_manager.dispose()
+
+
+class TestSlowQueryLog:
+    def _manager(self, monkeypatch, tmp_path, **settings):
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'slow.db'}")
+        return DatabaseManager(
+            Settings(slow_query_log_path=str(tmp_path / "slow.log"), **settings)
+        )
+
+    def _records(self, tmp_path):
+        with open(tmp_path / "slow.log", encoding="utf-8") as log:
+            return [json.loads(line) for line in log]
+
+    def test_disabled_by_default(self, manager):
+        assert manager.slow_queries is None
+
+    def test_records_statement_caller_and_plan(self, monkeypatch, tmp_path):
+        manager = self._manager(
+            monkeypatch, tmp_path, slow_query_threshold_ms=0, slow_query_explain=True
+        )
+        manager.create_tables()
+
+        @timed(SERVICE_LATENCY, "UserService.lookup", track_operation=True)
+        def lookup():
+            with manager.engine.connect() as conn:
+                conn.execute(select(User.id).where(User.telegram_id == "42")).all()
+
+        lookup()
+        lookup()
+        manager.engine.dispose()
+
+        records = [r for r in self._records(tmp_path) if r["caller"] == "UserService.lookup"]
+        assert len(records) == 2
+        assert records[0]["dialect"] == "sqlite"
+        assert "FROM users" in records[0]["statement"]
+        assert records[0]["parameters"] == "('42',)"
+        assert any("users" in line for line in records[0]["plan"])
+        # Explained once per interval
+        assert "plan" not in records[1]
+
+    def test_env_example_leaves_it_disabled(self, monkeypatch):
+        # What the bot sees after `cp .env.example .env` and load_dotenv()
+        env_example = Path(__file__).resolve().parents[1] / ".env.example"
+        for name, value in dotenv_values(env_example).items():
+            monkeypatch.setenv(name, value)
+
+        assert Settings().slow_query_threshold_ms is None
+
+    def test_fast_statements_are_not_recorded(self, monkeypatch, tmp_path):
+        manager = self._manager(monkeypatch, tmp_path, slow_query_threshold_ms=10_000)
+        with manager.engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        manager.engine.dispose()
+
+        assert manager.slow_queries.recorded == 0
+        assert not (tmp_path / "slow.log").exists()
+
+    def test_log_rotates(self, monkeypatch, tmp_path):
+        manager = self._manager(
+            monkeypatch,
+            tmp_path,
+            slow_query_threshold_ms=0,
+            slow_query_log_max_bytes=500,
+            slow_query_log_backups=2,
+        )
+        with manager.engine.connect() as conn:
+            for _ in range(20):
+                conn.execute(text("SELECT 1"))
+        manager.engine.dispose()
+
+        assert (tmp_path / "slow.log.1").exists()
+        assert not (tmp_path / "slow.log.3").exists()
+
+    def test_explain_history_is_bounded(self, monkeypatch):
+        monkeypatch.setattr("db.slow_queries.MAX_EXPLAINED_STATEMENTS", 2)
+        recorder = SlowQueryRecorder(
+            0, logging.Logger("test"), explain=True, explain_interval=600, clock=lambda: 0.0
+        )
+
+        assert recorder._due("SELECT 1")
+        assert not recorder._due("SELECT 1")
+        for i in range(2, 10):
+            recorder._due(f"SELECT {i}")
+
+        assert len(recorder._explained) == 2
+        # Forgotten, so it may be explained again
+        assert recorder._due("SELECT 1")
@@ -0,0 +1,340 @@
+import csv
+import io
+import threading
+from datetime import datetime, timedelta
+
+import openpyxl
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+
+import core.export
+import db.database
+from core.export import ExportService
+from core.services import AsyncStoryPointService, AsyncTeamService, AsyncUserService, UserService
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def _rows(chunks):
+    return list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+
+
+@pytest_asyncio.fixture
+async def team_with_points(async_db, sample_user_data, sample_team_data):
+    user_service = AsyncUserService()
+    story_service = AsyncStoryPointService()
+    team_service = AsyncTeamService()
+
+    user = await user_service.get_or_create_user(**sample_user_data)
+    team = await team_service.create_team(**sample_team_data)
+    await team_service.add_team_member(team.id, user.telegram_id)
+
+    now = datetime.utcnow()
+    for i in range(5):
+        await story_service.add_story_point(
+            user.telegram_id, float(i + 1), f"Task {i + 1}", now - timedelta(hours=i)
+        )
+    # Outside the default 30 day window
+    await story_service.add_story_point(
+        user.telegram_id, 13.0, "Old task", now - timedelta(days=40)
+    )
+
+    return user, team
+
+
+class TestStreamingCsvExport:
+    @pytest.mark.asyncio
+    async def test_stream_user_data_csv_in_chunks(self, team_with_points):
+        user, _ = team_with_points
+        
+        chunks = await _collect(
+            ExportService().stream_user_data_csv(user.telegram_id, chunk_rows=2)
+        )
+        
+        # Header, then 5 rows split 2 + 2 + 1
+        assert len(chunks) == 4
+        rows = _rows(chunks)
+        assert rows[0] == ["Дата", "Story Points", "Описание", "Дата создания"]
+        assert [row[1] for row in rows[1:]] == ["1.0", "2.0", "3.0", "4.0", "5.0"]
+
+    @pytest.mark.asyncio
+    async def test_rows_are_formatted_off_the_event_loop(self, team_with_points, monkeypatch):
+        user, team = team_with_points
+        threads = set()
+
+        def spy(format_row):
+            def wrapper(*args):
+                threads.add(threading.get_ident())
+                return format_row(*args)
+            return wrapper
+
+        for name in ("_user_story_point_row", "_team_story_point_row"):
+            monkeypatch.setattr(core.export, name, spy(getattr(core.export, name)))
+        service = ExportService()
+        await _collect(service.stream_user_data_csv(user.telegram_id, chunk_rows=2))
+        await service.export_team_data_csv(team.id)
+        (await service.export_user_data_excel(user.telegram_id)).close()
+
+        assert threads and threading.get_ident() not in threads
+
+    @pytest.mark.asyncio
+    async def test_stream_user_data_csv_user_not_found(self, async_db):
+        with pytest.raises(ValueError, match="not found"):
+            await _collect(ExportService().stream_user_data_csv("nonexistent"))
+
+    @pytest.mark.asyncio
+    async def test_stream_team_data_csv(self, team_with_points):
+        _, team = team_with_points
+        
+        rows = _rows(await _collect(ExportService().stream_team_data_csv(team.id)))
+        
+        assert rows[0] == ["Команда", "Пользователь", "Дата", "Story Points", "Описание"]
+        assert len(rows) == 6
+        assert rows[1][:2] == ["Test Team", "Test User"]
+
+    @pytest.mark.asyncio
+    async def test_spool_rolls_over_to_disk(self, team_with_points):
+        user, _ = team_with_points
+        service = ExportService()
+        
+        spooled = await service.spool(
+            service.stream_user_data_csv(user.telegram_id, chunk_rows=1), max_size=64
+        )
+        try:
+            assert spooled._rolled
+            assert len(_rows([spooled.read()])) == 6
+        finally:
+            spooled.close()
+
+
+class TestExportService:
+    @pytest.mark.asyncio
+    async def test_export_user_data_csv(self, team_with_points):
+        user, _ = team_with_points
+        
+        output = await ExportService().export_user_data_csv(user.telegram_id)
+        
+        rows = list(csv.reader(output))
+        assert rows[0] == ["Дата", "Story Points", "Описание", "Дата создания"]
+        assert [row[2] for row in rows[1:]] == [f"Task {i}" for i in range(1, 6)]
+
+    @pytest.mark.asyncio
+    async def test_export_team_data_csv(self, team_with_points):
+        _, team = team_with_points
+        
+        output = await ExportService().export_team_data_csv(team.id)
+        
+        rows = list(csv.reader(output))
+        assert len(rows) == 6
+        assert rows[1][:2] == ["Test Team", "Test User"]
+
+    @pytest.mark.asyncio
+    async def test_export_team_data_csv_team_not_found(self, async_db):
+        with pytest.raises(ValueError, match="Team with id 999 not found"):
+            await ExportService().export_team_data_csv(999)
+
+    @pytest.mark.asyncio
+    async def test_export_leaderboard_csv(self, team_with_points):
+        output = await ExportService().export_leaderboard_csv()
+        
+        rows = list(csv.reader(output))
+        assert rows[1] == ["1", "Test User", "15.0", "5", "3.0"]
+
+    @pytest.mark.asyncio
+    async def test_export_user_data_excel(self, team_with_points):
+        user, _ = team_with_points
+        
+        output = await ExportService().export_user_data_excel(user.telegram_id)
+        
+        workbook = openpyxl.load_workbook(output)
+        assert workbook.sheetnames == ["Story Points", "Сводка"]
+        assert workbook["Story Points"].max_row == 6
+        summary = {row[0]: row[1] for row in workbook["Сводка"].iter_rows(min_row=2, values_only=True)}
+        assert summary["Всего Story Points"] == 15
+        assert summary["Всего задач"] == 5
+
+    @pytest.mark.asyncio
+    async def test_export_team_data_excel(self, team_with_points):
+        _, team = team_with_points
+
+        output = await ExportService().export_team_data_excel(team.id, chunk_rows=2)
+
+        workbook = openpyxl.load_workbook(output)
+        assert workbook["Story Points"].max_row == 6
+        summary = {row[0]: row[1] for row in workbook["Сводка"].iter_rows(min_row=2, values_only=True)}
+        assert summary["Всего Story Points"] == 15
+        assert summary["Активных участников"] == 1
+
+    @pytest.mark.asyncio
+    async def test_export_team_data_excel_counts_namesakes_separately(self, team_with_points):
+        user, team = team_with_points
+        namesake = await AsyncUserService().get_or_create_user(
+            "987654321", first_name=user.first_name, last_name=user.last_name
+        )
+        await AsyncTeamService().add_team_member(team.id, namesake.telegram_id)
+        await AsyncStoryPointService().add_story_point(namesake.telegram_id, 2.0, "Namesake task")
+
+        output = await ExportService().export_team_data_excel(team.id)
+
+        workbook = openpyxl.load_workbook(output)
+        summary = {row[0]: row[1] for row in workbook["Сводка"].iter_rows(min_row=2, values_only=True)}
+        assert summary["Активных участников"] == 2
+
+    @pytest.mark.asyncio
+    async def test_export_leaderboard_excel(self, team_with_points):
+        output = await ExportService().export_leaderboard_excel()
+
+        workbook = openpyxl.load_workbook(output)
+        rows = list(workbook["Лидерборд"].iter_rows(min_row=2, values_only=True))
+        assert rows == [(1, "Test User", 15, 5, 3)]
+
+    @pytest.mark.asyncio
+    async def test_export_user_data_parquet(self, team_with_points):
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        user, _ = team_with_points
+
+        output = await ExportService().export_user_data_parquet(user.telegram_id, chunk_rows=2)
+
+        parquet_file = pq.ParquetFile(output)
+        assert parquet_file.metadata.num_row_groups == 3
+        assert parquet_file.metadata.row_group(0).column(1).compression == "ZSTD"
+        table = parquet_file.read()
+        assert table.schema.field("points").type == pa.float32()
+        assert table.schema.field("date_completed").type == pa.timestamp("us")
+        assert table.column("points").to_pylist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    @pytest.mark.asyncio
+    async def test_export_team_data_parquet_partitioned_by_month(
+        self, async_db, sample_user_data, sample_team_data, tmp_path
+    ):
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        team = await AsyncTeamService().create_team(**sample_team_data)
+        await AsyncTeamService().add_team_member(team.id, user.telegram_id)
+        # Fixed dates, so the partitions do not depend on when the test runs
+        for points, completed in (
+            (3.0, datetime(2024, 1, 31, 23, 30)),
+            (5.0, datetime(2024, 2, 1, 0, 30)),
+            (8.0, datetime(2024, 2, 20, 12, 0)),
+        ):
+            await AsyncStoryPointService().add_story_point(
+                user.telegram_id, points, "Task", completed
+            )
+        export_dir = tmp_path / "export"
+
+        destination = await ExportService().export_team_data_parquet(
+            team.id,
+            days=(datetime.utcnow() - datetime(2024, 1, 1)).days,
+            destination=str(export_dir),
+            partition_by_month=True,
+        )
+
+        months = sorted(path.name for path in export_dir.iterdir())
+        assert months == ["month=2024-01", "month=2024-02"]
+        table = pq.read_table(destination)
+        assert table.num_rows == 3
+        assert pa.types.is_dictionary(table.schema.field("user").type)
+        assert sum(table.column("points").to_pylist()) == 16
+
+    @pytest.mark.asyncio
+    async def test_failed_parquet_export_closes_its_writers(self, team_with_points, monkeypatch):
+        pytest.importorskip("pyarrow")
+        user, _ = team_with_points
+        aborted = []
+        original_abort = core.export._ParquetStreamWriter.abort
+
+        def abort(writer):
+            aborted.append(writer)
+            original_abort(writer)
+
+        def failing_batch(rows):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(core.export._ParquetStreamWriter, "abort", abort)
+        monkeypatch.setattr(core.export, "_user_parquet_batch", failing_batch)
+
+        with pytest.raises(RuntimeError, match="boom"):
+            await ExportService().export_user_data_parquet(user.telegram_id)
+
+        assert len(aborted) == 1
+        assert aborted[0]._sink.closed
+
+    @pytest.mark.asyncio
+    async def test_export_parquet_partitioning_requires_destination(self, team_with_points):
+        pytest.importorskip("pyarrow")
+        user, _ = team_with_points
+
+        with pytest.raises(ValueError, match="destination"):
+            await ExportService().export_user_data_parquet(user.telegram_id, partition_by_month=True)
+
+    @pytest.mark.asyncio
+    async def test_get_velocity_report_user(self, team_with_points):
+        user, _ = team_with_points
+        
+        report = await ExportService().get_velocity_report(telegram_id=user.telegram_id)
+        
+        assert report["type"] == "user"
+        assert report["name"] == "Test"
+        assert sum(day["points"] for day in report["daily_breakdown"]) == 15.0
+        assert report["summary"]["total_points"] == 15.0
+        assert report["summary"]["total_tasks"] == 5
+        assert report["summary"]["avg_points_per_task"] == 3.0
+
+    @pytest.mark.asyncio
+    async def test_get_velocity_report_team(self, team_with_points):
+        _, team = team_with_points
+        
+        report = await ExportService().get_velocity_report(team_id=team.id)
+        
+        assert report["type"] == "team"
+        assert report["members_count"] == 1
+        assert report["summary"]["total_points"] == 15.0
+        assert len(report["series"]) == 31
+        assert report["members"][0]["name"] == "Test User"
+        assert report["members"][0]["summary"]["total_tasks"] == 5
+
+    @pytest.mark.asyncio
+    async def test_get_velocity_reports_batch(self, team_with_points):
+        user, team = team_with_points
+        empty_team = await AsyncTeamService().create_team("Empty Team")
+        service = ExportService()
+        statements = []
+        engine = db.database.db_manager.async_engine.sync_engine
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        UserService.identity_cache.clear()
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            reports = await service.get_velocity_reports(
+                team_ids=[team.id, empty_team.id], telegram_ids=[user.telegram_id]
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        # Team lookup, identity lookup and one grouped daily query
+        assert len(statements) == 3
+        single = await service.get_velocity_report(team_id=team.id)
+        assert reports["teams"][team.id]["summary"] == single["summary"]
+        assert reports["teams"][team.id]["members_count"] == 1
+        assert reports["teams"][empty_team.id]["summary"]["total_points"] == 0
+        assert reports["teams"][empty_team.id]["members_count"] == 0
+        assert reports["users"][user.telegram_id]["summary"]["total_tasks"] == 5
+        assert reports["users"][user.telegram_id]["daily_breakdown"] == single["daily_breakdown"]
+
+    @pytest.mark.asyncio
+    async def test_get_velocity_reports_unknown_team(self, team_with_points):
+        with pytest.raises(ValueError, match="not found"):
+            await ExportService().get_velocity_reports(team_ids=[999])
+
+    @pytest.mark.asyncio
+    async def test_get_velocity_report_requires_target(self, async_db):
+        with pytest.raises(ValueError, match="Either telegram_id or team_id"):
+            await ExportService().get_velocity_report()
@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only; see the notes in core/export.py and core/analytics.py
+LAZY_MODULES = ("pandas", "numpy", "openpyxl", "pyarrow")
+
+
+def _loaded_after_import(module: str, candidates) -> list:
+    """Import ``module`` in a fresh interpreter and report which ``candidates`` it loaded."""
+    probe = f"import sys, {module}; print(','.join(m for m in {tuple(candidates)!r} if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+@pytest.mark.parametrize("module", ["bot.main", "core.services", "core.export", "core.analytics"])
+def test_import_does_not_load_export_dependencies(module):
+    assert _loaded_after_import(module, LAZY_MODULES) == []
+
+
+def test_polling_bot_does_not_load_aiohttp():
+    assert _loaded_after_import("bot.main", ["aiohttp"]) == []
+
+
+def test_import_does_not_create_engines():
+    # aiosqlite is loaded when the async engine is created
+    assert _loaded_after_import("core.services", ["aiosqlite"]) == []
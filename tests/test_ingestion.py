@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from core.ingestion import StoryPointIngestor
+from core.models import DailyUserPoints, StoryPoint
+from core.services import AsyncStoryPointService, AsyncUserService
+
+
+class TestStoryPointIngestor:
+    @pytest.mark.asyncio
+    async def test_burst_is_written_in_one_flush(self, async_db, sample_user_data):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        ingestor = StoryPointIngestor(flush_interval=0.05, max_batch=100)
+        story_service = AsyncStoryPointService(ingestor=ingestor)
+        
+        await ingestor.start()
+        try:
+            story_points = await asyncio.gather(
+                *(
+                    story_service.add_story_point(user.telegram_id, float(i), f"Task {i}")
+                    for i in range(1, 11)
+                )
+            )
+        finally:
+            await ingestor.stop()
+        
+        assert [sp.points for sp in story_points] == [float(i) for i in range(1, 11)]
+        assert all(sp.id is not None for sp in story_points)
+        
+        metrics = ingestor.metrics()
+        assert metrics["flushes"] == 1
+        assert metrics["rows_written"] == 10
+        assert metrics["max_flush_size"] == 10
+        assert metrics["queue_depth"] == 0
+        
+        async with async_db.get_async_session() as session:
+            assert await session.scalar(select(func.count(StoryPoint.id))) == 10
+            rollup = (await session.scalars(select(DailyUserPoints))).one()
+        assert rollup.sum_points == 55.0
+        assert rollup.task_count == 10
+
+    @pytest.mark.asyncio
+    async def test_max_batch_splits_flushes(self, async_db, sample_user_data):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        ingestor = StoryPointIngestor(flush_interval=1.0, max_batch=3)
+        
+        await ingestor.start()
+        try:
+            await asyncio.gather(
+                *(ingestor.submit(user.telegram_id, 1.0, "Task") for _ in range(7))
+            )
+        finally:
+            await ingestor.stop()
+        
+        metrics = ingestor.metrics()
+        assert metrics["rows_written"] == 7
+        assert metrics["max_flush_size"] == 3
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_fails_only_its_submission(self, async_db, sample_user_data):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        ingestor = StoryPointIngestor(flush_interval=0.05)
+        
+        await ingestor.start()
+        try:
+            results = await asyncio.gather(
+                ingestor.submit(user.telegram_id, 5.0, "Known"),
+                ingestor.submit("nonexistent", 3.0, "Unknown"),
+                return_exceptions=True,
+            )
+        finally:
+            await ingestor.stop()
+        
+        assert results[0].points == 5.0
+        assert isinstance(results[1], ValueError)
+        assert "nonexistent" in str(results[1])
+        assert ingestor.metrics()["rows_failed"] == 1
+
+    @pytest.mark.asyncio
+    async def test_submit_requires_running_ingestor(self, async_db):
+        ingestor = StoryPointIngestor()
+        
+        with pytest.raises(RuntimeError):
+            await ingestor.submit("123", 1.0)
+
+    @pytest.mark.asyncio
+    async def test_submit_after_stop_raises(self, async_db, sample_user_data):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        ingestor = StoryPointIngestor(flush_interval=0.05)
+
+        await ingestor.start()
+        stopping = asyncio.create_task(ingestor.stop())
+        await asyncio.sleep(0)
+        with pytest.raises(RuntimeError):
+            await ingestor.submit(user.telegram_id, 1.0)
+        await stopping
+
+    @pytest.mark.asyncio
+    async def test_queued_submissions_fail_when_worker_is_cancelled(
+        self, async_db, sample_user_data
+    ):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        ingestor = StoryPointIngestor(flush_interval=10.0)
+
+        await ingestor.start()
+        submissions = [
+            asyncio.create_task(ingestor.submit(user.telegram_id, 1.0)) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        ingestor._task.cancel()
+        results = await asyncio.wait_for(
+            asyncio.gather(*submissions, return_exceptions=True), timeout=1
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert ingestor.metrics()["rows_failed"] == 3
+        with pytest.raises(RuntimeError):
+            await ingestor.submit(user.telegram_id, 1.0)
@@ -0,0 +1,186 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from sqlalchemy import create_engine, text
+from telegram.ext import Application
+from telegram.request import HTTPXRequest
+
+from bot.main import StoryBot
+from bot.metrics import TimedRequest
+from bot.webhook import create_webhook_app
+from core.metrics import (
+    HANDLER_LATENCY,
+    REGISTRY,
+    SERVICE_LATENCY,
+    STATEMENT_LATENCY,
+    TELEGRAM_LATENCY,
+    Histogram,
+    HistogramFamily,
+    MetricsRegistry,
+    current_operation,
+    instrument_methods,
+    timed,
+)
+from core.state import MemoryStateBackend
+from db.statement_metrics import attach_statement_timer, statement_label
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    REGISTRY.clear()
+    yield
+    REGISTRY.clear()
+
+
+class TestHistogram:
+    def test_quantiles_interpolate_within_buckets(self):
+        histogram = Histogram(buckets=(0.01, 0.02, 0.04))
+        for _ in range(50):
+            histogram.observe(0.005)
+        for _ in range(50):
+            histogram.observe(0.015)
+
+        assert histogram.count == 100
+        assert histogram.quantile(0.5) == pytest.approx(0.01)
+        assert histogram.quantile(0.95) == pytest.approx(0.019)
+        assert histogram.snapshot()["p50_ms"] == pytest.approx(10)
+
+    def test_empty_and_overflowing_histograms(self):
+        histogram = Histogram(buckets=(0.01, 0.02))
+        assert histogram.quantile(0.99) == 0.0
+
+        histogram.observe(30)
+        assert histogram.quantile(0.99) == 0.02
+        assert histogram.cumulative_counts() == [0, 0, 1]
+
+
+class TestTimed:
+    def test_sync_async_and_async_generator_functions(self):
+        family = HistogramFamily("test_seconds", "Test.", ("name",))
+
+        @timed(family, "sync")
+        def sync_call():
+            return 1
+
+        @timed(family, "async")
+        async def async_call():
+            return 2
+
+        @timed(family, "stream")
+        async def stream():
+            yield 1
+            yield 2
+
+        async def consume():
+            return [item async for item in stream()]
+
+        assert sync_call() == 1
+        assert asyncio.run(async_call()) == 2
+        assert asyncio.run(consume()) == [1, 2]
+        assert [family.labels(name).count for name in ("sync", "async", "stream")] == [1, 1, 1]
+
+    def test_errors_are_timed_too(self):
+        family = HistogramFamily("test_seconds", "Test.", ("name",))
+
+        @timed(family, "failing")
+        def failing():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            failing()
+        assert family.labels("failing").count == 1
+
+    @pytest.mark.asyncio
+    async def test_instrumented_methods_set_current_operation(self):
+        @instrument_methods
+        class SampleService:
+            async def lookup(self):
+                return current_operation.get()
+
+            def _helper(self):
+                return current_operation.get()
+
+        service = SampleService()
+        assert await service.lookup() == "SampleService.lookup"
+        assert service._helper() is None
+        assert current_operation.get() is None
+        assert SERVICE_LATENCY.labels("SampleService.lookup").count == 1
+
+    @pytest.mark.asyncio
+    async def test_bot_handlers_are_timed(self):
+        bot = StoryBot("123:TEST", state=MemoryStateBackend())
+        await bot.start(MagicMock(effective_user=None), MagicMock())
+
+        assert HANDLER_LATENCY.labels("start").count == 1
+
+
+class TestStatementMetrics:
+    def test_statement_label(self):
+        assert statement_label("SELECT users.id FROM users WHERE users.id = ?") == "SELECT users"
+        assert statement_label('INSERT INTO "story_points" (user_id) VALUES (?)') == (
+            "INSERT story_points"
+        )
+        assert statement_label("UPDATE teams SET name = ?") == "UPDATE teams"
+        assert statement_label("PRAGMA journal_mode") == "PRAGMA"
+
+    def test_statements_are_attributed_to_the_calling_method(self):
+        engine = create_engine("sqlite://")
+        attach_statement_timer(engine)
+
+        @timed(SERVICE_LATENCY, "Service.count", track_operation=True)
+        def count(conn):
+            return conn.execute(text("SELECT count(*) FROM sqlite_master")).scalar()
+
+        with engine.connect() as conn:
+            count(conn)
+            conn.execute(text("SELECT 1"))
+
+        assert STATEMENT_LATENCY.labels("SELECT sqlite_master", "Service.count").count == 1
+        assert STATEMENT_LATENCY.labels("SELECT", "-").count == 1
+
+
+class TestPrometheusExport:
+    def test_render_histograms_and_gauges(self):
+        registry = MetricsRegistry()
+        registry.histogram(
+            "storybot_service_duration_seconds", "Service time.", ("method",)
+        ).observe(0.003, 'Odd "name"')
+        registry.register_collector(
+            "test", lambda: [("storybot_test_gauge", "A gauge.", {"engine": "async"}, 2)]
+        )
+
+        body = registry.render_prometheus()
+
+        assert "# TYPE storybot_service_duration_seconds histogram" in body
+        assert 'storybot_service_duration_seconds_bucket{method="Odd \\"name\\"",le="0.0025"} 0' in body
+        assert 'storybot_service_duration_seconds_bucket{method="Odd \\"name\\"",le="0.005"} 1' in body
+        assert 'storybot_service_duration_seconds_bucket{method="Odd \\"name\\"",le="+Inf"} 1' in body
+        assert 'storybot_service_duration_seconds_count{method="Odd \\"name\\""} 1' in body
+        assert "# TYPE storybot_test_gauge gauge" in body
+        assert 'storybot_test_gauge{engine="async"} 2.0' in body
+
+    @pytest.mark.asyncio
+    async def test_webhook_app_serves_metrics(self):
+        SERVICE_LATENCY.observe(0.01, "AsyncStoryPointService.get_leaderboard")
+        application = Application.builder().token("123:TEST").updater(None).build()
+        client = TestClient(TestServer(create_webhook_app(application, "/telegram")))
+        await client.start_server()
+        try:
+            response = await client.get("/metrics")
+            assert response.status == 200
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            body = await response.text()
+        finally:
+            await client.close()
+
+        assert 'method="AsyncStoryPointService.get_leaderboard"' in body
+        assert "storybot_db_pool_checked_out" in body
+
+    @pytest.mark.asyncio
+    async def test_bot_api_requests_are_timed_by_method(self):
+        with patch.object(HTTPXRequest, "do_request", AsyncMock(return_value=(200, b"{}"))):
+            await TimedRequest().do_request("https://api.telegram.org/bot123:TEST/sendMessage", "POST")
+
+        assert TELEGRAM_LATENCY.labels("sendMessage").count == 1
@@ -1,5 +1,7 @@
 import pytest
 from datetime import datetime
+from sqlalchemy import inspect
+
 from core.models import User, StoryPoint, Team, TeamMember
 
 
@@ -106,6 +108,25 @@ class TestStoryPoint:
         assert story_point.id is not None
         assert story_point.description is None
 
+    def test_story_point_time_window_indexes(self, test_db):
+        indexes = {
+            index["name"]: index["column_names"]
+            for index in inspect(test_db).get_indexes("story_points")
+        }
+        
+        assert indexes["ix_story_points_user_id_date_completed"] == ["user_id", "date_completed"]
+        assert indexes["ix_story_points_date_completed"] == ["date_completed"]
+
+    def test_team_members_unique_index(self, test_db):
+        indexes = {
+            index["name"]: index
+            for index in inspect(test_db).get_indexes("team_members")
+        }
+        
+        index = indexes["uq_team_members_team_id_user_id"]
+        assert index["column_names"] == ["team_id", "user_id"]
+        assert index["unique"]
+
 
 class TestTeam:
     def test_team_creation(self, db_session, sample_team_data):
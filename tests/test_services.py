@@ -1,9 +1,22 @@
+import asyncio
+import io
+import json
+
 import pytest
 from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
 
-from core.services import UserService, StoryPointService, TeamService
-from core.models import User, StoryPoint, Team, TeamMember
+from core.services import (
+    leaderboard_cache,
+    UserService,
+    StoryPointService,
+    TeamService,
+    AsyncUserService,
+    AsyncStoryPointService,
+    AsyncTeamService,
+)
+from core.models import User, StoryPoint, Team, TeamMember, DailyUserPoints
+from core.rollup import rebuild_daily_rollup
 
 
 class TestUserService:
@@ -48,6 +61,30 @@ class TestUserService:
         assert user2.first_name == "Updated"
         assert user2.last_name == "Name"
 
+    def test_get_or_create_user_unchanged_skips_database(self, db_session, sample_user_data):
+        user_service = UserService()
+        
+        user1 = user_service.get_or_create_user(**sample_user_data)
+        
+        with patch("core.services.get_session") as mock_get_session:
+            user2 = user_service.get_or_create_user(**sample_user_data)
+            mock_get_session.assert_not_called()
+        
+        assert user2 == user1
+
+    def test_get_or_create_user_unchanged_cold_cache(self, db_session, sample_user_data):
+        user_service = UserService()
+        
+        user1 = user_service.get_or_create_user(**sample_user_data)
+        updated_at = db_session.query(User).one().updated_at
+        UserService.identity_cache.clear()
+        
+        user2 = user_service.get_or_create_user(**sample_user_data)
+        
+        assert user2 == user1
+        db_session.expire_all()
+        assert db_session.query(User).one().updated_at == updated_at
+
     def test_get_user_by_telegram_id_existing(self, db_session, sample_user_data):
         user_service = UserService()
         
@@ -68,6 +105,42 @@ class TestUserService:
         
         assert user is None
 
+    def test_resolve_identity_uses_cache(self, db_session, sample_user_data):
+        user_service = UserService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        
+        with patch("core.services.get_session") as mock_get_session:
+            identity = user_service.resolve_identity(sample_user_data["telegram_id"])
+            mock_get_session.assert_not_called()
+        
+        assert identity.id == user.id
+        assert identity.first_name == sample_user_data["first_name"]
+
+    def test_resolve_identity_refreshed_on_profile_change(self, db_session, sample_user_data):
+        user_service = UserService()
+        
+        user_service.get_or_create_user(**sample_user_data)
+        
+        updated_data = sample_user_data.copy()
+        updated_data["first_name"] = "Updated"
+        user_service.get_or_create_user(**updated_data)
+        
+        identity = user_service.resolve_identity(sample_user_data["telegram_id"])
+        assert identity.first_name == "Updated"
+
+    def test_resolve_identity_loads_on_miss(self, db_session, sample_user_data):
+        user_service = UserService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        user_service.invalidate_identity(sample_user_data["telegram_id"])
+        
+        identity = user_service.resolve_identity(sample_user_data["telegram_id"])
+        
+        assert identity.id == user.id
+        assert len(UserService.identity_cache) == 1
+        assert user_service.resolve_identity("nonexistent") is None
+
 
 class TestStoryPointService:
     def test_add_story_point_success(self, db_session, sample_user_data):
@@ -203,6 +276,26 @@ class TestStoryPointService:
         
         assert len(leaderboard) == 0
 
+    def test_get_leaderboard_cached_until_next_write(self, db_session, sample_user_data):
+        user_service = UserService()
+        story_service = StoryPointService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        story_service.add_story_point(user.telegram_id, 5.0, "Task 1")
+        
+        first = story_service.get_leaderboard(limit=10)
+        
+        # Served from the cache without touching the database
+        with patch("core.services.get_session") as mock_get_session:
+            assert story_service.get_leaderboard(limit=10) == first
+            mock_get_session.assert_not_called()
+        assert len(leaderboard_cache) == 1
+        
+        story_service.add_story_point(user.telegram_id, 3.0, "Task 2")
+        
+        assert len(leaderboard_cache) == 0
+        assert story_service.get_leaderboard(limit=10)[0]["points"] == 8.0
+
     def test_get_user_story_points(self, db_session, sample_user_data):
         user_service = UserService()
         story_service = StoryPointService()
@@ -227,6 +320,151 @@ class TestStoryPointService:
         assert len(story_points) == 0
 
 
+class TestBulkImport:
+    def test_bulk_import_csv(self, db_session, sample_user_data, tmp_path):
+        user_service = UserService()
+        story_service = StoryPointService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        path = tmp_path / "history.csv"
+        path.write_text(
+            "telegram_id,points,description,date_completed\n"
+            f"{user.telegram_id},5,Task 1,2024-03-01T10:00:00\n"
+            f"{user.telegram_id},3,,2024-03-01T15:30:00\n"
+            "unknown,8,Task 3,2024-03-02T10:00:00\n"
+            f"{user.telegram_id},2,Task 4,2024-03-02 09:00:00\n",
+            encoding="utf-8",
+        )
+        
+        report = story_service.bulk_import(path, batch_size=2)
+        
+        assert report.rows_imported == 3
+        assert report.rows_skipped == 1
+        assert report.unknown_telegram_ids == {"unknown"}
+        assert report.batches == 2
+        
+        story_points = db_session.query(StoryPoint).order_by(StoryPoint.date_completed).all()
+        assert [(sp.points, sp.description) for sp in story_points] == [
+            (5.0, "Task 1"),
+            (3.0, None),
+            (2.0, "Task 4"),
+        ]
+        rollup = db_session.query(DailyUserPoints).order_by(DailyUserPoints.day).all()
+        assert [(row.sum_points, row.task_count) for row in rollup] == [(8.0, 2), (2.0, 1)]
+
+    def test_bulk_import_jsonl_stream(self, db_session, sample_user_data):
+        user_service = UserService()
+        story_service = StoryPointService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        stream = io.StringIO(
+            json.dumps({
+                "telegram_id": user.telegram_id,
+                "points": 5,
+                "date_completed": datetime.utcnow().isoformat(),
+            }) + "\n\n"
+        )
+        
+        report = story_service.bulk_import(stream, format="jsonl")
+        
+        assert report.rows_imported == 1
+        assert story_service.get_user_stats(user.telegram_id)["total_points"] == 5.0
+
+    def test_bulk_import_invalid_record(self, db_session):
+        story_service = StoryPointService()
+        stream = io.StringIO("telegram_id,points,date_completed\n123,abc,2024-03-01\n")
+        
+        with pytest.raises(ValueError, match="Line 2"):
+            story_service.bulk_import(stream, format="csv")
+
+    def test_bulk_import_invalid_json_line(self, db_session):
+        valid = {"telegram_id": "1", "points": 1, "date_completed": "2024-03-01"}
+        stream = io.StringIO(json.dumps(valid) + "\n{oops\n")
+        
+        with pytest.raises(ValueError, match="Line 2: invalid JSON"):
+            StoryPointService().bulk_import(stream, format="jsonl")
+
+    def test_bulk_import_caps_reported_unknown_ids(self, db_session, monkeypatch):
+        monkeypatch.setattr("core.bulk_import.MAX_REPORTED_UNKNOWN_IDS", 2)
+        stream = io.StringIO(
+            "telegram_id,points,date_completed\n"
+            + "".join(f"missing{i % 4},1,2024-03-01\n" for i in range(8))
+        )
+        
+        report = StoryPointService().bulk_import(stream, format="csv")
+        
+        assert report.rows_skipped == 8
+        assert report.unknown_telegram_ids == {"missing0", "missing1"}
+        assert report.unknown_rows_unlisted == 4
+
+    def test_bulk_import_unknown_extension(self, db_session, tmp_path):
+        path = tmp_path / "history.txt"
+        path.write_text("")
+        
+        with pytest.raises(ValueError, match="Cannot infer import format"):
+            StoryPointService().bulk_import(path)
+
+
+class TestDailyRollup:
+    def test_add_story_point_updates_rollup(self, db_session, sample_user_data):
+        user_service = UserService()
+        story_service = StoryPointService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        day = datetime(2024, 3, 1, 9, 0, 0)
+        
+        story_service.add_story_point(user.telegram_id, 5.0, "Task 1", day)
+        story_service.add_story_point(user.telegram_id, 3.0, "Task 2", day + timedelta(hours=5))
+        story_service.add_story_point(user.telegram_id, 2.0, "Task 3", day + timedelta(days=1))
+        
+        rows = db_session.query(DailyUserPoints).order_by(DailyUserPoints.day).all()
+        
+        assert [(row.day, row.sum_points, row.task_count) for row in rows] == [
+            (day.date(), 8.0, 2),
+            ((day + timedelta(days=1)).date(), 2.0, 1),
+        ]
+
+    def test_stats_exact_on_partial_first_day(self, db_session, sample_user_data):
+        user_service = UserService()
+        story_service = StoryPointService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        window_start = datetime.utcnow() - timedelta(days=30)
+        
+        # Same calendar day as the window start, on either side of it
+        story_service.add_story_point(
+            user.telegram_id, 10.0, "Just outside", window_start - timedelta(minutes=1)
+        )
+        story_service.add_story_point(
+            user.telegram_id, 4.0, "Just inside", window_start + timedelta(minutes=1)
+        )
+        story_service.add_story_point(user.telegram_id, 6.0, "Today")
+        
+        stats = story_service.get_user_stats(user.telegram_id, days=30)
+        
+        assert stats["total_points"] == 10.0
+        assert stats["total_tasks"] == 2
+        assert stats["avg_points"] == 5.0
+
+    def test_rebuild_daily_rollup(self, db_session, sample_user_data):
+        user_service = UserService()
+        story_service = StoryPointService()
+        
+        user = user_service.get_or_create_user(**sample_user_data)
+        story_service.add_story_point(user.telegram_id, 5.0, "Task 1")
+        story_service.add_story_point(user.telegram_id, 3.0, "Task 2")
+        
+        db_session.query(DailyUserPoints).delete()
+        db_session.commit()
+        assert story_service.get_user_stats(user.telegram_id)["total_points"] == 0
+        
+        rows = rebuild_daily_rollup(db_session)
+        db_session.commit()
+        
+        assert rows == 1
+        assert story_service.get_user_stats(user.telegram_id)["total_points"] == 8.0
+
+
 class TestTeamService:
     def test_create_team(self, db_session, sample_team_data):
         team_service = TeamService()
@@ -289,6 +527,20 @@ class TestTeamService:
                 telegram_id="nonexistent"
             )
 
+    def test_add_team_member_twice_keeps_one_membership(
+        self, db_session, sample_team_data, sample_user_data
+    ):
+        team_service = TeamService()
+        user = UserService().get_or_create_user(**sample_user_data)
+        team = team_service.create_team(**sample_team_data)
+        
+        first = team_service.add_team_member(team.id, user.telegram_id, "developer")
+        second = team_service.add_team_member(team.id, user.telegram_id)
+        
+        assert second.id == first.id
+        assert second.role == "developer"
+        assert team_service.get_team_stats(team.id)["members_count"] == 1
+
     def test_get_team_stats_with_data(self, db_session, sample_team_data, sample_user_data):
         team_service = TeamService()
         user_service = UserService()
@@ -322,4 +574,174 @@ class TestTeamService:
         assert stats["total_points"] == 0.0
         assert stats["total_tasks"] == 0
         assert stats["avg_points"] == 0.0
-        assert stats["members_count"] == 0
\ No newline at end of file
+        assert stats["members_count"] == 0
+
+
+class TestAsyncUserService:
+    @pytest.mark.asyncio
+    async def test_get_or_create_user_new_user(self, async_db, sample_user_data):
+        user_service = AsyncUserService()
+        
+        user = await user_service.get_or_create_user(**sample_user_data)
+        
+        assert user.id is not None
+        assert user.telegram_id == sample_user_data["telegram_id"]
+        assert user.first_name == sample_user_data["first_name"]
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_user_update_existing(self, async_db, sample_user_data):
+        user_service = AsyncUserService()
+        
+        user1 = await user_service.get_or_create_user(**sample_user_data)
+        
+        updated_data = sample_user_data.copy()
+        updated_data["first_name"] = "Updated"
+        
+        user2 = await user_service.get_or_create_user(**updated_data)
+        
+        assert user1.id == user2.id
+        assert user2.first_name == "Updated"
+
+    @pytest.mark.asyncio
+    async def test_get_or_create_user_concurrent_calls(self, async_db, sample_user_data):
+        user_service = AsyncUserService()
+        
+        users = await asyncio.gather(
+            *(user_service.get_or_create_user(**sample_user_data) for _ in range(5))
+        )
+        
+        assert len({user.id for user in users}) == 1
+
+    @pytest.mark.asyncio
+    async def test_get_user_by_telegram_id_not_found(self, async_db):
+        user_service = AsyncUserService()
+        
+        user = await user_service.get_user_by_telegram_id("nonexistent")
+        
+        assert user is None
+
+
+class TestAsyncStoryPointService:
+    @pytest.mark.asyncio
+    async def test_add_story_point_and_stats(self, async_db, sample_user_data):
+        user_service = AsyncUserService()
+        story_service = AsyncStoryPointService()
+        
+        user = await user_service.get_or_create_user(**sample_user_data)
+        
+        story_point = await story_service.add_story_point(user.telegram_id, 5.0, "Task 1")
+        await story_service.add_story_point(user.telegram_id, 3.0, "Task 2")
+        await story_service.add_story_point(
+            user.telegram_id, 10.0, "Old task", datetime.utcnow() - timedelta(days=35)
+        )
+        
+        stats = await story_service.get_user_stats(user.telegram_id, days=30)
+        
+        assert story_point.id is not None
+        assert story_point.user_id == user.id
+        assert stats["total_points"] == 8.0
+        assert stats["total_tasks"] == 2
+        assert stats["avg_points"] == 4.0
+
+    @pytest.mark.asyncio
+    async def test_add_story_point_user_not_found(self, async_db):
+        story_service = AsyncStoryPointService()
+        
+        with pytest.raises(ValueError, match="User with telegram_id nonexistent not found"):
+            await story_service.add_story_point("nonexistent", 3.0, "Test")
+
+    @pytest.mark.asyncio
+    async def test_get_user_stats_user_not_found(self, async_db):
+        story_service = AsyncStoryPointService()
+        
+        assert await story_service.get_user_stats("nonexistent") is None
+
+    @pytest.mark.asyncio
+    async def test_get_leaderboard_with_data(self, async_db, sample_user_data):
+        user_service = AsyncUserService()
+        story_service = AsyncStoryPointService()
+        
+        user1 = await user_service.get_or_create_user(**sample_user_data)
+        
+        user2_data = sample_user_data.copy()
+        user2_data["telegram_id"] = "987654321"
+        user2_data["first_name"] = "User2"
+        user2 = await user_service.get_or_create_user(**user2_data)
+        
+        await story_service.add_story_point(user1.telegram_id, 10.0, "Task 1")
+        await story_service.add_story_point(user2.telegram_id, 15.0, "Task 2")
+        
+        leaderboard = await story_service.get_leaderboard(limit=10)
+        
+        assert leaderboard == [
+            {"name": "User2 User", "points": 15.0},
+            {"name": "Test User", "points": 10.0},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_user_story_points(self, async_db, sample_user_data):
+        user_service = AsyncUserService()
+        story_service = AsyncStoryPointService()
+        
+        user = await user_service.get_or_create_user(**sample_user_data)
+        await story_service.add_story_point(user.telegram_id, 5.0, "Task 1")
+        await story_service.add_story_point(user.telegram_id, 3.0, "Task 2")
+        
+        story_points = await story_service.get_user_story_points(user.telegram_id)
+        
+        assert sorted(sp.points for sp in story_points) == [3.0, 5.0]
+
+
+class TestAsyncTeamService:
+    @pytest.mark.asyncio
+    async def test_get_team_stats_with_data(self, async_db, sample_team_data, sample_user_data):
+        team_service = AsyncTeamService()
+        user_service = AsyncUserService()
+        story_service = AsyncStoryPointService()
+        
+        team = await team_service.create_team(**sample_team_data)
+        user = await user_service.get_or_create_user(**sample_user_data)
+        
+        team_member = await team_service.add_team_member(team.id, user.telegram_id, "developer")
+        
+        await story_service.add_story_point(user.telegram_id, 5.0, "Task 1")
+        await story_service.add_story_point(user.telegram_id, 8.0, "Task 2")
+        
+        stats = await team_service.get_team_stats(team.id)
+        
+        assert team_member.role == "developer"
+        assert stats["total_points"] == 13.0
+        assert stats["total_tasks"] == 2
+        assert abs(stats["avg_points"] - 6.5) < 0.001
+        assert stats["members_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_get_team_stats_ignores_non_members(
+        self, async_db, sample_team_data, sample_user_data
+    ):
+        team_service = AsyncTeamService()
+        user_service = AsyncUserService()
+        story_service = AsyncStoryPointService()
+        
+        team = await team_service.create_team(**sample_team_data)
+        member = await user_service.get_or_create_user(**sample_user_data)
+        outsider = await user_service.get_or_create_user("987654321", first_name="Other")
+        await team_service.add_team_member(team.id, member.telegram_id)
+        await team_service.add_team_member(team.id, member.telegram_id)
+        
+        await story_service.add_story_point(member.telegram_id, 3.0, "Task 1")
+        await story_service.add_story_point(outsider.telegram_id, 8.0, "Task 2")
+        
+        stats = await team_service.get_team_stats(team.id)
+        
+        assert stats["total_points"] == 3.0
+        assert stats["members_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_add_team_member_user_not_found(self, async_db, sample_team_data):
+        team_service = AsyncTeamService()
+        
+        team = await team_service.create_team(**sample_team_data)
+        
+        with pytest.raises(ValueError, match="User with telegram_id nonexistent not found"):
+            await team_service.add_team_member(team.id, "nonexistent")
@@ -0,0 +1,200 @@
+import asyncio
+import io
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from core import services
+from core.cache import TTLCache
+from core.models import BotState, StoryPoint
+from core.rollup import rollup_increments, rollup_upsert
+from core.services import (
+    LEADERBOARD_VERSION,
+    LEADERBOARD_VERSION_TTL,
+    AsyncStoryPointService,
+    AsyncUserService,
+    StoryPointService,
+    UserService,
+)
+from core.state import MemoryStateBackend, SqlStateBackend, get_state_backend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest_asyncio.fixture(params=["memory", "sql"])
+async def backend(request):
+    if request.param == "memory":
+        return MemoryStateBackend()
+    request.getfixturevalue("async_db")
+    return SqlStateBackend()
+
+
+class TestStateBackends:
+    @pytest.mark.asyncio
+    async def test_set_get_delete(self, backend):
+        assert await backend.get("ns", "k") is None
+        assert await backend.get("ns", "k", default=0) == 0
+
+        await backend.set("ns", "k", {"step": 1, "items": [1, 2]})
+        await backend.set("ns", "k", {"step": 2})
+        await backend.set("other", "k", True)
+
+        assert await backend.get("ns", "k") == {"step": 2}
+        assert await backend.get("other", "k") is True
+
+        await backend.delete("ns", "k")
+        assert await backend.get("ns", "k") is None
+
+    @pytest.mark.asyncio
+    async def test_pop_consumes_once(self, backend):
+        await backend.set("ns", "k", True)
+
+        assert await backend.pop("ns", "k") is True
+        assert await backend.pop("ns", "k") is None
+        assert await backend.get("ns", "k") is None
+
+    @pytest.mark.asyncio
+    async def test_set_sync(self, backend):
+        backend.set_sync("ns", "k", {"step": 1})
+        backend.set_sync("ns", "k", {"step": 2})
+
+        assert await backend.get("ns", "k") == {"step": 2}
+
+
+class TestExpiry:
+    @pytest.mark.asyncio
+    async def test_memory_entries_expire(self):
+        clock = FakeClock()
+        backend = MemoryStateBackend(clock=clock)
+        await backend.set("ns", "short", 1, ttl=10)
+        await backend.set("ns", "forever", 2)
+
+        clock.now += 11
+
+        assert await backend.get("ns", "short") is None
+        assert await backend.pop("ns", "short") is None
+        assert await backend.get("ns", "forever") == 2
+
+    @pytest.mark.asyncio
+    async def test_sql_entries_expire(self, async_db):
+        backend = SqlStateBackend()
+        await backend.set("ns", "short", 1, ttl=60)
+        await backend.set("ns", "forever", 2)
+        async with async_db.get_async_session() as session:
+            await session.execute(
+                update(BotState)
+                .where(BotState.key == "short")
+                .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await session.commit()
+
+        assert await backend.get("ns", "short") is None
+        assert await backend.pop("ns", "short") is None
+        await backend.set("ns", "stale", 3, ttl=60)
+        async with async_db.get_async_session() as session:
+            await session.execute(
+                update(BotState)
+                .where(BotState.key == "stale")
+                .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+            )
+            await session.commit()
+
+        assert await backend.purge_expired() == 1
+        async with async_db.get_async_session() as session:
+            keys = (await session.scalars(select(BotState.key))).all()
+        assert keys == ["forever"]
+
+
+class TestSharedLeaderboardInvalidation:
+    @pytest.fixture
+    def version_clock(self, monkeypatch):
+        clock = FakeClock()
+        monkeypatch.setattr(
+            services, "_leaderboard_version", TTLCache(LEADERBOARD_VERSION_TTL, clock)
+        )
+        return clock
+
+    @pytest.mark.asyncio
+    async def test_write_on_another_replica_invalidates_cache(
+        self, async_db, sample_user_data, version_clock
+    ):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        story_service = AsyncStoryPointService()
+        await story_service.add_story_point(user.telegram_id, 3.0, "Task 1")
+        assert (await story_service.get_leaderboard())[0]["points"] == 3.0
+
+        # Another replica's write: rows reach the database, but only the shared
+        # version tells this process that its cached leaderboard is stale
+        now = datetime.utcnow()
+        async with async_db.get_async_session() as session:
+            session.add(StoryPoint(user_id=user.id, points=5.0, date_completed=now))
+            await session.execute(rollup_upsert("sqlite", rollup_increments([(user.id, now, 5.0)])))
+            await session.commit()
+        await get_state_backend().set(*LEADERBOARD_VERSION, "from-another-replica")
+
+        # The version read is cached too, so it is noticed once that expires
+        assert (await story_service.get_leaderboard())[0]["points"] == 3.0
+        version_clock.now += LEADERBOARD_VERSION_TTL
+        assert (await story_service.get_leaderboard())[0]["points"] == 8.0
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_does_not_read_the_state_backend(
+        self, async_db, sample_user_data, version_clock, monkeypatch
+    ):
+        user = await AsyncUserService().get_or_create_user(**sample_user_data)
+        story_service = AsyncStoryPointService()
+        await story_service.add_story_point(user.telegram_id, 3.0, "Task 1")
+        await story_service.get_leaderboard()
+
+        backend = get_state_backend()
+        reads = []
+        original_get = backend.get
+
+        async def counting_get(*args, **kwargs):
+            reads.append(args)
+            return await original_get(*args, **kwargs)
+
+        monkeypatch.setattr(backend, "get", counting_get)
+        for _ in range(3):
+            await story_service.get_leaderboard()
+        assert reads == []
+
+    def test_sync_writes_publish_a_new_version(self, db_session, sample_user_data):
+        user = UserService().get_or_create_user(**sample_user_data)
+        before = asyncio.run(get_state_backend().get(*LEADERBOARD_VERSION))
+
+        StoryPointService().add_story_point(user.telegram_id, 3.0, "Task 1")
+        after_add = asyncio.run(get_state_backend().get(*LEADERBOARD_VERSION))
+        StoryPointService().bulk_import(
+            io.StringIO(f"telegram_id,points,date_completed\n{user.telegram_id},2,2024-03-01\n"),
+            format="csv",
+        )
+        after_import = asyncio.run(get_state_backend().get(*LEADERBOARD_VERSION))
+
+        assert len({before, after_add, after_import}) == 3
+
+    @pytest.mark.asyncio
+    async def test_sync_write_is_visible_to_the_next_read_inside_a_loop(
+        self, db_session, sample_user_data
+    ):
+        user = UserService().get_or_create_user(**sample_user_data)
+        story_service = StoryPointService()
+
+        story_service.add_story_point(user.telegram_id, 3.0, "Task 1")
+        assert story_service.get_leaderboard()[0]["points"] == 3.0
+        story_service.add_story_point(user.telegram_id, 5.0, "Task 2")
+        assert story_service.get_leaderboard()[0]["points"] == 8.0
+
+        # Only the publish to other replicas is left to the loop
+        await asyncio.gather(*services._pending_invalidations)
+        assert await get_state_backend().get(*LEADERBOARD_VERSION) == (
+            await services._shared_leaderboard_version()
+        )
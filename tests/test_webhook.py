@@ -0,0 +1,159 @@
+import asyncio
+import socket
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from telegram.ext import Application, MessageHandler, filters
+
+from bot.main import StoryBot
+from bot.webhook import HEALTH_PATH, SECRET_TOKEN_HEADER, create_webhook_app, serve_webhook
+from core.config import Settings
+
+
+def _message_update(update_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1700000000,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+class TestWebhookApp:
+    @pytest.mark.asyncio
+    async def test_fake_client_updates_reach_handlers(self, bot_user):
+        application = Application.builder().token("123:TEST").updater(None).build()
+        received = []
+        done = asyncio.Event()
+
+        async def record(update, context):
+            received.append(update.message.text)
+            if len(received) == 3:
+                done.set()
+
+        application.add_handler(MessageHandler(filters.TEXT, record))
+        client = TestClient(TestServer(create_webhook_app(application, "/telegram", "s3cret")))
+
+        async with application:
+            await application.start()
+            await client.start_server()
+            try:
+                for i, text in enumerate(["5 First", "3 Second", "8 Third"], 1):
+                    response = await client.post(
+                        "/telegram",
+                        json=_message_update(i, text),
+                        headers={SECRET_TOKEN_HEADER: "s3cret"},
+                    )
+                    assert response.status == 200
+                await asyncio.wait_for(done.wait(), timeout=5)
+            finally:
+                await client.close()
+                await application.stop()
+
+        assert sorted(received) == ["3 Second", "5 First", "8 Third"]
+
+    @pytest.mark.asyncio
+    async def test_rejects_wrong_secret_and_bad_json(self):
+        application = Application.builder().token("123:TEST").updater(None).build()
+        client = TestClient(TestServer(create_webhook_app(application, "/telegram", "s3cret")))
+        await client.start_server()
+        try:
+            response = await client.post(
+                "/telegram", json=_message_update(1, "hi"), headers={SECRET_TOKEN_HEADER: "nope"}
+            )
+            assert response.status == 403
+
+            response = await client.post(
+                "/telegram", data="not json", headers={SECRET_TOKEN_HEADER: "s3cret"}
+            )
+            assert response.status == 400
+            assert application.update_queue.empty()
+        finally:
+            await client.close()
+
+    @pytest.mark.asyncio
+    async def test_health_reflects_application_state(self, bot_user):
+        bot = StoryBot("123:TEST")
+        application = bot.build_application()
+        client = TestClient(
+            TestServer(
+                create_webhook_app(application, "/telegram", health_details=lambda: {"extra": 1})
+            )
+        )
+        await client.start_server()
+        try:
+            response = await client.get(HEALTH_PATH)
+            assert response.status == 503
+
+            async with application:
+                await application.start()
+                response = await client.get(HEALTH_PATH)
+                body = await response.json()
+                await application.stop()
+
+            assert response.status == 200
+            assert body == {"status": "ok", "update_queue": 0, "extra": 1}
+        finally:
+            await client.close()
+
+
+class TestServeWebhook:
+    @pytest.mark.asyncio
+    async def test_serves_until_stopped(self, bot_user):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        settings = Settings(
+            webhook_enabled=True, webhook_listen="127.0.0.1", webhook_port=port
+        )
+        lifecycle = []
+        received = asyncio.Event()
+
+        async def post_init(application):
+            lifecycle.append("init")
+
+        async def post_shutdown(application):
+            lifecycle.append("shutdown")
+
+        async def record(update, context):
+            received.set()
+
+        application = (
+            Application.builder()
+            .token("123:TEST")
+            .updater(None)
+            .post_init(post_init)
+            .post_shutdown(post_shutdown)
+            .build()
+        )
+        application.add_handler(MessageHandler(filters.TEXT, record))
+        stop_event = asyncio.Event()
+        server = asyncio.create_task(serve_webhook(application, settings, stop_event=stop_event))
+
+        base_url = f"http://127.0.0.1:{port}"
+        async with aiohttp.ClientSession() as client:
+            for _ in range(50):
+                try:
+                    async with client.get(base_url + HEALTH_PATH) as response:
+                        if response.status == 200:
+                            break
+                except aiohttp.ClientConnectionError:
+                    pass
+                await asyncio.sleep(0.05)
+
+            async with client.post(
+                base_url + settings.webhook_path, json=_message_update(1, "5 Done")
+            ) as response:
+                assert response.status == 200
+            await asyncio.wait_for(received.wait(), timeout=5)
+
+        stop_event.set()
+        await asyncio.wait_for(server, timeout=5)
+
+        assert lifecycle == ["init", "shutdown"]
+        assert not application.running